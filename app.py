@@ -22,64 +22,37 @@ Dependencies:
 """
 
 
-import cProfile
-import pstats
-import io
-from functools import wraps
-from flask import request
-
-
-from flask import Flask, request, jsonify
-from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
-from models import db, Customer, Goods, Purchase, Review
-from schemas import goods_list_schema
-from recommendations import get_recommendations_for_customer
-
-
-from models import db, Customer, Goods, Purchase, Review, Wishlist
-from schemas import wishlist_schema, wishlist_list_schema
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import os
 from datetime import datetime, timezone
 
+from flask import Blueprint, Flask, current_app, jsonify, request
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity, jwt_required
+from sqlalchemy.exc import IntegrityError
 
-def profile_route(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        profiler = cProfile.Profile()
-        profiler.enable()
-        response = func(*args, **kwargs)
-        profiler.disable()
-
-        # Save profiling stats to a file
-        profiler.dump_stats('output.prof')
-
-        s = io.StringIO()
-        ps = pstats.Stats(profiler, stream=s).sort_stats(pstats.SortKey.CUMULATIVE)
-        ps.print_stats()
-        print(s.getvalue())
-        return response
-    return wrapper
-
-
-
-from flask import Flask, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import (
-    JWTManager, create_access_token,
-    jwt_required, get_jwt_identity
-)
-from werkzeug.security import generate_password_hash, check_password_hash
 import config
-from models import db, Customer, Goods, Purchase, Review
-from schemas import CustomerSchema, GoodsSchema, PurchaseSchema, ReviewSchema
-
-# Initialize Flask application
-app = Flask(__name__)
-app.config.from_object(config.Config)
-
-# Initialize extensions
-db.init_app(app)
-jwt = JWTManager(app)
+import database
+import importer
+import serializers
+import wallet
+from catalog import filter_goods, goods_page, parse_goods_filters, parse_page
+from checkout import CheckoutError, adjust_wallet, checkout, purchase
+from hashing import HashingBusyError, password_hasher
+from identity import current_identity, identity_cache, identity_claims
+from loaders import eager
+from models import db, Customer, Goods, Purchase, Review, WalletTransaction, Wishlist
+from profiler import sampling_profiler
+from recommendations import co_purchase_index, get_recommendations_for_customer, top_sellers
+from response_cache import cached, response_cache
+from routing import read_only
+from schemas import CartSchema, CustomerSchema, GoodsSchema, PurchaseSchema, ReviewSchema, WalletTransactionSchema
+from schemas import wishlist_list_schema, wishlist_schema
+from serializers import compile_serializer
+from shared_cache import shared_cache
+from streaming import ndjson_response, wants_stream
+from versions import conditional, versions
+
+api = Blueprint('api', __name__)
+jwt = JWTManager()
 
 # Initialize Marshmallow schemas
 customer_schema = CustomerSchema()
@@ -94,9 +67,84 @@ purchases_schema = PurchaseSchema(many=True)
 review_schema = ReviewSchema()
 reviews_schema = ReviewSchema(many=True)
 
+cart_schema = CartSchema()
+
+wallet_transactions_schema = WalletTransactionSchema(many=True)
+
+# Precompiled equivalents of the schemas' dump() for the read endpoints
+dump_customer = compile_serializer(customer_schema)
+dump_customers = compile_serializer(customers_schema)
+dump_goods = compile_serializer(goods_schema)
+dump_goods_list = compile_serializer(goods_list_schema)
+dump_purchase = compile_serializer(purchase_schema)
+dump_purchases = compile_serializer(purchases_schema)
+dump_reviews = compile_serializer(reviews_schema)
+dump_review = compile_serializer(review_schema)
+dump_wallet_transactions = compile_serializer(wallet_transactions_schema)
 
-@app.route('/customers/register', methods=['POST'])
-@profile_route
+
+def create_app(config_object=config.Config):
+    """
+    Create and configure a Flask application.
+
+    Optional subsystems are only imported when used: flask_profiler is set up when
+    FLASK_PROFILER_ENABLED is true, and the recommender loads numpy on its first
+    index build rather than at startup.
+
+    Args:
+        config_object: Object whose uppercase attributes configure the application.
+
+    Returns:
+        Flask: The application, with every extension initialized and routes registered.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+
+    # Initialize extensions
+    db.init_app(app)
+    database.init_app(app)
+    shared_cache.init_app(app)
+    jwt.init_app(app)
+    identity_cache.init_app(app)
+    password_hasher.init_app(app)
+    co_purchase_index.init_app(app)
+    top_sellers.init_app(app)
+    sampling_profiler.init_app(app)
+    serializers.init_app(app)
+    response_cache.init_app(app)
+
+    app.register_blueprint(api)
+    app.cli.add_command(wallet.snapshot_command)
+    app.cli.add_command(importer.import_command)
+
+    if app.config.get('FLASK_PROFILER_ENABLED'):
+        _init_flask_profiler(app)
+    return app
+
+
+def _init_flask_profiler(app):
+    import flask_profiler
+
+    app.config["flask_profiler"] = {
+        "enabled": True,
+        "storage": {
+            # sqlite storage with measurements queued and written in batches off the request path
+            "engine": "profiler_storage.BufferedSqliteStorage",
+            "file": "./flask_profiler.db",  # Use a separate SQLite database
+        },
+        "basicAuth": {
+            "enabled": False,
+        },
+        "ignore": ["^/static/.*"],
+    }
+    flask_profiler.init_app(app)
+    # flask_profiler reads request.data before every view, which would drain the
+    # streamed body of a goods import, so that view is left unprofiled
+    view = app.view_functions['api.import_goods']
+    app.view_functions['api.import_goods'] = getattr(view, '__wrapped__', view)
+
+
+@api.route('/customers/register', methods=['POST'])
 def register_customer():
     """
     Register a New Customer.
@@ -129,6 +177,10 @@ def register_customer():
                 "error": "Username already exists."
             }
             Or validation errors.
+        503 Service Unavailable:
+            {
+                "error": "Too many password hashes in progress."
+            }
     """
     data = request.get_json()
     errors = customer_schema.validate(data)
@@ -138,7 +190,10 @@ def register_customer():
     if Customer.query.filter_by(username=data['username']).first():
         return jsonify({'error': 'Username already exists.'}), 400
 
-    hashed_password = generate_password_hash(data['password'])
+    try:
+        hashed_password = password_hasher.hash(data['password'])
+    except HashingBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     new_customer = Customer(
         full_name=data['full_name'],
         username=data['username'],
@@ -147,7 +202,7 @@ def register_customer():
         address=data['address'],
         gender=data.get('gender'),
         marital_status=data.get('marital_status'),
-        wallet_balance=0.0
+        wallet_balance_cents=0
     )
     db.session.add(new_customer)
     db.session.commit()
@@ -157,13 +212,16 @@ def register_customer():
     }), 201
 
 
-@app.route('/customers/login', methods=['POST'])
+@api.route('/customers/login', methods=['POST'])
 def login():
     """
     Authenticate a Customer and Provide a JWT Token.
 
     This endpoint authenticates a customer using their username and password.
     Upon successful authentication, it returns a JWT access token for authorized access.
+    A password stored with other hashing parameters than PASSWORD_HASH_METHOD is
+    rehashed with the current ones, unless the hashing pool is busy, in which case
+    the rehash is left for a later login.
 
     **Endpoint:**
         POST /customers/login
@@ -183,24 +241,45 @@ def login():
             {
                 "error": "Invalid username or password."
             }
+        503 Service Unavailable:
+            {
+                "error": "Too many password hashes in progress."
+            }
     """
     data = request.get_json()
     username = data.get('username')
     password = data.get('password')
     customer = Customer.query.filter_by(username=username).first()
-    if customer and check_password_hash(customer.password, password):
-        access_token = create_access_token(identity=customer.username)
+    try:
+        authenticated = customer is not None and password_hasher.verify(customer.password, password)
+    except HashingBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    if authenticated and password_hasher.needs_rehash(customer.password):
+        try:
+            # Only replace the hash if the password was not changed in the meantime
+            Customer.query.filter_by(id=customer.id, password=customer.password).update(
+                {'password': password_hasher.hash(password)}, synchronize_session=False
+            )
+            db.session.commit()
+        except HashingBusyError:
+            # The old hash still works; a later login will upgrade it
+            pass
+    if authenticated:
+        access_token = create_access_token(
+            identity=customer.username,
+            additional_claims=identity_claims(customer)
+        )
         return jsonify(access_token=access_token), 200
     else:
         return jsonify({'error': 'Invalid username or password.'}), 401
 
 
-@app.route('/')
+@api.route('/')
 def index():
     return "Welcome to the E-commerce API!"
 
 
-@app.route('/customers/<string:username>', methods=['DELETE'])
+@api.route('/customers/<string:username>', methods=['DELETE'])
 @jwt_required()
 def delete_customer(username):
     """
@@ -242,7 +321,7 @@ def delete_customer(username):
         return jsonify({'error': 'Customer not found.'}), 404
 
 
-@app.route('/customers/<string:username>', methods=['PUT'])
+@api.route('/customers/<string:username>', methods=['PUT'])
 @jwt_required()
 def update_customer(username):
     """
@@ -302,13 +381,15 @@ def update_customer(username):
     return jsonify({'message': 'Customer information updated successfully.'}), 200
 
 
-@app.route('/customers', methods=['GET'])
+@api.route('/customers', methods=['GET'])
 @jwt_required()
 def get_all_customers():
     """
     Retrieve All Customers.
 
     This endpoint allows an admin user to retrieve a list of all customers in the system.
+    Requesting ``application/x-ndjson`` (or passing ``stream=1``) streams one customer
+    per line instead of building the whole list in memory.
 
     **Endpoint:**
         GET /customers
@@ -317,6 +398,9 @@ def get_all_customers():
         - JWT token required.
         - Token must belong to an admin user.
 
+    **Query Parameters:**
+        stream (bool): "1" to stream the customers as NDJSON.                 # Optional
+
     **Responses:**
         200 OK:
             [
@@ -338,17 +422,17 @@ def get_all_customers():
                 "error": "Unauthorized access."
             }
     """
-    current_user = get_jwt_identity()
-    # Assuming you have an 'is_admin' field in your customer model
-    customer = Customer.query.filter_by(username=current_user).first()
-    if not customer.is_admin:
+    identity = current_identity()
+    if not identity or not identity.is_admin:
         return jsonify({'error': 'Unauthorized access.'}), 403
+    if wants_stream():
+        return ndjson_response(Customer.query.order_by(Customer.id), dump_customer)
     customers = Customer.query.all()
-    result = customers_schema.dump(customers)
+    result = dump_customers(customers)
     return jsonify(result), 200
 
 
-@app.route('/customers/<string:username>', methods=['GET'])
+@api.route('/customers/<string:username>', methods=['GET'])
 @jwt_required()
 def get_customer(username):
     """
@@ -397,7 +481,7 @@ def get_customer(username):
         return jsonify({'error': 'Customer not found.'}), 404
 
 
-@app.route('/customers/<string:username>/wallet/charge', methods=['POST'])
+@api.route('/customers/<string:username>/wallet/charge', methods=['POST'])
 @jwt_required()
 def charge_wallet(username):
     """
@@ -427,6 +511,10 @@ def charge_wallet(username):
             {
                 "error": "Invalid amount."
             }
+            Or
+            {
+                "error": "Amount must not exceed 1000000."
+            }
         403 Forbidden:
             {
                 "error": "Unauthorized access."
@@ -436,27 +524,26 @@ def charge_wallet(username):
                 "error": "Customer not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
-    if not customer or not customer.is_admin:
+    identity = current_identity()
+    if not identity or not identity.is_admin:
         return jsonify({'error': 'Unauthorized access.'}), 403
     data = request.get_json()
     amount = data.get('amount')
-    if amount is None or amount <= 0:
-        return jsonify({'error': 'Invalid amount.'}), 400
-    customer = Customer.query.filter_by(username=username).first()
-    if customer:
-        customer.wallet_balance += amount
-        db.session.commit()
-        return jsonify({
-            'message': f'${amount} has been added to {username}\'s wallet.',
-            'wallet_balance': customer.wallet_balance
-        }), 200
-    else:
-        return jsonify({'error': 'Customer not found.'}), 404
+    try:
+        wallet.parse_amount(amount, current_app.config['WALLET_MAX_AMOUNT'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        wallet_balance = adjust_wallet(username, amount)
+    except CheckoutError as e:
+        return jsonify({'error': e.message}), e.status_code
+    return jsonify({
+        'message': f'${amount} has been added to {username}\'s wallet.',
+        'wallet_balance': wallet_balance
+    }), 200
 
 
-@app.route('/customers/<string:username>/wallet/deduct', methods=['POST'])
+@api.route('/customers/<string:username>/wallet/deduct', methods=['POST'])
 @jwt_required()
 def deduct_wallet(username):
     """
@@ -487,6 +574,10 @@ def deduct_wallet(username):
                 "error": "Invalid amount."
             }
             Or
+            {
+                "error": "Amount must not exceed 1000000."
+            }
+            Or
             {
                 "error": "Insufficient wallet balance."
             }
@@ -499,30 +590,201 @@ def deduct_wallet(username):
                 "error": "Customer not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
-    if not customer or not customer.is_admin:
+    identity = current_identity()
+    if not identity or not identity.is_admin:
         return jsonify({'error': 'Unauthorized access.'}), 403
     data = request.get_json()
     amount = data.get('amount')
-    if amount is None or amount <= 0:
-        return jsonify({'error': 'Invalid amount.'}), 400
-    customer = Customer.query.filter_by(username=username).first()
-    if customer:
-        if customer.wallet_balance >= amount:
-            customer.wallet_balance -= amount
-            db.session.commit()
-            return jsonify({
-                'message': f'${amount} has been deducted from {username}\'s wallet.',
-                'wallet_balance': customer.wallet_balance
-            }), 200
+    try:
+        wallet.parse_amount(amount, current_app.config['WALLET_MAX_AMOUNT'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        wallet_balance = adjust_wallet(username, -amount)
+    except CheckoutError as e:
+        return jsonify({'error': e.message}), e.status_code
+    return jsonify({
+        'message': f'${amount} has been deducted from {username}\'s wallet.',
+        'wallet_balance': wallet_balance
+    }), 200
+
+
+@api.route('/customers/wallet/bulk-charge', methods=['POST'])
+@jwt_required()
+def bulk_charge_wallets():
+    """
+    Charge Many Customers' Wallets at Once.
+
+    This endpoint allows an admin to add funds to thousands of wallets in one request,
+    e.g. for a promotion. Valid rows are applied together in one transaction with a
+    few set-based statements; invalid rows (including amounts above WALLET_MAX_AMOUNT)
+    and unknown customers are reported per row and do not prevent the others from
+    being charged.
+
+    **Endpoint:**
+        POST /customers/wallet/bulk-charge
+
+    **Authentication:**
+        - JWT token required.
+        - Token must belong to an admin user.
+
+    **Request JSON:**
+        {
+            "charges": [
+                {"username": "johndoe", "amount": 5.0},
+                {"username": "janedoe", "amount": 7.5},
+                ...
+            ]
+        }
+
+    **Responses:**
+        200 OK:
+            {
+                "charged": 1,
+                "failed": 1,
+                "results": [
+                    {"index": 0, "username": "johndoe", "wallet_balance": 55.0},
+                    {"index": 1, "username": "janedoe", "error": "Customer not found."}
+                ]
+            }
+        400 Bad Request:
+            {
+                "error": "Provide between 1 and 10000 charges."
+            }
+        403 Forbidden:
+            {
+                "error": "Unauthorized access."
+            }
+    """
+    identity = current_identity()
+    if not identity or not identity.is_admin:
+        return jsonify({'error': 'Unauthorized access.'}), 403
+    charges = (request.get_json(silent=True) or {}).get('charges')
+    max_items = current_app.config['BULK_CHARGE_MAX_ITEMS']
+    if not isinstance(charges, list) or not 1 <= len(charges) <= max_items:
+        return jsonify({'error': f'Provide between 1 and {max_items} charges.'}), 400
+
+    results = []
+    amounts = {}
+    max_amount = current_app.config['WALLET_MAX_AMOUNT']
+    for index, charge in enumerate(charges):
+        charge = charge if isinstance(charge, dict) else {}
+        username, amount = charge.get('username'), charge.get('amount')
+        result = {'index': index, 'username': username}
+        results.append(result)
+        if not isinstance(username, str) or not username:
+            result['error'] = 'Invalid username.'
+            continue
+        try:
+            amount_cents = wallet.parse_amount(amount, max_amount)
+        except ValueError as e:
+            result['error'] = str(e)
+            continue
+        if username in amounts:
+            result['error'] = 'Duplicate username.'
         else:
-            return jsonify({'error': 'Insufficient wallet balance.'}), 400
-    else:
+            amounts[username] = amount_cents
+
+    try:
+        balances = wallet.credit_many(amounts, chunk_size=current_app.config['BULK_CHARGE_CHUNK_SIZE'])
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+
+    for result in results:
+        if 'error' in result:
+            continue
+        if result['username'] in balances:
+            result['wallet_balance'] = balances[result['username']] / 100
+        else:
+            result['error'] = 'Customer not found.'
+    failed = sum('error' in result for result in results)
+    return jsonify({
+        'charged': len(results) - failed,
+        'failed': failed,
+        'results': results
+    }), 200
+
+
+@api.route('/customers/<string:username>/wallet/transactions', methods=['GET'])
+@jwt_required()
+def get_wallet_transactions(username):
+    """
+    Retrieve a Customer's Wallet History.
+
+    This endpoint returns the wallet ledger of a customer, oldest first, one page at a
+    time. Each entry records the balance right after it was applied.
+
+    **Endpoint:**
+        GET /customers/<username>/wallet/transactions
+
+    **Authentication:**
+        - JWT token required.
+        - Token must belong to the customer or to an admin user.
+
+    **Query Parameters:**
+        after_id (int): Return transactions with an id greater than this cursor.  # Optional
+        limit (int): Page size, capped at WALLET_MAX_PAGE_SIZE.                   # Optional
+
+    **Responses:**
+        200 OK:
+            {
+                "items": [
+                    {
+                        "id": 1,
+                        "amount": 50.0,
+                        "balance_after": 50.0,
+                        "kind": "charge",
+                        "created_at": "2024-12-03T12:34:56"
+                    },
+                    ...
+                ],
+                "next_after_id": null
+            }
+        400 Bad Request:
+            {
+                "error": "Invalid value for limit."
+            }
+        403 Forbidden:
+            {
+                "error": "Unauthorized access."
+            }
+        404 Not Found:
+            {
+                "error": "Customer not found."
+            }
+    """
+    identity = current_identity()
+    if not identity or (identity.username != username and not identity.is_admin):
+        return jsonify({'error': 'Unauthorized access.'}), 403
+    try:
+        after_id, limit = parse_page(
+            request.args,
+            current_app.config['WALLET_PAGE_SIZE'],
+            current_app.config['WALLET_MAX_PAGE_SIZE']
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    customer_id = (identity.customer_id if identity.username == username
+                   else db.session.query(Customer.id).filter_by(username=username).scalar())
+    if customer_id is None:
         return jsonify({'error': 'Customer not found.'}), 404
 
+    rows = (WalletTransaction.query
+            .filter(WalletTransaction.customer_id == customer_id, WalletTransaction.id > after_id)
+            .order_by(WalletTransaction.id)
+            .limit(limit + 1)
+            .all())
+    items = rows[:limit]
+    return jsonify({
+        'items': dump_wallet_transactions(items),
+        'next_after_id': items[-1].id if len(rows) > limit else None
+    }), 200
+
 
-@app.route('/goods', methods=['POST'])
+@api.route('/goods', methods=['POST'])
 @jwt_required()
 def add_goods():
     """
@@ -562,9 +824,8 @@ def add_goods():
                 "error": "Unauthorized access."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
-    if not customer or not customer.is_admin:
+    identity = current_identity()
+    if not identity or not identity.is_admin:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
     data = request.get_json()
@@ -588,7 +849,77 @@ def add_goods():
     }), 201
 
 
-@app.route('/goods/<int:goods_id>', methods=['PUT'])
+@api.route('/goods/import', methods=['POST'])
+@jwt_required()
+def import_goods():
+    """
+    Import Goods in Bulk.
+
+    This endpoint allows an admin user to load a catalog file of any size. The request
+    body is read as a stream and written in batches of GOODS_IMPORT_BATCH_SIZE rows, each
+    in its own transaction. Rows with an ``id`` replace the goods with that id (or create
+    it); rows without one are added as new goods. Invalid rows are skipped and reported.
+    The same import is available offline as ``flask import-goods FILE``.
+
+    **Endpoint:**
+        POST /goods/import
+
+    **Authentication:**
+        - JWT token required.
+        - Token must belong to an admin user.
+
+    **Query Parameters:**
+        format (str): "csv" or "ndjson"; defaults to the request's Content-Type.  # Optional
+
+    **Request Body (text/csv):**
+        id,name,category,price_per_item,description,count_in_stock
+        1,Laptop,electronics,999.99,A high-end gaming laptop.,10
+        ,USB-C Cable,accessories,9.99,,100
+
+    **Request Body (application/x-ndjson):**
+        {"id": 1, "name": "Laptop", "category": "electronics", "price_per_item": 999.99, "count_in_stock": 10}
+        {"name": "USB-C Cable", "category": "accessories", "price_per_item": 9.99, "count_in_stock": 100}
+
+    **Responses:**
+        200 OK:
+            {
+                "imported": 2,
+                "failed": 1,
+                "errors": [
+                    {"line": 4, "errors": {"price_per_item": ["Not a valid number."]}}
+                ],
+                "seconds": 0.012,
+                "rows_per_second": 250
+            }
+        400 Bad Request:
+            {
+                "error": "Send text/csv or application/x-ndjson."
+            }
+        403 Forbidden:
+            {
+                "error": "Unauthorized access."
+            }
+    """
+    identity = current_identity()
+    if not identity or not identity.is_admin:
+        return jsonify({'error': 'Unauthorized access.'}), 403
+
+    fmt = request.args.get('format') or {
+        'text/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+    }.get(request.mimetype)
+    if fmt not in importer.FORMATS:
+        return jsonify({'error': 'Send text/csv or application/x-ndjson.'}), 400
+
+    report = importer.import_goods(
+        importer.read_rows(request.stream, fmt),
+        current_app.config['GOODS_IMPORT_BATCH_SIZE'],
+        current_app.config['GOODS_IMPORT_MAX_ERRORS']
+    )
+    return jsonify(importer.report_to_dict(report)), 200
+
+
+@api.route('/goods/<int:goods_id>', methods=['PUT'])
 @jwt_required()
 def update_goods(goods_id):
     """
@@ -630,9 +961,8 @@ def update_goods(goods_id):
                 "error": "Goods not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
-    if not customer or not customer.is_admin:
+    identity = current_identity()
+    if not identity or not identity.is_admin:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
     goods = Goods.query.get(goods_id)
@@ -659,7 +989,7 @@ def update_goods(goods_id):
     return jsonify({'message': 'Goods updated successfully.'}), 200
 
 
-@app.route('/goods/<int:goods_id>/deduct', methods=['POST'])
+@api.route('/goods/<int:goods_id>/deduct', methods=['POST'])
 @jwt_required()
 def deduct_goods(goods_id):
     """
@@ -702,9 +1032,8 @@ def deduct_goods(goods_id):
                 "error": "Goods not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
-    if not customer or not customer.is_admin:
+    identity = current_identity()
+    if not identity or not identity.is_admin:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
     goods = Goods.query.get(goods_id)
@@ -727,7 +1056,7 @@ def deduct_goods(goods_id):
         return jsonify({'error': 'Not enough items in stock to deduct.'}), 400
 
 
-@app.route('/goods/<int:goods_id>', methods=['DELETE'])
+@api.route('/goods/<int:goods_id>', methods=['DELETE'])
 @jwt_required()
 def delete_goods(goods_id):
     """
@@ -756,9 +1085,8 @@ def delete_goods(goods_id):
                 "error": "Goods not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
-    if not customer or not customer.is_admin:
+    identity = current_identity()
+    if not identity or not identity.is_admin:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
     goods = Goods.query.get(goods_id)
@@ -770,16 +1098,31 @@ def delete_goods(goods_id):
     return jsonify({'message': 'Goods deleted successfully.'}), 200
 
 
-@app.route('/goods', methods=['GET'])
+@api.route('/goods', methods=['GET'])
+@read_only
+@conditional(lambda: ['catalog'])
+@cached(lambda: ['catalog'])
 def get_all_goods():
     """
     Retrieve All Goods.
 
     This endpoint allows any user to retrieve a list of all goods available in the inventory.
+    Passing ``after_id`` and/or ``limit`` switches to cursor-paginated mode, where each page
+    is located by the last id of the previous page instead of an offset. Otherwise,
+    requesting ``application/x-ndjson`` (or passing ``stream=1``) streams one goods per line.
 
     **Endpoint:**
         GET /goods
 
+    **Query Parameters:**
+        category (str): Only return goods of this category.                 # Optional
+        min_price (float): Only return goods priced at or above this value.  # Optional
+        max_price (float): Only return goods priced at or below this value.  # Optional
+        in_stock (bool): "true" for goods in stock, "false" for sold out.    # Optional
+        after_id (int): Return goods with an id greater than this cursor.    # Optional
+        limit (int): Page size, capped at GOODS_MAX_PAGE_SIZE.               # Optional
+        stream (bool): "1" to stream the goods as NDJSON.                    # Optional
+
     **Responses:**
         200 OK:
             [
@@ -793,13 +1136,47 @@ def get_all_goods():
                 },
                 ...
             ]
+            Or, in cursor-paginated mode:
+            {
+                "items": [...],
+                "next_after_id": 20     # null on the last page
+            }
+        304 Not Modified:
+            Empty body, when If-None-Match matches the current ETag.
+        400 Bad Request:
+            {
+                "error": "Invalid value for limit."
+            }
     """
-    goods_list = Goods.query.all()
-    result = goods_list_schema.dump(goods_list)
-    return jsonify(result), 200
+    paginated = 'after_id' in request.args or 'limit' in request.args
+    try:
+        filters = parse_goods_filters(request.args)
+        if paginated:
+            after_id, limit = parse_page(
+                request.args,
+                current_app.config['GOODS_PAGE_SIZE'],
+                current_app.config['GOODS_MAX_PAGE_SIZE']
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = filter_goods(Goods.query, filters)
+    if not paginated:
+        if wants_stream():
+            return ndjson_response(query.order_by(Goods.id), dump_goods)
+        return jsonify(dump_goods_list(query.all())), 200
+
+    items, next_after_id = goods_page(query, after_id, limit)
+    return jsonify({
+        'items': dump_goods_list(items),
+        'next_after_id': next_after_id
+    }), 200
 
 
-@app.route('/goods/<int:goods_id>', methods=['GET'])
+@api.route('/goods/<int:goods_id>', methods=['GET'])
+@read_only
+@conditional(lambda goods_id: [('goods', goods_id)])
+@cached(lambda goods_id: [('goods', goods_id)])
 def get_goods(goods_id):
     """
     Retrieve Specific Goods Details.
@@ -819,19 +1196,26 @@ def get_goods(goods_id):
                 "description": "A high-end gaming laptop.",
                 "count_in_stock": 10
             }
+        304 Not Modified:
+            Empty body, when If-None-Match matches the current ETag.
         404 Not Found:
             {
                 "error": "Goods not found."
             }
     """
-    goods = Goods.query.get(goods_id)
-    if not goods:
+    def load_goods():
+        goods = db.session.get(Goods, goods_id)
+        return dump_goods(goods) if goods else None
+
+    # Shared by all workers; the version in the key retires it on any write
+    key = f'goods:{goods_id}:{versions.request_etag(("goods", goods_id))}'
+    result = shared_cache.fetch(key, load_goods, current_app.config['GOODS_CACHE_TTL'])
+    if result is None:
         return jsonify({'error': 'Goods not found.'}), 404
-    result = goods_schema.dump(goods)
     return jsonify(result), 200
 
 
-@app.route('/sales', methods=['POST'])
+@api.route('/sales', methods=['POST'])
 @jwt_required()
 def make_sale():
     """
@@ -876,9 +1260,8 @@ def make_sale():
                 "error": "Goods not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
-    if not customer:
+    identity = current_identity()
+    if not identity:
         return jsonify({'error': 'Customer not found.'}), 404
 
     data = request.get_json()
@@ -889,48 +1272,108 @@ def make_sale():
     if quantity <= 0:
         return jsonify({'error': 'Quantity must be at least 1.'}), 400
 
-    goods = Goods.query.get(goods_id)
-    if not goods:
-        return jsonify({'error': 'Goods not found.'}), 404
+    try:
+        purchase_id, wallet_balance = purchase(identity.customer_id, goods_id, quantity)
+    except CheckoutError as e:
+        return jsonify({'error': e.message}), e.status_code
 
-    if goods.count_in_stock < quantity:
-        return jsonify({'error': 'Not enough items in stock.'}), 400
+    return jsonify({
+        'message': 'Purchase successful.',
+        'purchase_id': purchase_id,
+        'wallet_balance': wallet_balance
+    }), 201
 
-    total_price = goods.price_per_item * quantity
-    if customer.wallet_balance < total_price:
-        return jsonify({'error': 'Insufficient funds in wallet.'}), 400
 
-    # Deduct money from customer's wallet
-    customer.wallet_balance -= total_price
+@api.route('/sales/cart', methods=['POST'])
+@jwt_required()
+def checkout_cart():
+    """
+    Check Out a Cart of Goods.
 
-    # Decrease count of purchased goods
-    goods.count_in_stock -= quantity
+    This endpoint allows a customer to buy several goods at once. Stock is reserved,
+    the wallet is debited and all purchases are recorded in a single transaction:
+    either every item is bought or nothing changes.
 
-    # Record the purchase
-    new_purchase = Purchase(
-        customer_id=customer.id,
-        goods_id=goods.id,
-        quantity=quantity,
-        total_price=total_price,
-        purchase_date=datetime.now(timezone.utc)
-    )
-    db.session.add(new_purchase)
-    db.session.commit()
+    **Endpoint:**
+        POST /sales/cart
+
+    **Authentication:**
+        - JWT token required.
+
+    **Request JSON:**
+        {
+            "items": [
+                {"goods_id": 1, "quantity": 2},
+                {"goods_id": 3}                  # quantity defaults to 1
+            ]
+        }
+
+    **Responses:**
+        201 Created:
+            {
+                "message": "Checkout successful.",
+                "purchase_ids": [7, 8],
+                "total_price": 59.97,
+                "wallet_balance": 940.03
+            }
+        400 Bad Request:
+            {
+                "error": "Not enough items in stock.",
+                "goods_id": 3
+            }
+            Or
+            {
+                "error": "Insufficient funds in wallet."
+            }
+            Or validation errors.
+        404 Not Found:
+            {
+                "error": "Goods not found.",
+                "goods_id": 3
+            }
+            Or
+            {
+                "error": "Customer not found."
+            }
+    """
+    identity = current_identity()
+    if not identity:
+        return jsonify({'error': 'Customer not found.'}), 404
+
+    data = request.get_json()
+    errors = cart_schema.validate(data)
+    if errors:
+        return jsonify(errors), 400
+    cart = cart_schema.load(data)
+    if len(cart['items']) > current_app.config['CART_MAX_ITEMS']:
+        return jsonify({'error': f'A cart can hold at most {current_app.config["CART_MAX_ITEMS"]} items.'}), 400
+
+    lines = [(item['goods_id'], item['quantity']) for item in cart['items']]
+    try:
+        receipt = checkout(identity.customer_id, lines)
+    except CheckoutError as e:
+        error = {'error': e.message}
+        if e.goods_id is not None:
+            error['goods_id'] = e.goods_id
+        return jsonify(error), e.status_code
 
     return jsonify({
-        'message': 'Purchase successful.',
-        'purchase_id': new_purchase.id,
-        'wallet_balance': customer.wallet_balance
+        'message': 'Checkout successful.',
+        'purchase_ids': receipt.purchase_ids,
+        'total_price': receipt.total_price,
+        'wallet_balance': receipt.wallet_balance
     }), 201
 
 
-@app.route('/customers/<string:username>/purchases', methods=['GET'])
+@api.route('/customers/<string:username>/purchases', methods=['GET'])
 @jwt_required()
 def get_purchase_history(username):
     """
     Retrieve a Customer's Purchase History.
 
     This endpoint allows a customer to retrieve their own purchase history.
+    Requesting ``application/x-ndjson`` (or passing ``stream=1``) streams one purchase
+    per line instead of building the whole list in memory.
 
     **Endpoint:**
         GET /customers/<username>/purchases
@@ -939,6 +1382,9 @@ def get_purchase_history(username):
         - JWT token required.
         - Token must belong to the customer whose history is being retrieved.
 
+    **Query Parameters:**
+        stream (bool): "1" to stream the purchases as NDJSON.                 # Optional
+
     **Responses:**
         200 OK:
             [
@@ -961,20 +1407,22 @@ def get_purchase_history(username):
                 "error": "Customer not found."
             }
     """
-    current_username = get_jwt_identity()
-    if current_username != username:
+    if get_jwt_identity() != username:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
-    customer = Customer.query.filter_by(username=username).first()
-    if not customer:
+    identity = current_identity()
+    if not identity:
         return jsonify({'error': 'Customer not found.'}), 404
 
-    purchases = Purchase.query.filter_by(customer_id=customer.id).all()
-    result = purchases_schema.dump(purchases)
+    query = eager(Purchase.query, 'purchase_history').filter_by(customer_id=identity.customer_id)
+    if wants_stream():
+        return ndjson_response(query.order_by(Purchase.id), dump_purchase)
+    purchases = query.all()
+    result = dump_purchases(purchases)
     return jsonify(result), 200
 
 
-@app.route('/reviews', methods=['POST'])
+@api.route('/reviews', methods=['POST'])
 @jwt_required()
 def submit_review():
     """
@@ -1024,9 +1472,8 @@ def submit_review():
                 "error": "Customer not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
-    if not customer:
+    identity = current_identity()
+    if not identity:
         return jsonify({'error': 'Customer not found.'}), 404
 
     data = request.get_json()
@@ -1039,12 +1486,12 @@ def submit_review():
         return jsonify({'error': 'Goods not found.'}), 404
 
     # Check if customer has already reviewed this product
-    existing_review = Review.query.filter_by(customer_id=customer.id, goods_id=goods.id).first()
+    existing_review = Review.query.filter_by(customer_id=identity.customer_id, goods_id=goods.id).first()
     if existing_review:
         return jsonify({'error': 'You have already reviewed this product.'}), 400
 
     new_review = Review(
-        customer_id=customer.id,
+        customer_id=identity.customer_id,
         goods_id=goods.id,
         rating=data['rating'],
         comment=data.get('comment', ''),
@@ -1052,14 +1499,19 @@ def submit_review():
         is_moderated=False
     )
     db.session.add(new_review)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request inserted the same review after our check
+        db.session.rollback()
+        return jsonify({'error': 'You have already reviewed this product.'}), 400
     return jsonify({
         'message': 'Review submitted successfully.',
         'review': review_schema.dump(new_review)
     }), 201
 
 
-@app.route('/reviews/<int:review_id>', methods=['PUT'])
+@api.route('/reviews/<int:review_id>', methods=['PUT'])
 @jwt_required()
 def update_review(review_id):
     """
@@ -1107,15 +1559,16 @@ def update_review(review_id):
                 "error": "Review not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
+    identity = current_identity()
+    if not identity:
+        return jsonify({'error': 'Customer not found.'}), 404
 
     review = Review.query.get(review_id)
     if not review:
         return jsonify({'error': 'Review not found.'}), 404
 
     # Check if the requester is the owner of the review or an admin
-    if review.customer_id != customer.id and not customer.is_admin:
+    if review.customer_id != identity.customer_id and not identity.is_admin:
         return jsonify({'error': 'You can only update your own reviews.'}), 403
 
     data = request.get_json()
@@ -1132,7 +1585,7 @@ def update_review(review_id):
     return jsonify({'message': 'Review updated successfully.', 'review': review_schema.dump(review)}), 200
 
 
-@app.route('/reviews/<int:review_id>', methods=['DELETE'])
+@api.route('/reviews/<int:review_id>', methods=['DELETE'])
 @jwt_required()
 def delete_review(review_id):
     """
@@ -1161,15 +1614,16 @@ def delete_review(review_id):
                 "error": "Review not found."
             }
     """
-    current_username = get_jwt_identity()
-    customer = Customer.query.filter_by(username=current_username).first()
+    identity = current_identity()
+    if not identity:
+        return jsonify({'error': 'Customer not found.'}), 404
 
     review = Review.query.get(review_id)
     if not review:
         return jsonify({'error': 'Review not found.'}), 404
 
     # Check if the requester is the owner of the review or an admin
-    if review.customer_id != customer.id and not customer.is_admin:
+    if review.customer_id != identity.customer_id and not identity.is_admin:
         return jsonify({'error': 'You are not authorized to delete this review.'}), 403
 
     db.session.delete(review)
@@ -1177,7 +1631,10 @@ def delete_review(review_id):
     return jsonify({'message': 'Review deleted successfully.'}), 200
 
 
-@app.route('/goods/<int:goods_id>/reviews', methods=['GET'])
+@api.route('/goods/<int:goods_id>/reviews', methods=['GET'])
+@read_only
+@conditional(lambda goods_id: [('goods', goods_id), ('reviews', goods_id)])
+@cached(lambda goods_id: [('goods', goods_id), ('reviews', goods_id)])
 def get_product_reviews(goods_id):
     """
     Retrieve Reviews for a Specific Goods Item.
@@ -1201,6 +1658,8 @@ def get_product_reviews(goods_id):
                 },
                 ...
             ]
+        304 Not Modified:
+            Empty body, when If-None-Match matches the current ETag.
         404 Not Found:
             {
                 "error": "Goods not found."
@@ -1210,12 +1669,12 @@ def get_product_reviews(goods_id):
     if not goods:
         return jsonify({'error': 'Goods not found.'}), 404
 
-    reviews = Review.query.filter_by(goods_id=goods_id).all()
-    result = reviews_schema.dump(reviews)
+    reviews = eager(Review.query, 'product_reviews').filter_by(goods_id=goods_id).all()
+    result = dump_reviews(reviews)
     return jsonify(result), 200
 
 
-@app.route('/customers/<string:username>/reviews', methods=['GET'])
+@api.route('/customers/<string:username>/reviews', methods=['GET'])
 @jwt_required()
 def get_customer_reviews(username):
     """
@@ -1253,20 +1712,20 @@ def get_customer_reviews(username):
                 "error": "Customer not found."
             }
     """
-    current_username = get_jwt_identity()
-    if current_username != username and not Customer.query.filter_by(username=current_username, is_admin=True).first():
+    identity = current_identity()
+    if not identity or (identity.username != username and not identity.is_admin):
         return jsonify({'error': 'Unauthorized access.'}), 403
 
     customer = Customer.query.filter_by(username=username).first()
     if not customer:
         return jsonify({'error': 'Customer not found.'}), 404
 
-    reviews = Review.query.filter_by(customer_id=customer.id).all()
-    result = reviews_schema.dump(reviews)
+    reviews = eager(Review.query, 'customer_reviews').filter_by(customer_id=customer.id).all()
+    result = dump_reviews(reviews)
     return jsonify(result), 200
 
 
-@app.route('/reviews/<int:review_id>/moderate', methods=['POST'])
+@api.route('/reviews/<int:review_id>/moderate', methods=['POST'])
 @jwt_required()
 def moderate_review(review_id):
     """
@@ -1308,9 +1767,8 @@ def moderate_review(review_id):
                 "error": "Review not found."
             }
     """
-    current_username = get_jwt_identity()
-    admin = Customer.query.filter_by(username=current_username, is_admin=True).first()
-    if not admin:
+    identity = current_identity()
+    if not identity or not identity.is_admin:
         return jsonify({'error': 'Only administrators can moderate reviews.'}), 403
 
     review = Review.query.get(review_id)
@@ -1333,7 +1791,8 @@ def moderate_review(review_id):
     return jsonify({'message': f'Review has been {message}.'}), 200
 
 
-@app.route('/reviews/<int:review_id>', methods=['GET'])
+@api.route('/reviews/<int:review_id>', methods=['GET'])
+@read_only
 def get_review_details(review_id):
     """
     Retrieve Details of a Specific Review.
@@ -1359,14 +1818,14 @@ def get_review_details(review_id):
                 "error": "Review not found."
             }
     """
-    review = Review.query.get(review_id)
+    review = eager(Review.query, 'review_details').filter_by(id=review_id).first()
     if not review:
         return jsonify({'error': 'Review not found.'}), 404
 
-    result = review_schema.dump(review)
+    result = dump_review(review)
     return jsonify(result), 200
 
-@app.route('/customers/<string:username>/recommendations', methods=['GET'])
+@api.route('/customers/<string:username>/recommendations', methods=['GET'])
 @jwt_required()
 def get_customer_recommendations(username):
     """
@@ -1384,24 +1843,26 @@ def get_customer_recommendations(username):
         403 Forbidden: If the JWT user doesn't match the requested username.
         404 Not Found: If the customer doesn't exist.
     """
-    current_username = get_jwt_identity()
-    if current_username != username:
+    if get_jwt_identity() != username:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
-    customer = Customer.query.filter_by(username=username).first()
-    if not customer:
+    identity = current_identity()
+    if not identity:
         return jsonify({'error': 'Customer not found.'}), 404
 
-    # Get up to 5 recommendations
-    recommended_goods = get_recommendations_for_customer(customer.id, limit=5)
+    def load_recommendations():
+        # Get up to 5 recommendations
+        recommended_goods = get_recommendations_for_customer(identity.customer_id, limit=5)
+        return dump_goods_list(recommended_goods)
 
-    # Serialize the recommended goods using your existing schema
-    result = goods_list_schema.dump(recommended_goods)
+    # Every sale and catalog change moves the catalog version, retiring cached results
+    key = f'recommendations:{identity.customer_id}:{versions.request_etag("catalog")}'
+    result = shared_cache.fetch(key, load_recommendations, current_app.config['RECOMMENDATION_CACHE_TTL'])
     return jsonify(result), 200
 
 
 
-@app.route('/customers/<string:username>/wishlist', methods=['GET'])
+@api.route('/customers/<string:username>/wishlist', methods=['GET'])
 @jwt_required()
 def get_wishlist(username):
     """
@@ -1419,21 +1880,20 @@ def get_wishlist(username):
         403 Forbidden: If username doesn't match JWT user.
         404 Not Found: If customer doesn't exist.
     """
-    current_username = get_jwt_identity()
-    if current_username != username:
+    if get_jwt_identity() != username:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
-    customer = Customer.query.filter_by(username=username).first()
-    if not customer:
+    identity = current_identity()
+    if not identity:
         return jsonify({'error': 'Customer not found.'}), 404
 
-    wishlist_items = Wishlist.query.filter_by(customer_id=customer.id).all()
+    wishlist_items = eager(Wishlist.query, 'wishlist').filter_by(customer_id=identity.customer_id).all()
     # This will return a list of wishlist entries, each containing a 'goods' object
     result = wishlist_list_schema.dump(wishlist_items)
     return jsonify(result), 200
 
 
-@app.route('/customers/<string:username>/wishlist', methods=['POST'])
+@api.route('/customers/<string:username>/wishlist', methods=['POST'])
 @jwt_required()
 def add_to_wishlist(username):
     """
@@ -1457,16 +1917,15 @@ def add_to_wishlist(username):
         403 Forbidden: Unauthorized access if username doesn't match JWT user.
         404 Not Found: If customer or goods not found.
     """
-    current_username = get_jwt_identity()
-    if current_username != username:
+    if get_jwt_identity() != username:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
     data = request.get_json()
     if not data or 'goods_id' not in data:
         return jsonify({'error': 'goods_id is required.'}), 400
 
-    customer = Customer.query.filter_by(username=username).first()
-    if not customer:
+    identity = current_identity()
+    if not identity:
         return jsonify({'error': 'Customer not found.'}), 404
 
     goods_id = data['goods_id']
@@ -1475,18 +1934,23 @@ def add_to_wishlist(username):
         return jsonify({'error': 'Goods not found.'}), 404
 
     # Check if already in wishlist
-    existing_entry = Wishlist.query.filter_by(customer_id=customer.id, goods_id=goods_id).first()
+    existing_entry = Wishlist.query.filter_by(customer_id=identity.customer_id, goods_id=goods_id).first()
     if existing_entry:
         return jsonify({'error': 'Item already in wishlist.'}), 400
 
-    new_wishlist_item = Wishlist(customer_id=customer.id, goods_id=goods_id)
+    new_wishlist_item = Wishlist(customer_id=identity.customer_id, goods_id=goods_id)
     db.session.add(new_wishlist_item)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request added the same item after our check
+        db.session.rollback()
+        return jsonify({'error': 'Item already in wishlist.'}), 400
 
     return jsonify({'message': 'Item added to wishlist.', 'id': new_wishlist_item.id}), 201
 
 
-@app.route('/customers/<string:username>/wishlist/<int:goods_id>', methods=['DELETE'])
+@api.route('/customers/<string:username>/wishlist/<int:goods_id>', methods=['DELETE'])
 @jwt_required()
 def remove_from_wishlist(username, goods_id):
     """
@@ -1504,15 +1968,14 @@ def remove_from_wishlist(username, goods_id):
         403 Forbidden: If the user does not own the wishlist.
         404 Not Found: If the item is not found in the wishlist.
     """
-    current_username = get_jwt_identity()
-    if current_username != username:
+    if get_jwt_identity() != username:
         return jsonify({'error': 'Unauthorized access.'}), 403
 
-    customer = Customer.query.filter_by(username=username).first()
-    if not customer:
+    identity = current_identity()
+    if not identity:
         return jsonify({'error': 'Customer not found.'}), 404
 
-    wishlist_item = Wishlist.query.filter_by(customer_id=customer.id, goods_id=goods_id).first()
+    wishlist_item = Wishlist.query.filter_by(customer_id=identity.customer_id, goods_id=goods_id).first()
     if not wishlist_item:
         return jsonify({'error': 'Item not found in wishlist.'}), 404
 
@@ -1521,29 +1984,117 @@ def remove_from_wishlist(username, goods_id):
     return jsonify({'message': 'Item removed from wishlist.'}), 200
 
 
+@api.route('/admin/profiler', methods=['GET'])
+@jwt_required()
+def get_profiler_samples():
+    """
+    Export Sampling Profiler Results.
+
+    This endpoint allows an admin user to download the stacks aggregated by the
+    sampling profiler, in collapsed-stack format (one ``endpoint;frame;...;frame count``
+    line per stack), ready to be rendered by flamegraph tools.
+
+    **Endpoint:**
+        GET /admin/profiler
+
+    **Authentication:**
+        - JWT token required.
+        - Token must belong to an admin user.
+
+    **Query Parameters:**
+        endpoint (str): Only export samples of this endpoint.    # Optional
+
+    **Responses:**
+        200 OK (text/plain):
+            api.register_customer;app.py:register_customer;hashing.py:hash 42
+            ...
+        403 Forbidden:
+            {
+                "error": "Unauthorized access."
+            }
+    """
+    identity = current_identity()
+    if not identity or not identity.is_admin:
+        return jsonify({'error': 'Unauthorized access.'}), 403
+    collapsed = sampling_profiler.collapsed(request.args.get('endpoint'))
+    return collapsed, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+
+@api.route('/admin/cache', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """
+    Report Response Cache Statistics.
 
+    **Endpoint:**
+        GET /admin/cache
+
+    **Authentication:**
+        - JWT token required.
+        - Token must belong to an admin user.
+
+    **Responses:**
+        200 OK:
+            {
+                "entries": 12,
+                "bytes": 48210,
+                "max_bytes": 16777216,
+                "hits": 940,
+                "misses": 31,
+                "evictions": 0,
+                "invalidations": 19
+            }
+        403 Forbidden:
+            {
+                "error": "Unauthorized access."
+            }
+    """
+    identity = current_identity()
+    if not identity or not identity.is_admin:
+        return jsonify({'error': 'Unauthorized access.'}), 403
+    return jsonify(response_cache.stats()), 200
+
+
+@api.route('/admin/profiler', methods=['DELETE'])
+@jwt_required()
+def reset_profiler_samples():
+    """
+    Reset Sampling Profiler Results.
+
+    **Endpoint:**
+        DELETE /admin/profiler
+
+    **Authentication:**
+        - JWT token required.
+        - Token must belong to an admin user.
+
+    **Responses:**
+        200 OK:
+            {
+                "message": "Profiler samples cleared."
+            }
+        403 Forbidden:
+            {
+                "error": "Unauthorized access."
+            }
+    """
+    identity = current_identity()
+    if not identity or not identity.is_admin:
+        return jsonify({'error': 'Unauthorized access.'}), 403
+    sampling_profiler.reset()
+    return jsonify({'message': 'Profiler samples cleared.'}), 200
 
-app.config["flask_profiler"] = {
-    "enabled": True,
-    "storage": {
-        "engine": "sqlite",
-        "file": "./flask_profiler.db",  # Use a separate SQLite database
-    },
-    "basicAuth": {
-        "enabled": False,
-    },
-    "ignore": ["^/static/.*"],
-}
 
-import flask_profiler
-flask_profiler.init_app(app)
+# Application used by `flask --app app`, wsgi.py and the maintenance scripts
+app = create_app()
 
 if __name__ == '__main__':
     """
     Run the Flask Application.
 
-    This entry point starts the Flask development server with debugging enabled.
+    This entry point starts the Flask development server, with debugging enabled when
+    FLASK_DEBUG=1. Use ``gunicorn -c gunicorn.conf.py wsgi:app`` in production.
     """
-    app.run(debug=True)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')
 
 
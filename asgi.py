@@ -0,0 +1,316 @@
+# asgi.py
+
+"""
+ASGI entry point: ``uvicorn asgi:app --workers 4``.
+
+The read-heavy public routes are served by native async handlers on SQLAlchemy's
+asyncio engine (aiosqlite for SQLite, asyncpg for PostgreSQL), so a worker waiting
+on the database or on a slow client holds a coroutine rather than a thread:
+
+- ``GET /goods`` (filters and cursor pagination; streaming stays on Flask)
+- ``GET /goods/<id>``
+- ``GET /goods/<id>/reviews``
+- ``GET /customers/<username>/recommendations``
+
+They answer exactly like their Flask counterparts, including the weak ETags and 304s
+of :mod:`versions`. Every other request is handed to the Flask application through
+asgiref's WSGI adapter, which runs it in a thread pool.
+"""
+
+import asyncio
+import re
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+
+from app import app as flask_app
+from app import dump_goods, dump_goods_list, dump_reviews
+from catalog import TRUE_VALUES, filter_goods, parse_goods_filters, parse_page
+from database import set_sqlite_pragmas
+from identity import identity_cache
+from loaders import eager
+from models import db, Customer, Goods, Review
+from recommendations import co_purchase_index, top_sellers
+from shared_cache import LocalBackend, shared_cache
+from streaming import NDJSON_MIMETYPE
+from versions import versions
+
+# Async driver used for each synchronous dialect
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_database_url(url):
+    """
+    Turn the URL of the synchronous engine into one for its asyncio driver.
+
+    Args:
+        url (URL): URL of the Flask-SQLAlchemy engine, relative SQLite paths resolved.
+
+    Returns:
+        URL: The same database with the driver from ASYNC_DRIVERS.
+
+    Raises:
+        ValueError: If the database has no supported async driver.
+    """
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver for {backend} databases.')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class Request:
+    """
+    The parts of an ASGI HTTP request the async handlers read.
+
+    Attributes:
+        args (MultiDict): Query string arguments.
+        headers (dict): Header values by lower-cased name.
+    """
+
+    def __init__(self, scope):
+        self.args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope['headers']}
+
+
+class AsyncApp:
+    """
+    ASGI application serving the hot read routes asynchronously and the rest via Flask.
+
+    The async engine is created on first use in each worker process, from
+    ASYNC_DATABASE_URL or else from the Flask engine's URL, with the same pool
+    options and SQLite pragmas.
+
+    Attributes:
+        flask_app (Flask): Application providing the configuration and the other routes.
+        engine (AsyncEngine): Engine of the async handlers; None until first use.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.engine = None
+        self._sessionmaker = None
+        self.routes = [
+            (re.compile(r'/goods'), self.list_goods),
+            (re.compile(r'/goods/(?P<goods_id>\d+)'), self.get_goods),
+            (re.compile(r'/goods/(?P<goods_id>\d+)/reviews'), self.get_product_reviews),
+            (re.compile(r'/customers/(?P<username>[^/]+)/recommendations'), self.get_recommendations),
+        ]
+
+    def _session(self):
+        if self.engine is None:
+            config = self.flask_app.config
+            url = config.get('ASYNC_DATABASE_URL')
+            if not url:
+                with self.flask_app.app_context():
+                    url = async_database_url(db.engine.url)
+            self.engine = create_async_engine(url, **config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+            set_sqlite_pragmas(self.engine.sync_engine, config.get('SQLITE_PRAGMAS'))
+            self._sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        return self._sessionmaker()
+
+    async def dispose(self):
+        """Close the async engine's pooled connections."""
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    # A handler returns None for requests it leaves to the Flask route
+                    response = await handler(Request(scope), **match.groupdict())
+                    if response is not None:
+                        await self._send(send, *response)
+                        return
+                    break
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _send(self, send, status, body, headers):
+        headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        headers.append((b'content-length', str(len(body)).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _json(self, payload, status=200, etag=None):
+        body = self.flask_app.json.dumps(payload).encode() + b'\n'
+        headers = [('content-type', 'application/json')]
+        if etag is not None and status == 200:
+            headers.append(('etag', f'W/"{etag}"'))
+        return status, body, headers
+
+    @staticmethod
+    async def _shared(func, *args):
+        # Calls into a process-local backend are a dict lookup; others are network or
+        # file round-trips and must not block the event loop
+        if isinstance(shared_cache.backend, LocalBackend):
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    async def _etag(self, *keys):
+        return await self._shared(versions.etag, *keys)
+
+    @staticmethod
+    def _not_modified(request, etag):
+        tags = request.headers.get('if-none-match', '')
+        if tags.strip() != '*' and f'"{etag}"' not in tags:
+            return None
+        return 304, b'', [('etag', f'W/"{etag}"')]
+
+    async def list_goods(self, request):
+        """Async counterpart of ``GET /goods``; streamed listings stay on Flask."""
+        if (request.args.get('stream', '').lower() in TRUE_VALUES
+                or NDJSON_MIMETYPE in request.headers.get('accept', '')):
+            return None
+        etag = await self._etag('catalog')
+        not_modified = self._not_modified(request, etag)
+        if not_modified:
+            return not_modified
+
+        config = self.flask_app.config
+        paginated = 'after_id' in request.args or 'limit' in request.args
+        try:
+            filters = parse_goods_filters(request.args)
+            if paginated:
+                after_id, limit = parse_page(request.args, config['GOODS_PAGE_SIZE'], config['GOODS_MAX_PAGE_SIZE'])
+        except ValueError as e:
+            return self._json({'error': str(e)}, 400)
+
+        query = filter_goods(select(Goods), filters)
+        async with self._session() as session:
+            if not paginated:
+                goods = (await session.scalars(query)).all()
+                return self._json(dump_goods_list(goods), etag=etag)
+
+            rows = (await session.scalars(
+                query.filter(Goods.id > after_id).order_by(Goods.id).limit(limit + 1)
+            )).all()
+        items = rows[:limit]
+        next_after_id = items[-1].id if len(rows) > limit else None
+        return self._json({
+            'items': dump_goods_list(items),
+            'next_after_id': next_after_id
+        }, etag=etag)
+
+    async def get_goods(self, request, goods_id):
+        """Async counterpart of ``GET /goods/<goods_id>``."""
+        goods_id = int(goods_id)
+        etag = await self._etag(('goods', goods_id))
+        not_modified = self._not_modified(request, etag)
+        if not_modified:
+            return not_modified
+
+        async with self._session() as session:
+            goods = await session.get(Goods, goods_id)
+        if goods is None:
+            return self._json({'error': 'Goods not found.'}, 404)
+        return self._json(dump_goods(goods), etag=etag)
+
+    async def get_product_reviews(self, request, goods_id):
+        """Async counterpart of ``GET /goods/<goods_id>/reviews``."""
+        goods_id = int(goods_id)
+        etag = await self._etag(('goods', goods_id), ('reviews', goods_id))
+        not_modified = self._not_modified(request, etag)
+        if not_modified:
+            return not_modified
+
+        async with self._session() as session:
+            if await session.get(Goods, goods_id) is None:
+                return self._json({'error': 'Goods not found.'}, 404)
+            reviews = (await session.scalars(
+                eager(select(Review), 'product_reviews').filter_by(goods_id=goods_id)
+            )).all()
+        return self._json(dump_reviews(reviews), etag=etag)
+
+    def _decode_token(self, request):
+        header = request.headers.get('authorization', '')
+        scheme, _, token = header.partition(' ')
+        if scheme != self.flask_app.config.get('JWT_HEADER_TYPE', 'Bearer') or not token:
+            return None
+        with self.flask_app.app_context():
+            try:
+                return decode_token(token)
+            except (JWTExtendedException, PyJWTError):
+                return None
+
+    def _ranked_ids(self, customer_id, limit, fallback_only=False):
+        # The indexes live in memory; only a (re)build reads the database, through
+        # Flask-SQLAlchemy, so this runs in a worker thread
+        with self.flask_app.app_context():
+            try:
+                recommended = [] if fallback_only else co_purchase_index.recommend(customer_id, limit=limit)
+                return recommended or top_sellers.top(limit), bool(recommended)
+            finally:
+                db.session.remove()
+
+    async def get_recommendations(self, request, username):
+        """
+        Async counterpart of ``GET /customers/<username>/recommendations``.
+
+        Requests without a valid access token are left to Flask, which produces the
+        usual flask_jwt_extended error responses.
+        """
+        claims = self._decode_token(request)
+        if claims is None or claims.get('type') != 'access':
+            return None
+        if claims['sub'] != username:
+            return self._json({'error': 'Unauthorized access.'}, 403)
+
+        customer_id = claims.get('customer_id')
+        if customer_id is None or await self._shared(identity_cache.is_stale, username, claims.get('iat', 0)):
+            async with self._session() as session:
+                customer_id = await session.scalar(select(Customer.id).filter_by(username=username))
+            if customer_id is None:
+                return self._json({'error': 'Customer not found.'}, 404)
+
+        # Same key and entry as the Flask route. fetch() blocks on the backend, and on
+        # other workers computing the entry, so it runs in a thread; a miss is loaded
+        # back on the event loop.
+        loop = asyncio.get_running_loop()
+
+        def load_recommendations():
+            return asyncio.run_coroutine_threadsafe(self._recommendations(customer_id), loop).result()
+
+        key = f'recommendations:{customer_id}:{await self._etag("catalog")}'
+        result = await asyncio.to_thread(shared_cache.fetch, key, load_recommendations,
+                                         self.flask_app.config['RECOMMENDATION_CACHE_TTL'])
+        return self._json(result)
+
+    async def _recommendations(self, customer_id, limit=5):
+        ids, personal = await asyncio.to_thread(self._ranked_ids, customer_id, limit)
+        async with self._session() as session:
+            goods_by_id = {goods.id: goods for goods in
+                           await session.scalars(select(Goods).filter(Goods.id.in_(ids)))}
+            if personal and not goods_by_id:
+                # Everything recommended has been deleted since the index was built
+                ids, _ = await asyncio.to_thread(self._ranked_ids, customer_id, limit, True)
+                goods_by_id = {goods.id: goods for goods in
+                               await session.scalars(select(Goods).filter(Goods.id.in_(ids)))}
+        return dump_goods_list([goods_by_id[i] for i in ids if i in goods_by_id])
+
+app = AsyncApp(flask_app)
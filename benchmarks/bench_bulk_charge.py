@@ -0,0 +1,61 @@
+# benchmarks/bench_bulk_charge.py
+
+"""
+Time to charge every wallet: one charge per customer versus one bulk charge.
+
+Populates a scratch SQLite database, then charges all customers once through
+``adjust_wallet`` (what ``POST /customers/<username>/wallet/charge`` runs, one
+transaction each) and once through ``credit_many`` in a single transaction.
+
+Usage:
+    python benchmarks/bench_bulk_charge.py [customers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+SCRATCH = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(SCRATCH, "bench.db")}'
+os.environ['FLASK_PROFILER_ENABLED'] = '0'
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import app  # noqa: E402
+from checkout import adjust_wallet  # noqa: E402
+from models import db, Customer  # noqa: E402
+from wallet import credit_many  # noqa: E402
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    usernames = [f'customer{i}' for i in range(count)]
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Customer), [
+            {'full_name': name, 'username': name, 'password': 'x', 'age': 30, 'address': 'a',
+             'wallet_balance_cents': 0}
+            for name in usernames
+        ])
+        db.session.commit()
+
+        started = time.perf_counter()
+        for name in usernames:
+            adjust_wallet(name, 5.0)
+        one_by_one = time.perf_counter() - started
+
+        started = time.perf_counter()
+        credit_many({name: 500 for name in usernames}, chunk_size=app.config['BULK_CHARGE_CHUNK_SIZE'])
+        db.session.commit()
+        bulk = time.perf_counter() - started
+
+    print(f'{count} customers')
+    print(f'{"one charge per customer":<26}{one_by_one:>8.2f} s{count / one_by_one:>10.0f} charges/s')
+    print(f'{"bulk charge":<26}{bulk:>8.2f} s{count / bulk:>10.0f} charges/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_import.py
+
+"""
+Goods import throughput: one ``POST /goods`` per row versus ``import_goods``.
+
+Populates a scratch SQLite database through ``add_goods`` (one request and one
+transaction per row), then imports the same rows from a CSV file with
+``import_goods`` in batches, and finally re-imports them with ids so that every
+row takes the ``ON CONFLICT (id) DO UPDATE`` path.
+
+Usage:
+    python benchmarks/bench_import.py [rows]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+SCRATCH = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(SCRATCH, "bench.db")}'
+os.environ['FLASK_PROFILER_ENABLED'] = '0'
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app  # noqa: E402
+from importer import import_goods, read_rows  # noqa: E402
+from models import db, Customer  # noqa: E402
+
+
+def make_csv(count, with_ids=False):
+    lines = ['id,name,category,price_per_item,description,count_in_stock']
+    for i in range(count):
+        goods_id = i + 1 if with_ids else ''
+        lines.append(f'{goods_id},Item {i},electronics,{i % 100 + 0.99},Bench item,{i % 50}')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    batch_size = app.config['GOODS_IMPORT_BATCH_SIZE']
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Customer(full_name='Admin', username='admin', password='x', age=30,
+                                address='a', is_admin=True))
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity="admin")}'}
+
+    started = time.perf_counter()
+    for i in range(count):
+        client.post('/goods', json={'name': f'Item {i}', 'category': 'electronics',
+                                    'price_per_item': i % 100 + 0.99, 'count_in_stock': i % 50},
+                    headers=headers)
+    one_by_one = time.perf_counter() - started
+
+    with app.app_context():
+        inserted = import_goods(read_rows(io.BytesIO(make_csv(count)), 'csv'), batch_size)
+        upserted = import_goods(read_rows(io.BytesIO(make_csv(count, with_ids=True)), 'csv'), batch_size)
+
+    print(f'{count} rows, batches of {batch_size}')
+    print(f'{"POST /goods per row":<22}{one_by_one:>8.2f} s{count / one_by_one:>10.0f} rows/s')
+    for label, report in (('import (insert)', inserted), ('import (upsert)', upserted)):
+        print(f'{label:<22}{report.seconds:>8.2f} s{report.imported / report.seconds:>10.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
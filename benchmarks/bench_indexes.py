@@ -0,0 +1,100 @@
+# benchmarks/bench_indexes.py
+
+"""
+Lookup cost with and without the purchases/reviews/wishlist indexes.
+
+Fills a throwaway SQLite database with growing numbers of rows and times the lookups
+the API performs (purchase history, product reviews, duplicate review and wishlist
+checks), once with the indexes declared in models.py and once with them dropped.
+Without indexes each lookup scans the table, so its cost grows with the table; with
+them it stays roughly flat.
+
+Usage:
+    python benchmarks/bench_indexes.py [rows ...]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+
+from models import db, Customer, Goods, Purchase, Review, Wishlist
+
+LOOKUPS = 500
+
+
+def populate(engine, rows):
+    customers = max(rows // 20, 1)
+    goods = max(rows // 50, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Customer), [
+            {'id': i, 'full_name': f'c{i}', 'username': f'c{i}', 'password': 'x', 'age': 30, 'address': 'a'}
+            for i in range(1, customers + 1)
+        ])
+        conn.execute(insert(Goods), [
+            {'id': i, 'name': f'g{i}', 'category': 'food', 'price_per_item': 1.0, 'count_in_stock': 10}
+            for i in range(1, goods + 1)
+        ])
+        conn.execute(insert(Purchase), [
+            {'customer_id': random.randint(1, customers), 'goods_id': random.randint(1, goods), 'total_price': 1.0}
+            for _ in range(rows)
+        ])
+        pairs = random.sample(range(customers * goods), min(rows, customers * goods))
+        conn.execute(insert(Review), [
+            {'customer_id': p // goods + 1, 'goods_id': p % goods + 1, 'rating': 5} for p in pairs
+        ])
+        conn.execute(insert(Wishlist), [
+            {'customer_id': p // goods + 1, 'goods_id': p % goods + 1} for p in pairs
+        ])
+    return customers, goods
+
+
+def time_lookups(engine, customers, goods):
+    queries = {
+        'purchase history': lambda c, g: select(Purchase.id).where(Purchase.customer_id == c),
+        'product reviews': lambda c, g: select(Review.id).where(Review.goods_id == g),
+        'duplicate review check': lambda c, g: select(Review.id).where(Review.customer_id == c, Review.goods_id == g),
+        'wishlist': lambda c, g: select(Wishlist.id).where(Wishlist.customer_id == c),
+    }
+    results = {}
+    with engine.connect() as conn:
+        for name, build in queries.items():
+            started = time.perf_counter()
+            for _ in range(LOOKUPS):
+                conn.execute(build(random.randint(1, customers), random.randint(1, goods))).all()
+            results[name] = (time.perf_counter() - started) / LOOKUPS * 1e6
+    return results
+
+
+def run(rows, indexed):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite:///{os.path.join(tmp, "bench.db")}')
+        db.metadata.create_all(engine)
+        if not indexed:
+            for table in (Purchase.__table__, Review.__table__, Wishlist.__table__):
+                for index in table.indexes:
+                    index.drop(engine)
+        customers, goods = populate(engine, rows)
+        results = time_lookups(engine, customers, goods)
+        engine.dispose()
+        return results
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    random.seed(0)
+    print(f'{"rows":>8}  {"lookup":<24}{"no index (us)":>14}{"indexed (us)":>14}')
+    for rows in sizes:
+        plain = run(rows, indexed=False)
+        indexed = run(rows, indexed=True)
+        for name in plain:
+            print(f'{rows:>8}  {name:<24}{plain[name]:>14.1f}{indexed[name]:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_login.py
+
+"""
+Login throughput under concurrency, hashing inline versus in a process pool.
+
+Concurrent clients log in for a fixed time against a scratch SQLite database while
+one more client polls ``GET /goods/1``; the table shows logins per second, logins
+refused with 503 because the hashing queue was full, and the latency of the cheap
+request, which is what inline hashing hurts most.
+
+Usage:
+    python benchmarks/bench_login.py [seconds] [clients] [pool workers]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+SCRATCH = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(SCRATCH, "bench.db")}'
+os.environ['FLASK_PROFILER_ENABLED'] = '0'
+
+from app import app  # noqa: E402
+from hashing import password_hasher  # noqa: E402
+from models import db, Customer, Goods  # noqa: E402
+
+PASSWORD = 'BenchPass123!'
+
+
+def setup():
+    with app.app_context():
+        db.create_all()
+        db.session.add(Customer(full_name='Bench User', username='bench', password=password_hasher.hash(PASSWORD),
+                                age=30, address='Bench Street', wallet_balance_cents=0))
+        db.session.add(Goods(name='Bench Goods', category='electronics', price_per_item=1.0,
+                             description='For benchmarking.', count_in_stock=1))
+        db.session.commit()
+
+
+def login_client(stop, counts):
+    client = app.test_client()
+    while not stop.is_set():
+        response = client.post('/customers/login', json={'username': 'bench', 'password': PASSWORD})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+
+def probe_client(stop, latencies):
+    client = app.test_client()
+    while not stop.is_set():
+        started = time.perf_counter()
+        client.get('/goods/1')
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+
+
+def run(name, workers, seconds, clients):
+    password_hasher.shutdown()
+    password_hasher.workers = workers
+    if workers:
+        password_hasher.hash(PASSWORD)  # start the pool outside the measurement
+
+    stop = threading.Event()
+    counts = [{} for _ in range(clients)]
+    latencies = []
+    threads = [threading.Thread(target=login_client, args=(stop, counts[i])) for i in range(clients)]
+    threads.append(threading.Thread(target=probe_client, args=(stop, latencies)))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    ok = sum(c.get(200, 0) for c in counts)
+    busy = sum(c.get(503, 0) for c in counts)
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else float('nan')
+    print(f'{name:<24}{ok / seconds:>10.1f}{busy:>8}{statistics.median(latencies) * 1000:>12.1f}{p95 * 1000:>12.1f}')
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    setup()
+    print(f'{seconds:g}s, {clients} login clients, method {password_hasher.method}')
+    print(f'{"hashing":<24}{"logins/s":>10}{"503s":>8}{"goods p50":>12}{"goods p95":>12}')
+    run('inline', 0, seconds, clients)
+    run(f'process pool ({workers})', workers, seconds, clients)
+    password_hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_serializers.py
+
+"""
+Per-item cost of turning model objects into a JSON response body.
+
+Compares marshmallow ``Schema.dump`` followed by Flask's default JSON provider with
+the precompiled serializers from serializers.py followed by the orjson provider, for
+the goods, purchase and review list schemas.
+
+Usage:
+    python benchmarks/bench_serializers.py [items]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from models import Customer, Goods, Purchase, Review
+from schemas import GoodsSchema, PurchaseSchema, ReviewSchema
+from serializers import OrjsonProvider, compile_serializer
+
+ROUNDS = 5
+
+
+def make_objects(count):
+    customer = Customer(id=1, username='buyer', full_name='Buyer', age=30, address='Street')
+    goods = [Goods(id=i, name=f'Goods {i}', category='food', price_per_item=i * 1.25,
+                   description='Something tasty', count_in_stock=i % 40)
+             for i in range(count)]
+    purchases = [Purchase(id=i, customer_id=1, goods_id=g.id, quantity=2, total_price=g.price_per_item * 2,
+                          purchase_date=datetime(2024, 5, 1, 12, 30), goods=g)
+                 for i, g in enumerate(goods)]
+    reviews = [Review(id=i, customer_id=1, goods_id=g.id, rating=4, comment='Nice',
+                      created_at=datetime(2024, 5, 2, 8, 0), is_moderated=True, customer=customer, goods=g)
+               for i, g in enumerate(goods)]
+    return {'goods': (GoodsSchema(many=True), goods),
+            'purchases': (PurchaseSchema(many=True), purchases),
+            'reviews': (ReviewSchema(many=True), reviews)}
+
+
+def per_item(func, items):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best / items * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = Flask(__name__)
+    default_json = DefaultJSONProvider(app)
+    fast_json = OrjsonProvider(app)
+
+    print(f'{count} items, best of {ROUNDS}, microseconds per item')
+    print(f'{"schema":<12}{"dump+json":>12}{"compiled+orjson":>18}{"speedup":>10}')
+    for name, (schema, objects) in make_objects(count).items():
+        serialize = compile_serializer(schema)
+        with app.app_context():
+            slow = per_item(lambda: default_json.dumps(schema.dump(objects)), count)
+            fast = per_item(lambda: fast_json.dumps(serialize(objects)), count)
+        print(f'{name:<12}{slow:>12.2f}{fast:>18.2f}{slow / fast:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_server.py
+
+"""
+Requests per second of the Flask development server versus gunicorn.
+
+Starts each server in a subprocess against the local database, then hammers a few
+read endpoints from concurrent keep-alive clients for a fixed time.
+
+Usage:
+    python benchmarks/bench_server.py [seconds] [clients] [gunicorn workers]
+"""
+
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 5077
+PATHS = ['/goods/1', '/goods?category=electronics', '/goods?limit=20']
+
+
+def wait_until_up(timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=1)
+            conn.request('GET', PATHS[0])
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def client(stop, counts):
+    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+    index = 0
+    while not stop.is_set():
+        try:
+            conn.request('GET', PATHS[index % len(PATHS)])
+            response = conn.getresponse()
+            response.read()
+            counts['ok' if response.status == 200 else 'failed'] += 1
+        except (OSError, http.client.HTTPException):
+            counts['failed'] += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+        index += 1
+
+
+def load(seconds, clients):
+    stop = threading.Event()
+    counts = [{'ok': 0, 'failed': 0} for _ in range(clients)]
+    threads = [threading.Thread(target=client, args=(stop, counts[i])) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(c['ok'] for c in counts) / seconds, sum(c['failed'] for c in counts)
+
+
+def run(name, command, env, seconds, clients):
+    server = subprocess.Popen(command, cwd=ROOT, env={**os.environ, **env},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up()
+        rate, failed = load(seconds, clients)
+        print(f'{name:<28}{rate:>10.0f}{failed:>10}')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    workers = sys.argv[3] if len(sys.argv) > 3 else str(os.cpu_count() * 2 + 1)
+    print(f'{seconds:g}s, {clients} clients')
+    print(f'{"server":<28}{"req/s":>10}{"failed":>10}')
+    run('flask run (dev server)',
+        [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(PORT)],
+        {}, seconds, clients)
+    run(f'gunicorn ({workers} workers)',
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        {'GUNICORN_BIND': f'127.0.0.1:{PORT}', 'GUNICORN_WORKERS': workers}, seconds, clients)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_sqlite_profile.py
+
+"""
+Mixed read/write throughput of each database profile in config.DATABASE_PROFILES.
+
+Reader threads repeatedly list goods while writer threads charge wallets, the same
+mix as browsing traffic alongside sales. With the default rollback journal every
+commit locks readers out; the production profile's WAL mode lets them proceed.
+
+Usage:
+    python benchmarks/bench_sqlite_profile.py [seconds] [readers] [writers]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from config import DATABASE_PROFILES
+from database import set_sqlite_pragmas
+from models import db, Customer, Goods
+
+CUSTOMERS = 1000
+GOODS = 5000
+
+
+def populate(engine):
+    with engine.begin() as conn:
+        conn.execute(insert(Customer), [
+            {'id': i, 'full_name': f'c{i}', 'username': f'c{i}', 'password': 'x', 'age': 30,
+             'address': 'a', 'wallet_balance_cents': 0}
+            for i in range(1, CUSTOMERS + 1)
+        ])
+        conn.execute(insert(Goods), [
+            {'id': i, 'name': f'g{i}', 'category': 'food', 'price_per_item': float(i % 100),
+             'count_in_stock': 10}
+            for i in range(1, GOODS + 1)
+        ])
+
+
+def reader(engine, stop, counts):
+    while not stop.is_set():
+        with engine.connect() as conn:
+            category_floor = random.randint(0, 90)
+            conn.execute(select(Goods).where(Goods.price_per_item >= category_floor).limit(50)).all()
+        counts['reads'] += 1
+
+
+def writer(engine, stop, counts):
+    while not stop.is_set():
+        customer_id = random.randint(1, CUSTOMERS)
+        try:
+            with engine.begin() as conn:
+                conn.execute(update(Customer)
+                             .where(Customer.id == customer_id)
+                             .values(wallet_balance_cents=Customer.wallet_balance_cents + 100))
+            counts['writes'] += 1
+        except OperationalError:
+            counts['errors'] += 1
+
+
+def run(profile_name, seconds, readers, writers):
+    profile = DATABASE_PROFILES[profile_name]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite:///{os.path.join(tmp, "bench.db")}', **profile['engine_options'])
+        set_sqlite_pragmas(engine, profile['sqlite_pragmas'])
+        db.metadata.create_all(engine)
+        populate(engine)
+
+        stop = threading.Event()
+        counts = [{'reads': 0, 'writes': 0, 'errors': 0} for _ in range(readers + writers)]
+        threads = [threading.Thread(target=reader, args=(engine, stop, counts[i])) for i in range(readers)]
+        threads += [threading.Thread(target=writer, args=(engine, stop, counts[readers + i]))
+                    for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {key: sum(count[key] for count in counts) / seconds for key in ('reads', 'writes', 'errors')}
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    print(f'{seconds:g}s, {readers} readers, {writers} writers')
+    print(f'{"profile":<12}{"reads/s":>10}{"writes/s":>10}{"errors/s":>10}')
+    for name in DATABASE_PROFILES:
+        result = run(name, seconds, readers, writers)
+        print(f'{name:<12}{result["reads"]:>10.0f}{result["writes"]:>10.0f}{result["errors"]:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_startup.py
+
+"""
+Cold-start cost of ``import app``: wall time and the slowest imports.
+
+Runs ``python -X importtime -c "import app"`` in fresh interpreters, reports the
+median total and the top-level packages that took longest, cumulative.
+
+Usage:
+    python benchmarks/bench_startup.py [runs] [top]
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+
+def import_once(env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - started
+    cumulative = {}
+    for match in LINE.finditer(result.stderr):
+        # Only modules imported directly by app, one level below it
+        if len(match.group(3)) == 3:
+            cumulative[match.group(4)] = int(match.group(2)) / 1e6
+    return elapsed, cumulative
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    for label, profiler in (('with flask_profiler', '1'), ('without flask_profiler', '0')):
+        env = dict(os.environ, FLASK_PROFILER_ENABLED=profiler)
+        samples = [import_once(env) for _ in range(runs)]
+        print(f'{label}: median {statistics.median(s[0] for s in samples) * 1000:.0f} ms '
+              f'over {runs} runs')
+        slowest = sorted(samples[-1][1].items(), key=lambda item: -item[1])[:top]
+        for module, seconds in slowest:
+            print(f'  {module:<30} {seconds * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
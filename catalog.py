@@ -0,0 +1,123 @@
+# catalog.py
+
+from models import Goods
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def _parse_number(args, name, cast):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f'Invalid value for {name}.')
+
+
+def parse_goods_filters(args):
+    """
+    Parse the catalog filters supported by ``GET /goods`` from the query string.
+
+    Args:
+        args (MultiDict): Request query arguments.
+
+    Returns:
+        dict: Filters with the keys ``category``, ``min_price``, ``max_price`` and ``in_stock``.
+        Missing filters are set to None.
+
+    Raises:
+        ValueError: If a filter value cannot be parsed.
+    """
+    in_stock = args.get('in_stock')
+    if in_stock is not None:
+        if in_stock.lower() in TRUE_VALUES:
+            in_stock = True
+        elif in_stock.lower() in FALSE_VALUES:
+            in_stock = False
+        else:
+            raise ValueError('Invalid value for in_stock.')
+
+    return {
+        'category': args.get('category') or None,
+        'min_price': _parse_number(args, 'min_price', float),
+        'max_price': _parse_number(args, 'max_price', float),
+        'in_stock': in_stock,
+    }
+
+
+def parse_page(args, default_limit, max_limit):
+    """
+    Parse the keyset pagination parameters (``after_id`` and ``limit``).
+
+    Args:
+        args (MultiDict): Request query arguments.
+        default_limit (int): Page size used when ``limit`` is not given.
+        max_limit (int): Upper bound for the page size.
+
+    Returns:
+        tuple: ``(after_id, limit)``.
+
+    Raises:
+        ValueError: If a parameter is not a valid integer or is out of range.
+    """
+    after_id = _parse_number(args, 'after_id', int)
+    limit = _parse_number(args, 'limit', int)
+    if after_id is None:
+        after_id = 0
+    if limit is None:
+        limit = default_limit
+    if after_id < 0:
+        raise ValueError('Invalid value for after_id.')
+    if limit < 1:
+        raise ValueError('Invalid value for limit.')
+    return after_id, min(limit, max_limit)
+
+
+def filter_goods(query, filters):
+    """
+    Apply parsed catalog filters to a Goods query.
+
+    Args:
+        query (Query): Query selecting Goods.
+        filters (dict): Filters as returned by :func:`parse_goods_filters`.
+
+    Returns:
+        Query: The filtered query.
+    """
+    if filters['category'] is not None:
+        query = query.filter(Goods.category == filters['category'])
+    if filters['min_price'] is not None:
+        query = query.filter(Goods.price_per_item >= filters['min_price'])
+    if filters['max_price'] is not None:
+        query = query.filter(Goods.price_per_item <= filters['max_price'])
+    if filters['in_stock'] is True:
+        query = query.filter(Goods.count_in_stock > 0)
+    elif filters['in_stock'] is False:
+        query = query.filter(Goods.count_in_stock == 0)
+    return query
+
+
+def goods_page(query, after_id, limit):
+    """
+    Fetch one keyset page of goods ordered by id.
+
+    The page is located with ``id > after_id`` instead of an OFFSET, so the cost of a
+    page does not depend on how deep into the catalog it is.
+
+    Args:
+        query (Query): Filtered Goods query.
+        after_id (int): Id of the last item of the previous page (0 for the first page).
+        limit (int): Maximum number of items to return.
+
+    Returns:
+        tuple: ``(items, next_after_id)`` where ``next_after_id`` is None on the last page.
+    """
+    rows = (query.filter(Goods.id > after_id)
+            .order_by(Goods.id)
+            .limit(limit + 1)
+            .all())
+    items = rows[:limit]
+    next_after_id = items[-1].id if len(rows) > limit else None
+    return items, next_after_id
@@ -0,0 +1,166 @@
+# checkout.py
+
+from collections import namedtuple
+from datetime import datetime, timezone
+from sqlalchemy import update
+from models import db, Customer, Goods, Purchase
+from recommendations import record_sale
+from signals import goods_changed
+import wallet
+
+Receipt = namedtuple('Receipt', ['purchase_ids', 'total_price', 'wallet_balance'])
+
+
+class CheckoutError(Exception):
+    """
+    Raised when a checkout or wallet change cannot be completed.
+
+    Attributes:
+        message (str): Error message returned to the client.
+        status_code (int): HTTP status code for the error response.
+        goods_id (int): ID of the goods that caused the failure, if any.
+    """
+
+    def __init__(self, message, status_code=400, goods_id=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.goods_id = goods_id
+
+
+def checkout(customer_id, lines):
+    """
+    Buy one or more goods for a customer in a single short transaction.
+
+    Stock and wallet are changed with guarded ``UPDATE ... WHERE count_in_stock >= :q``
+    and ``UPDATE ... WHERE wallet_balance_cents >= :total`` statements, so the database
+    decides atomically whether enough stock and funds remain. Concurrent buyers can
+    therefore neither oversell an item nor lose a wallet update, without any
+    application-level locking. Either every line is bought or nothing changes. The
+    debit is recorded as one ``purchase`` entry of the wallet ledger.
+
+    Args:
+        customer_id (int): ID of the buying customer.
+        lines (list): ``(goods_id, quantity)`` pairs. Repeated goods are merged.
+
+    Returns:
+        Receipt: IDs of the new purchases (one per distinct goods, in first-seen order),
+        the total price and the wallet balance right after the debit.
+
+    Raises:
+        CheckoutError: If a goods or the customer does not exist, or stock or funds
+            are insufficient. Nothing is changed in that case.
+    """
+    quantities = {}
+    for goods_id, quantity in lines:
+        quantities[goods_id] = quantities.get(goods_id, 0) + quantity
+
+    prices = dict(db.session.query(Goods.id, Goods.price_per_item)
+                  .filter(Goods.id.in_(quantities))
+                  .all())
+    for goods_id in quantities:
+        if goods_id not in prices:
+            raise CheckoutError('Goods not found.', 404, goods_id)
+    line_totals = {goods_id: prices[goods_id] * quantity for goods_id, quantity in quantities.items()}
+    total_price = sum(line_totals.values())
+
+    try:
+        # Reserve in id order so concurrent carts lock rows in the same order
+        for goods_id in sorted(quantities):
+            quantity = quantities[goods_id]
+            reserved = db.session.execute(
+                update(Goods)
+                .where(Goods.id == goods_id, Goods.count_in_stock >= quantity)
+                .values(count_in_stock=Goods.count_in_stock - quantity)
+                .execution_options(synchronize_session=False)
+            )
+            if reserved.rowcount != 1:
+                raise CheckoutError('Not enough items in stock.', goods_id=goods_id)
+
+        balance_cents = wallet.debit(customer_id, wallet.to_cents(total_price), 'purchase')
+        if balance_cents is None:
+            if db.session.get(Customer, customer_id) is None:
+                raise CheckoutError('Customer not found.', 404)
+            raise CheckoutError('Insufficient funds in wallet.')
+
+        purchase_date = datetime.now(timezone.utc)
+        purchases = [
+            Purchase(
+                customer_id=customer_id,
+                goods_id=goods_id,
+                quantity=quantity,
+                total_price=line_totals[goods_id],
+                purchase_date=purchase_date
+            )
+            for goods_id, quantity in quantities.items()
+        ]
+        db.session.add_all(purchases)
+        # The flush batches all rows into one multi-row INSERT ... RETURNING
+        db.session.flush()
+        purchase_ids = [p.id for p in purchases]
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+
+    for goods_id in quantities:
+        record_sale(customer_id, goods_id)
+        goods_changed.send(goods_id)
+    return Receipt(purchase_ids, total_price, balance_cents / 100)
+
+
+def purchase(customer_id, goods_id, quantity):
+    """
+    Buy ``quantity`` items of a single goods for a customer.
+
+    Args:
+        customer_id (int): ID of the buying customer.
+        goods_id (int): ID of the goods being bought.
+        quantity (int): Number of items to buy.
+
+    Returns:
+        tuple: ``(purchase_id, wallet_balance)``.
+
+    Raises:
+        CheckoutError: See :func:`checkout`.
+    """
+    receipt = checkout(customer_id, [(goods_id, quantity)])
+    return receipt.purchase_ids[0], receipt.wallet_balance
+
+
+def adjust_wallet(username, amount):
+    """
+    Add ``amount`` to a customer's wallet, or take it out when negative.
+
+    Like :func:`checkout`, the balance is changed with a single guarded ``UPDATE`` so
+    concurrent charges and deductions from several workers are never lost and a
+    deduction can never overdraw the wallet. The change is appended to the wallet
+    ledger as a ``charge`` or ``deduct`` entry in the same transaction.
+
+    Args:
+        username (str): Username of the customer.
+        amount (float): Amount to add (positive) or deduct (negative), rounded to cents.
+
+    Returns:
+        float: The wallet balance right after the change.
+
+    Raises:
+        CheckoutError: If the amount rounds to zero, the customer does not exist or
+            the balance is insufficient.
+    """
+    amount_cents = wallet.to_cents(amount)
+    if amount_cents == 0:
+        raise CheckoutError('Invalid amount.')
+
+    try:
+        balance_cents = wallet.apply(Customer.username == username, amount_cents,
+                                     'charge' if amount_cents > 0 else 'deduct')
+        if balance_cents is None:
+            if db.session.query(Customer.id).filter_by(username=username).first() is None:
+                raise CheckoutError('Customer not found.', 404)
+            raise CheckoutError('Insufficient wallet balance.')
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    return balance_cents / 100
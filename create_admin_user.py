@@ -15,7 +15,7 @@ with app.app_context():
             address='Admin Address',
             gender='Other',
             marital_status='Single',
-            wallet_balance=0.0,
+            wallet_balance_cents=0,
             is_admin=True
         )
         db.session.add(admin_user)
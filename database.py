@@ -0,0 +1,43 @@
+# database.py
+
+from sqlalchemy import event
+
+from models import db
+
+
+def set_sqlite_pragmas(engine, pragmas):
+    """
+    Run ``PRAGMA`` statements on every new connection of a SQLite engine.
+
+    Args:
+        engine (Engine): Engine whose connections are configured.
+        pragmas (dict): Pragma names mapped to the values to set, e.g.
+            ``{'journal_mode': 'WAL'}``. Nothing is done for other databases.
+    """
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def init_app(app):
+    """
+    Apply the SQLite pragmas of the configured database profile.
+
+    Must be called after ``db.init_app(app)``; pool settings are passed separately
+    through ``SQLALCHEMY_ENGINE_OPTIONS`` when the engine is created.
+
+    Args:
+        app (Flask): Application providing SQLITE_PRAGMAS.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    with app.app_context():
+        for engine in db.engines.values():
+            set_sqlite_pragmas(engine, pragmas)
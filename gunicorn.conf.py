@@ -0,0 +1,59 @@
+# gunicorn.conf.py
+
+"""
+Gunicorn settings, overridable through the environment.
+
+    GUNICORN_BIND     Address to listen on (default 0.0.0.0:5000).
+    GUNICORN_WORKERS  Worker processes (default 2 per CPU core, plus one).
+    GUNICORN_THREADS  Threads per worker (default 4).
+    GUNICORN_TIMEOUT  Seconds before a silent worker is restarted (default 30).
+
+PASSWORD_HASH_WORKERS defaults to the CPU cores divided between the workers (at
+least one hashing process per worker).
+
+Version counters, cached responses and identity and replica bookkeeping must be
+shared by the workers, so starting more than one worker requires SHARED_CACHE_URL
+to name a shared store (``sqlite:///path`` or ``redis://...``); the Docker image
+uses a SQLite file.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Every worker starts its own password hashing pool, so share the cores between them
+# rather than giving each worker one process per core. Must be set before config is
+# imported, as Config reads it at import time.
+os.environ.setdefault('PASSWORD_HASH_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+from config import Config  # noqa: E402
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+if workers > 1 and Config.SHARED_CACHE_URL.startswith('local://'):
+    raise RuntimeError(
+        f'{workers} workers cannot share the process-local SHARED_CACHE_URL {Config.SHARED_CACHE_URL!r}: '
+        'ETags, cached responses and invalidations would diverge between workers. '
+        'Set SHARED_CACHE_URL to sqlite:///path/to/cache.db or redis://host:port/db, '
+        'or run a single worker (GUNICORN_WORKERS=1).'
+    )
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app, compile schemas and build indexes once in the master
+preload_app = True
+
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    from wsgi import after_fork, app
+    after_fork(app)
@@ -0,0 +1,170 @@
+# hashing.py
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HashingBusyError(Exception):
+    """Raised when too many password hashes are already queued or one took too long."""
+
+
+def normalize_method(method):
+    """
+    Spell out the cost parameters werkzeug fills in for a hash method.
+
+    Args:
+        method (str): A werkzeug method such as ``'scrypt'``, ``'scrypt:32768:8:1'``,
+            ``'pbkdf2'`` or ``'pbkdf2:sha256:600000'``.
+
+    Returns:
+        str: The method as it appears in hashes it produces, e.g. ``'scrypt:32768:8:1'``.
+
+    Raises:
+        ValueError: If the method is not one werkzeug supports.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2' and len(args) <= 2:
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Unsupported password hash method: {method}')
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords in a pool of worker processes.
+
+    Key derivation deliberately costs tens of milliseconds of CPU per call. Running it
+    in separate processes keeps request threads and the interpreter lock of the web
+    worker free for cheap requests, and the number of hashes in flight is capped: once
+    ``max_pending`` are queued, further logins and registrations fail fast with
+    :class:`HashingBusyError` instead of piling up behind each other.
+
+    Hashes record their method and cost, so :meth:`needs_rehash` tells which stored
+    hashes predate a change of ``method``; login upgrades them transparently.
+
+    Attributes:
+        method (str): werkzeug hash method with its cost parameters.
+        workers (int): Size of the process pool; 0 hashes in the calling thread.
+        max_pending (int): Maximum number of hashes queued or running at once.
+        timeout (float): Seconds to wait for a queued hash before giving up.
+    """
+
+    def __init__(self, method='scrypt', workers=0, max_pending=32, timeout=10.0):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configure the hasher from the application settings.
+
+        Args:
+            app (Flask): Application providing PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS,
+                PASSWORD_HASH_MAX_PENDING and PASSWORD_HASH_TIMEOUT.
+        """
+        self.shutdown()
+        self.method = normalize_method(app.config.get('PASSWORD_HASH_METHOD', self.method))
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.max_pending)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that already runs request threads is unsafe
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _run(self, function, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingBusyError('Too many password hashes in progress.')
+        if not self.workers:
+            try:
+                return function(*args)
+            finally:
+                slots.release()
+        try:
+            future = self._executor().submit(function, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # A hash that is already running cannot be cancelled, so its slot is only
+        # freed once it finishes, even when the caller has stopped waiting for it
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingBusyError('Password hashing timed out.')
+
+    def hash(self, password):
+        """
+        Hash a password with the configured method.
+
+        Args:
+            password (str): The plaintext password.
+
+        Returns:
+            str: The werkzeug-format hash, ``method$salt$hash``.
+
+        Raises:
+            HashingBusyError: If the hashing queue is full or the hash timed out.
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """
+        Check a password against a stored hash, whatever method produced it.
+
+        Args:
+            pwhash (str): The stored hash.
+            password (str): The plaintext password to check.
+
+        Returns:
+            bool: True if the password matches.
+
+        Raises:
+            HashingBusyError: If the hashing queue is full or the check timed out.
+        """
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """
+        Check whether a stored hash was made with other parameters than ``method``.
+
+        Args:
+            pwhash (str): The stored hash.
+
+        Returns:
+            bool: True if the hash should be replaced at the next successful login.
+        """
+        return pwhash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        """Stop the worker processes; a new pool is started on the next hash."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def after_fork(self):
+        """Forget a pool inherited from a parent process without touching its workers."""
+        with self._lock:
+            self._pool = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,249 @@
+# identity.py
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+
+from models import db, Customer
+from shared_cache import shared_cache
+
+Identity = namedtuple('Identity', ['customer_id', 'username', 'is_admin'])
+
+_MISSING = object()
+
+
+class IdentityCache:
+    """
+    LRU cache of customer identities with a time-to-live.
+
+    It also remembers when each username was last invalidated (deleted, created or had
+    its admin flag changed), so claims embedded in tokens issued before that moment are
+    no longer trusted, and identities cached before it are reloaded. The invalidation
+    times live in the shared cache's backend, so with a shared ``SHARED_CACHE_URL`` a
+    change made by one worker, or by a script such as create_admin_user.py, is seen by
+    every worker; the identities themselves are cached per process.
+
+    Attributes:
+        cache (SharedCache): Cache whose backend holds the invalidation times.
+        maxsize (int): Maximum number of cached identities.
+        ttl (float): Seconds a cached identity stays valid.
+        revocation_ttl (float): Seconds an invalidation is remembered; should cover the
+            lifetime of an access token. None keeps invalidations until cleared.
+    """
+
+    KEY_PREFIX = 'identity:invalidated:'
+    # How long invalidations are kept when access tokens never expire
+    FOREVER = 10 * 365 * 24 * 3600
+
+    def __init__(self, cache, maxsize=1024, ttl=300, revocation_ttl=900):
+        self.cache = cache
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.revocation_ttl = revocation_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configure the cache from the application settings.
+
+        Args:
+            app (Flask): Application providing IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL
+                and JWT_ACCESS_TOKEN_EXPIRES.
+        """
+        self.maxsize = app.config.get('IDENTITY_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('IDENTITY_CACHE_TTL', self.ttl)
+        expires = app.config.get('JWT_ACCESS_TOKEN_EXPIRES', timedelta(minutes=15))
+        if isinstance(expires, timedelta):
+            self.revocation_ttl = expires.total_seconds()
+        elif expires is False:
+            self.revocation_ttl = None
+        else:
+            self.revocation_ttl = expires
+
+    def get(self, username, invalidated_at=None):
+        """
+        Look up a cached identity.
+
+        Args:
+            username (str): Username to look up.
+            invalidated_at (float): Last invalidation of the username, as returned by
+                :meth:`invalidated_at`; identities loaded before it are a miss.
+
+        Returns:
+            Identity or None: The cached identity (None for a cached unknown user),
+            or the module's ``_MISSING`` sentinel on a cache miss.
+        """
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return _MISSING
+            identity, expires_at, loaded_at = entry
+            if expires_at < time.monotonic() or (invalidated_at is not None and loaded_at <= invalidated_at):
+                del self._entries[username]
+                return _MISSING
+            self._entries.move_to_end(username)
+            return identity
+
+    def set(self, username, identity, loaded_at=None):
+        """
+        Cache an identity.
+
+        Args:
+            username (str): Username of the identity.
+            identity (Identity or None): The identity, or None for an unknown user.
+            loaded_at (float): When the identity was read from the database
+                (seconds since the epoch); defaults to now.
+        """
+        loaded_at = time.time() if loaded_at is None else loaded_at
+        with self._lock:
+            self._entries[username] = (identity, time.monotonic() + self.ttl, loaded_at)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, username):
+        """
+        Drop a cached identity without distrusting previously issued tokens.
+
+        Args:
+            username (str): Username to drop from the cache.
+        """
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def invalidate(self, username):
+        """
+        Drop a cached identity and distrust tokens issued for it until now.
+
+        Args:
+            username (str): Username whose identity changed.
+        """
+        with self._lock:
+            self._entries.pop(username, None)
+        ttl = self.FOREVER if self.revocation_ttl is None else self.revocation_ttl
+        self.cache.backend.set(self.KEY_PREFIX + username, repr(time.time()).encode(), ttl)
+
+    def invalidated_at(self, username):
+        """
+        Look up when a username was last invalidated, in any process.
+
+        Args:
+            username (str): Username to look up.
+
+        Returns:
+            float or None: Seconds since the epoch, or None if no invalidation is remembered.
+        """
+        value = self.cache.backend.get(self.KEY_PREFIX + username)
+        return None if value is None else float(value)
+
+    def is_stale(self, username, issued_at):
+        """
+        Check whether a token issued at ``issued_at`` predates the last invalidation.
+
+        Args:
+            username (str): Username the token was issued for.
+            issued_at (int): The token's ``iat`` claim (seconds since the epoch).
+
+        Returns:
+            bool: True if the token's embedded claims must not be trusted.
+        """
+        invalidated_at = self.invalidated_at(username)
+        return invalidated_at is not None and issued_at <= invalidated_at
+
+    def clear(self):
+        """Forget the identities cached by this process."""
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache(shared_cache)
+
+
+def identity_claims(customer):
+    """
+    Build the additional JWT claims embedded at login.
+
+    Args:
+        customer (Customer): The authenticated customer.
+
+    Returns:
+        dict: Claims carrying the customer's id and admin flag.
+    """
+    return {'customer_id': customer.id, 'is_admin': bool(customer.is_admin)}
+
+
+def current_identity():
+    """
+    Resolve the identity of the customer making the current JWT-protected request.
+
+    The ``customer_id``/``is_admin`` claims are used directly unless the username was
+    invalidated after the token was issued; only then is the database consulted, and
+    the result is cached until the next invalidation.
+
+    Returns:
+        Identity or None: The current identity, or None if the customer no longer exists.
+    """
+    username = get_jwt_identity()
+    claims = get_jwt()
+    invalidated_at = identity_cache.invalidated_at(username)
+    if 'customer_id' in claims and (invalidated_at is None or claims.get('iat', 0) > invalidated_at):
+        return Identity(claims['customer_id'], username, claims['is_admin'])
+
+    identity = identity_cache.get(username, invalidated_at)
+    if identity is _MISSING:
+        loaded_at = time.time()
+        row = (db.session.query(Customer.id, Customer.is_admin)
+               .filter_by(username=username)
+               .first())
+        identity = Identity(row.id, username, bool(row.is_admin)) if row else None
+        identity_cache.set(username, identity, loaded_at)
+    return identity
+
+
+_PENDING_KEY = 'pending_identity_invalidations'
+
+
+def _defer(target, invalidate):
+    # Held until commit: a login or reload before then still reads the old row, and
+    # must not produce a token or cache entry newer than the invalidation
+    session = object_session(target)
+    if session is not None:
+        pending = session.info.setdefault(_PENDING_KEY, {})
+        pending[target.username] = pending.get(target.username, False) or invalidate
+
+
+@event.listens_for(Customer, 'after_insert')
+def _discard_new_customer(mapper, connection, target):
+    # A re-registered username may still have a cached "unknown user" entry
+    _defer(target, invalidate=False)
+
+
+@event.listens_for(Customer, 'after_delete')
+def _invalidate_deleted_customer(mapper, connection, target):
+    _defer(target, invalidate=True)
+
+
+@event.listens_for(Customer.is_admin, 'set')
+def _invalidate_role_change(target, value, oldvalue, initiator):
+    if inspect(target).persistent and value != oldvalue:
+        _defer(target, invalidate=True)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_pending(session):
+    for username, invalidate in session.info.pop(_PENDING_KEY, {}).items():
+        if invalidate:
+            identity_cache.invalidate(username)
+        else:
+            identity_cache.discard(username)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _drop_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
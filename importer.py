@@ -0,0 +1,216 @@
+# importer.py
+
+import csv
+import io
+import json
+import time
+from collections import namedtuple
+from itertools import islice
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from marshmallow import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Goods
+from schemas import GoodsSchema
+from signals import defer_goods_changed
+
+FORMATS = ('csv', 'ndjson')
+
+# Dialect-specific INSERT constructs offering ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+COLUMNS = ('name', 'category', 'price_per_item', 'description', 'count_in_stock')
+
+ImportReport = namedtuple('ImportReport', ['imported', 'failed', 'errors', 'seconds'])
+
+goods_import_schema = GoodsSchema(many=True)
+
+
+def read_rows(stream, fmt):
+    """
+    Parse an uploaded goods file lazily, one row at a time.
+
+    Args:
+        stream: Binary file-like object holding the file.
+        fmt (str): ``'csv'`` (with a header line) or ``'ndjson'`` (one object per line).
+
+    Yields:
+        tuple: ``(line, row)`` where ``row`` is a dict, or an error message string if
+        the line could not be parsed.
+    """
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, 'Too many values.'
+            else:
+                yield reader.line_num, {key: value for key, value in row.items() if value != ''}
+        return
+
+    for line, raw in enumerate(text_stream, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            yield line, 'Invalid JSON.'
+            continue
+        yield line, row if isinstance(row, dict) else 'Expected a JSON object.'
+
+
+def _validate(batch, errors):
+    """Validate one batch; return the loaded rows and record the invalid ones in ``errors``."""
+    lines, rows, ids = [], [], []
+    for line, row in batch:
+        if isinstance(row, str):
+            errors.append({'line': line, 'errors': {'_schema': [row]}})
+            continue
+        row = dict(row)
+        goods_id = row.pop('id', None)
+        if goods_id is not None:
+            try:
+                goods_id = int(goods_id)
+                if goods_id < 1:
+                    raise ValueError
+            except (TypeError, ValueError):
+                errors.append({'line': line, 'errors': {'id': ['Not a valid id.']}})
+                continue
+        lines.append(line)
+        rows.append(row)
+        ids.append(goods_id)
+
+    try:
+        loaded, invalid = goods_import_schema.load(rows), {}
+    except ValidationError as e:
+        loaded, invalid = e.valid_data, e.messages
+    valid = []
+    for index, (line, goods_id, data) in enumerate(zip(lines, ids, loaded)):
+        if index in invalid:
+            errors.append({'line': line, 'errors': invalid[index]})
+            continue
+        # Missing descriptions are stored as empty, like add_goods does
+        data.setdefault('description', '')
+        data = {column: data[column] for column in COLUMNS}
+        if goods_id is not None:
+            data['id'] = goods_id
+        valid.append((line, data))
+    return valid
+
+
+def _write(rows):
+    """Insert new goods and upsert goods with an id; return the IDs written."""
+    dialect = db.engine.dialect.name
+    new = [data for data in rows if 'id' not in data]
+    existing = list({data['id']: data for data in rows if 'id' in data}.values())
+    goods_ids = []
+    if new:
+        goods_ids += db.session.scalars(insert(Goods).returning(Goods.id), new).all()
+    if existing:
+        if dialect not in UPSERT_INSERTS:
+            raise ValueError(f'Upserting goods is not supported on {dialect}.')
+        stmt = UPSERT_INSERTS[dialect](Goods)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Goods.id],
+            set_={column: stmt.excluded[column] for column in COLUMNS}
+        )
+        db.session.execute(stmt, existing)
+        goods_ids += [data['id'] for data in existing]
+        if dialect == 'postgresql':
+            # Explicit ids do not advance the sequence used by later inserts
+            db.session.execute(text(
+                "SELECT setval(pg_get_serial_sequence('goods', 'id'), "
+                "GREATEST((SELECT MAX(id) FROM goods), 1))"
+            ))
+    return goods_ids
+
+
+def import_goods(rows, batch_size=1000, max_errors=1000):
+    """
+    Insert or update goods from parsed rows, one transaction per batch.
+
+    Each batch is validated with ``GoodsSchema(many=True)``; its valid rows are then
+    written with one multi-row INSERT for new goods and one ``INSERT ... ON CONFLICT
+    (id) DO UPDATE`` for rows carrying an ``id``, which replaces every column of an
+    existing goods. A batch is committed before the next is read, so memory use does
+    not depend on the size of the file and an error only loses its own batch.
+    ``goods_changed`` is sent for every goods written once its batch commits.
+
+    Args:
+        rows (iterable): ``(line, row)`` pairs as produced by :func:`read_rows`.
+        batch_size (int): Rows validated and written per transaction.
+        max_errors (int): Maximum number of row errors kept in the report.
+
+    Returns:
+        ImportReport: Rows imported and failed, the first ``max_errors`` row errors
+        (``{'line': ..., 'errors': ...}``) and the elapsed time in seconds.
+    """
+    started = time.perf_counter()
+    imported = failed = 0
+    reported = []
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        errors = []
+        valid = _validate(batch, errors)
+        try:
+            goods_ids = _write([data for _, data in valid]) if valid else []
+            defer_goods_changed(db.session, goods_ids)
+            db.session.commit()
+            imported += len(valid)
+        except (SQLAlchemyError, ValueError) as e:
+            db.session.rollback()
+            message = str(e.orig) if getattr(e, 'orig', None) is not None else str(e)
+            errors.extend({'line': line, 'errors': {'_schema': [message]}} for line, _ in valid)
+        failed += len(errors)
+        reported.extend(errors[:max_errors - len(reported)])
+    return ImportReport(imported, failed, reported, time.perf_counter() - started)
+
+
+def report_to_dict(report):
+    """
+    Turn an import report into the JSON returned by the API and printed by the CLI.
+
+    Args:
+        report (ImportReport): The report.
+
+    Returns:
+        dict: ``imported``, ``failed``, ``errors``, ``seconds`` and ``rows_per_second``.
+    """
+    total = report.imported + report.failed
+    return {
+        'imported': report.imported,
+        'failed': report.failed,
+        'errors': report.errors,
+        'seconds': round(report.seconds, 3),
+        'rows_per_second': round(total / report.seconds) if report.seconds else total,
+    }
+
+
+@click.command('import-goods')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None,
+              help='File format; guessed from the extension by default.')
+@click.option('--batch-size', type=int, default=None, help='Rows per transaction.')
+@with_appcontext
+def import_command(path, fmt, batch_size):
+    """Insert or update goods from a CSV or NDJSON file."""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    batch_size = batch_size or current_app.config['GOODS_IMPORT_BATCH_SIZE']
+    with open(path, 'rb') as stream:
+        report = import_goods(read_rows(stream, fmt), batch_size, current_app.config['GOODS_IMPORT_MAX_ERRORS'])
+    result = report_to_dict(report)
+    for error in result['errors']:
+        click.echo(f'line {error["line"]}: {json.dumps(error["errors"])}', err=True)
+    click.echo(f'{result["imported"]} goods imported, {result["failed"]} failed '
+               f'in {result["seconds"]} s ({result["rows_per_second"]} rows/s).')
@@ -1,4 +1,55 @@
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, text
+
 from app import app, db
 with app.app_context():
     db.create_all()
+    # Unique indexes cannot be created over existing duplicates. Duplicate wishlist
+    # entries carry no data of their own, so all but the first are removed; duplicate
+    # reviews may differ, so they are left for an admin to resolve.
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('wishlist')}
+    if 'uq_wishlist_customer_goods' not in indexes:
+        with db.engine.begin() as conn:
+            removed = conn.execute(text(
+                'DELETE FROM wishlist WHERE id NOT IN '
+                '(SELECT MIN(id) FROM wishlist GROUP BY customer_id, goods_id)'
+            )).rowcount
+        if removed:
+            print(f"Removed {removed} duplicate wishlist entries.")
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('reviews')}
+    if 'uq_reviews_customer_goods' not in indexes:
+        with db.engine.connect() as conn:
+            duplicates = conn.execute(text(
+                'SELECT customer_id, goods_id, COUNT(*) FROM reviews '
+                'GROUP BY customer_id, goods_id HAVING COUNT(*) > 1'
+            )).all()
+        if duplicates:
+            pairs = ', '.join(f'customer {row[0]} / goods {row[1]} ({row[2]})' for row in duplicates[:10])
+            sys.exit(f"Cannot create uq_reviews_customer_goods: {len(duplicates)} customer/goods pairs "
+                     f"have more than one review ({pairs}). Delete the extra reviews and rerun.")
+    # create_all() skips tables that already exist, so add any newer indexes explicitly
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    # Wallet balances moved from a float column to integer cents
+    columns = {column['name'] for column in inspect(db.engine).get_columns('customers')}
+    if 'wallet_balance_cents' not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text('ALTER TABLE customers ADD COLUMN wallet_balance_cents BIGINT NOT NULL DEFAULT 0'))
+            if 'wallet_balance' in columns:
+                conn.execute(text('UPDATE customers SET wallet_balance_cents = '
+                                  'CAST(ROUND(COALESCE(wallet_balance, 0) * 100) AS BIGINT)'))
+    # Balances that predate the wallet ledger get an opening entry, so the ledger and
+    # its snapshots add up to the balance column
+    with db.engine.begin() as conn:
+        opened = conn.execute(text(
+            'INSERT INTO wallet_transactions (customer_id, amount_cents, balance_after_cents, kind, created_at) '
+            "SELECT id, wallet_balance_cents, wallet_balance_cents, 'opening', :now FROM customers "
+            'WHERE wallet_balance_cents != 0 AND NOT EXISTS '
+            '(SELECT 1 FROM wallet_transactions WHERE wallet_transactions.customer_id = customers.id)'
+        ), {'now': datetime.now(timezone.utc)}).rowcount
+    if opened:
+        print(f"Added opening wallet ledger entries for {opened} customers.")
     print("Database tables created.")
@@ -0,0 +1,39 @@
+# loaders.py
+
+from sqlalchemy.orm import joinedload, selectinload
+from models import Purchase, Review, Wishlist
+
+LOADER_STRATEGIES = {
+    'joined': joinedload,
+    'selectin': selectinload,
+}
+
+# Relationships each listing endpoint serializes, and how to load them.
+# "joined" widens the main SELECT with a LEFT OUTER JOIN; "selectin" issues one extra
+# SELECT ... WHERE id IN (...) and suits relationships shared by most rows in the result.
+ENDPOINT_LOADERS = {
+    'purchase_history': [(Purchase.goods, 'joined')],
+    'product_reviews': [(Review.customer, 'joined'), (Review.goods, 'selectin')],
+    'customer_reviews': [(Review.customer, 'selectin'), (Review.goods, 'joined')],
+    'review_details': [(Review.customer, 'joined'), (Review.goods, 'joined')],
+    'wishlist': [(Wishlist.goods, 'joined')],
+}
+
+
+def eager(query, endpoint):
+    """
+    Apply the eager-loading strategy configured for an endpoint to a query.
+
+    Loading the nested relationships up front keeps the number of SQL statements
+    constant instead of issuing one lazy SELECT per serialized row.
+
+    Args:
+        query (Query): Query selecting the endpoint's rows.
+        endpoint (str): Key in ``ENDPOINT_LOADERS``.
+
+    Returns:
+        Query: The query with loader options applied.
+    """
+    options = [LOADER_STRATEGIES[strategy](relationship)
+               for relationship, strategy in ENDPOINT_LOADERS[endpoint]]
+    return query.options(*options)
@@ -2,8 +2,10 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy.ext.hybrid import hybrid_property
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Customer(db.Model):
     """
@@ -18,7 +20,10 @@ class Customer(db.Model):
         address (str): Address of the customer.
         gender (str): Gender of the customer.
         marital_status (str): Marital status of the customer.
-        wallet_balance (float): Current wallet balance of the customer.
+        wallet_balance_cents (int): Current wallet balance in cents, kept in step with the
+            customer's wallet transactions.
+        wallet_balance (float): The wallet balance in currency units (read-only; balances
+            change through wallet.py, which records every change in the ledger).
         is_admin (bool): Flag indicating if the customer has administrative privileges.
     """
 
@@ -31,9 +36,17 @@ class Customer(db.Model):
     address = db.Column(db.String(200), nullable=False)
     gender = db.Column(db.String(10))
     marital_status = db.Column(db.String(10))
-    wallet_balance = db.Column(db.Float, default=0.0)
+    wallet_balance_cents = db.Column(db.BigInteger, nullable=False, default=0)
     is_admin = db.Column(db.Boolean, default=False)
 
+    @hybrid_property
+    def wallet_balance(self):
+        return (self.wallet_balance_cents or 0) / 100
+
+    @wallet_balance.expression
+    def wallet_balance(cls):
+        return cls.wallet_balance_cents / 100.0
+
     def __repr__(self):
         """
         Returns a string representation of the Customer instance.
@@ -69,6 +82,12 @@ class Goods(db.Model):
     description = db.Column(db.Text)
     count_in_stock = db.Column(db.Integer, nullable=False)
 
+    # Composite indexes backing the filtered keyset pagination of GET /goods
+    __table_args__ = (
+        db.Index('ix_goods_category_price_id', 'category', 'price_per_item', 'id'),
+        db.Index('ix_goods_category_id', 'category', 'id'),
+    )
+
     def __repr__(self):
         """
         Returns a string representation of the Goods instance.
@@ -96,8 +115,8 @@ class Purchase(db.Model):
 
     __tablename__ = 'purchases'
     id = db.Column(db.Integer, primary_key=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
-    goods_id = db.Column(db.Integer, db.ForeignKey('goods.id'), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False, index=True)
+    goods_id = db.Column(db.Integer, db.ForeignKey('goods.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, default=1)
     total_price = db.Column(db.Float, nullable=False)
     purchase_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -115,6 +134,80 @@ class Purchase(db.Model):
         return f'<Purchase {self.id}>'
 
 
+class WalletTransaction(db.Model):
+    """
+    Represents one change of a customer's wallet balance.
+
+    Rows are only ever inserted. Each records the balance right after it was applied,
+    so the history of a wallet can be read back without replaying it.
+
+    Attributes:
+        id (int): Primary key; increases in the order changes were applied per customer.
+        customer_id (int): Foreign key referencing the Customer.
+        amount_cents (int): Amount added (positive) or taken out (negative), in cents.
+        balance_after_cents (int): Wallet balance in cents right after this change.
+        kind (str): What caused the change: "charge", "deduct", "purchase", or "opening"
+            for a balance that predates the ledger.
+        created_at (datetime): Date and time when the change was applied.
+        amount (float): ``amount_cents`` in currency units.
+        balance_after (float): ``balance_after_cents`` in currency units.
+    """
+
+    __tablename__ = 'wallet_transactions'
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
+    amount_cents = db.Column(db.BigInteger, nullable=False)
+    balance_after_cents = db.Column(db.BigInteger, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # A customer's history in order (oldest first), and the latest transaction per customer
+    __table_args__ = (
+        db.Index('ix_wallet_transactions_customer_id', 'customer_id', 'id'),
+    )
+
+    @property
+    def amount(self):
+        return self.amount_cents / 100
+
+    @property
+    def balance_after(self):
+        return self.balance_after_cents / 100
+
+    def __repr__(self):
+        return f'<WalletTransaction {self.id} {self.amount_cents:+d} for Customer {self.customer_id}>'
+
+
+class WalletSnapshot(db.Model):
+    """
+    Represents a customer's wallet balance as of a given wallet transaction.
+
+    Snapshots bound the work of checking a balance against the ledger to the
+    transactions made since the latest one.
+
+    Attributes:
+        id (int): Primary key.
+        customer_id (int): Foreign key referencing the Customer.
+        balance_cents (int): Wallet balance in cents after ``last_transaction_id``.
+        last_transaction_id (int): The newest wallet transaction the snapshot includes.
+        created_at (datetime): Date and time when the snapshot was taken.
+    """
+
+    __tablename__ = 'wallet_snapshots'
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
+    balance_cents = db.Column(db.BigInteger, nullable=False)
+    last_transaction_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_wallet_snapshots_customer_id', 'customer_id', 'last_transaction_id'),
+    )
+
+    def __repr__(self):
+        return f'<WalletSnapshot {self.id} for Customer {self.customer_id}>'
+
+
 class Review(db.Model):
     """
     Represents a review submitted by a customer for a goods item.
@@ -134,11 +227,16 @@ class Review(db.Model):
     __tablename__ = 'reviews'
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
-    goods_id = db.Column(db.Integer, db.ForeignKey('goods.id'), nullable=False)
+    goods_id = db.Column(db.Integer, db.ForeignKey('goods.id'), nullable=False, index=True)
     rating = db.Column(db.Integer, nullable=False)
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    is_moderated = db.Column(db.Boolean, default=False)
+    is_moderated = db.Column(db.Boolean, default=False, index=True)
+
+    # One review per customer and goods; also serves lookups by customer_id
+    __table_args__ = (
+        db.Index('uq_reviews_customer_goods', 'customer_id', 'goods_id', unique=True),
+    )
 
     customer = db.relationship('Customer', backref=db.backref('reviews', lazy=True))
     goods = db.relationship('Goods', backref=db.backref('reviews', lazy=True))
@@ -168,6 +266,11 @@ class Wishlist(db.Model):
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
     goods_id = db.Column(db.Integer, db.ForeignKey('goods.id'), nullable=False)
 
+    # One entry per customer and goods; also serves lookups by customer_id
+    __table_args__ = (
+        db.Index('uq_wishlist_customer_goods', 'customer_id', 'goods_id', unique=True),
+    )
+
     # Relationships (optional for easy querying)
     customer = db.relationship('Customer', backref=db.backref('wishlist_items', lazy=True))
     goods = db.relationship('Goods', backref=db.backref('wishlisted_by', lazy=True))
@@ -0,0 +1,173 @@
+# profiler.py
+
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+
+from identity import current_identity
+
+# Samples of requests that matched no route share one key, so unknown paths cannot
+# grow the aggregated stacks without bound
+UNMATCHED = '[unmatched]'
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler for selected requests.
+
+    A request is profiled when it carries the profiling header (``X-Profile: 1`` by
+    default) together with an admin's access token, or the header set to ``secret``, or
+    when it is picked at random with probability ``sample_rate``. While profiled
+    requests are running, a background thread captures the stack of each of their
+    threads every ``interval`` seconds. Stacks are aggregated in memory per endpoint
+    and exported in the collapsed-stack format understood by flamegraph tools.
+
+    Attributes:
+        interval (float): Seconds between two samples.
+        sample_rate (float): Fraction of requests profiled without the header.
+        header (str): Request header that forces profiling, or None to disable it.
+        secret (str): Header value forcing profiling without an admin token, or None.
+        max_depth (int): Maximum number of frames kept per stack (innermost first).
+        max_stacks (int): Maximum number of distinct stacks kept per endpoint.
+    """
+
+    def __init__(self, interval=0.005, sample_rate=0.0, header='X-Profile', secret=None,
+                 max_depth=64, max_stacks=5000):
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.header = header
+        self.secret = secret
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self._active = {}
+        self._stacks = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """
+        Configure the profiler and hook it into the request lifecycle.
+
+        Args:
+            app (Flask): Application providing PROFILER_INTERVAL, PROFILER_SAMPLE_RATE,
+                PROFILER_HEADER and PROFILER_SECRET.
+        """
+        self.interval = app.config.get('PROFILER_INTERVAL', self.interval)
+        self.sample_rate = app.config.get('PROFILER_SAMPLE_RATE', self.sample_rate)
+        self.header = app.config.get('PROFILER_HEADER', self.header)
+        self.secret = app.config.get('PROFILER_SECRET', self.secret)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        value = request.headers.get(self.header) if self.header is not None else None
+        forced = value is not None and self._may_force(value)
+        if forced or (self.sample_rate and random.random() < self.sample_rate):
+            self.start(threading.get_ident(), request.endpoint or UNMATCHED)
+
+    def _may_force(self, value):
+        # Forced profiling adds overhead on demand, so it is reserved to admins
+        if self.secret and hmac.compare_digest(value.encode(), self.secret.encode()):
+            return True
+        if value != '1':
+            return False
+        try:
+            verify_jwt_in_request(optional=True)
+        except (JWTExtendedException, PyJWTError):
+            return False
+        if get_jwt_identity() is None:
+            return False
+        identity = current_identity()
+        return identity is not None and identity.is_admin
+
+    def _teardown_request(self, exc):
+        self.stop(threading.get_ident())
+
+    def start(self, thread_id, endpoint):
+        """
+        Start sampling a thread and attribute its stacks to an endpoint.
+
+        Args:
+            thread_id (int): Identifier of the thread serving the request.
+            endpoint (str): Name the samples are aggregated under.
+        """
+        with self._lock:
+            self._active[thread_id] = endpoint
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+            self._wakeup.set()
+
+    def stop(self, thread_id):
+        with self._lock:
+            self._active.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self.sample()
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._wakeup.clear()
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def sample(self):
+        """Record the current stack of every thread being profiled."""
+        frames = sys._current_frames()
+        with self._lock:
+            active = list(self._active.items())
+        for thread_id, endpoint in active:
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            stack = self._collapse(frame)
+            with self._lock:
+                stacks = self._stacks[endpoint]
+                if stack not in stacks and len(stacks) >= self.max_stacks:
+                    stack = '[truncated]'
+                stacks[stack] += 1
+
+    def collapsed(self, endpoint=None):
+        """
+        Export the aggregated samples as collapsed stacks.
+
+        Args:
+            endpoint (str): Only export this endpoint's samples (all endpoints if None).
+
+        Returns:
+            str: One ``endpoint;frame;...;frame count`` line per distinct stack.
+        """
+        with self._lock:
+            endpoints = {name: Counter(stacks) for name, stacks in self._stacks.items()
+                         if endpoint is None or name == endpoint}
+        lines = []
+        for name, stacks in sorted(endpoints.items()):
+            for stack, count in stacks.most_common():
+                lines.append(f'{name};{stack} {count}')
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def reset(self):
+        """Discard all aggregated samples."""
+        with self._lock:
+            self._stacks.clear()
+
+
+sampling_profiler = SamplingProfiler()
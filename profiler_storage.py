@@ -0,0 +1,170 @@
+# profiler_storage.py
+
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from flask_profiler.storage.sqlite import Sqlite
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedSqliteStorage(Sqlite):
+    """
+    flask_profiler sqlite storage that takes measurement writes off the request path.
+
+    ``insert`` only puts the measurement on a bounded in-memory queue; a background
+    thread drains the queue and writes measurements in batches, one transaction per
+    batch. When the queue is full new measurements are dropped and counted rather than
+    slowing requests down; so is a batch that cannot be written (e.g. "database is
+    locked" while several workers share the file), and the writer carries on with the
+    next one. All access to the underlying sqlite connection, which the
+    stock storage shares between threads, is serialized.
+
+    Storage options (besides those of the sqlite engine):
+        QUEUE_SIZE (int): Maximum number of measurements waiting to be written.
+        BATCH_SIZE (int): Maximum number of measurements written per transaction.
+        FLUSH_INTERVAL (float): Seconds a partial batch may wait before being written.
+        AUTOSTART (bool): Start the writer thread immediately (default True).
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        super().__init__(config)
+        self.batch_size = config.get('BATCH_SIZE', 500)
+        self.flush_interval = config.get('FLUSH_INTERVAL', 1.0)
+        self.queue = queue.Queue(maxsize=config.get('QUEUE_SIZE', 10000))
+        self.written = 0
+        self.dropped = 0
+        self._io_lock = threading.RLock()
+        self._thread = None
+        if config.get('AUTOSTART', True):
+            self.start()
+        atexit.register(self.flush)
+
+    def start(self):
+        """Start the background writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='profiler-writer', daemon=True)
+            self._thread.start()
+
+    def after_fork(self):
+        """
+        Reopen the sqlite connection and restart the writer in a forked worker.
+
+        Neither the parent's connection nor its writer thread can be used after a
+        fork; measurements still queued in the parent are discarded.
+        """
+        with self._io_lock:
+            self.connection = sqlite3.connect(self.sqlite_file, check_same_thread=False)
+            self.cursor = self.connection.cursor()
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self._io_lock = threading.RLock()
+        self._thread = None
+        self.start()
+
+    def insert(self, kwds):
+        try:
+            self.queue.put_nowait(kwds)
+        except queue.Full:
+            with self._io_lock:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        sql = 'INSERT INTO {0} VALUES (null, ?, ?, ?, ?, ?, ?, ?, ?)'.format(self.table_name)
+        with self._io_lock:
+            try:
+                rows = [(
+                    float(kwds.get('startedAt')),
+                    float(kwds.get('endedAt')),
+                    kwds.get('elapsed', None),
+                    json.dumps(list(kwds.get('args', ()))),
+                    json.dumps(kwds.get('kwargs', ())),
+                    kwds.get('method', None),
+                    json.dumps(kwds.get('context', {})),
+                    kwds.get('name', None),
+                ) for kwds in batch]
+                self.cursor.executemany(sql, rows)
+                self.connection.commit()
+            except (sqlite3.Error, TypeError, ValueError):
+                logger.exception('Dropped a batch of %d profiler measurements', len(batch))
+                try:
+                    self.connection.rollback()
+                except sqlite3.Error:
+                    pass
+                self.dropped += len(batch)
+            else:
+                self.written += len(rows)
+
+    def flush(self):
+        """Synchronously write every measurement still waiting in the queue."""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def stats(self):
+        """
+        Report the writer's counters.
+
+        Returns:
+            dict: Number of measurements queued, written and dropped.
+        """
+        with self._io_lock:
+            return {'queued': self.queue.qsize(), 'written': self.written, 'dropped': self.dropped}
+
+    # Reads and deletes go through the shared cursor as well
+
+    def filter(self, *args, **kwargs):
+        # The stock implementation returns a generator reading from the shared cursor
+        with self._io_lock:
+            return list(super().filter(*args, **kwargs))
+
+    def get(self, *args, **kwargs):
+        with self._io_lock:
+            return super().get(*args, **kwargs)
+
+    def getSummary(self, *args, **kwargs):
+        with self._io_lock:
+            return super().getSummary(*args, **kwargs)
+
+    def getTimeseries(self, *args, **kwargs):
+        with self._io_lock:
+            return super().getTimeseries(*args, **kwargs)
+
+    def getMethodDistribution(self, *args, **kwargs):
+        with self._io_lock:
+            return super().getMethodDistribution(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with self._io_lock:
+            return super().delete(*args, **kwargs)
+
+    def truncate(self, *args, **kwargs):
+        with self._io_lock:
+            return super().truncate(*args, **kwargs)
@@ -1,58 +1,395 @@
+
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+
 from models import Customer, Goods, Purchase, db
 from sqlalchemy import func
 
+
+def _refresh(lock, needed, rebuild, ready):
+    """
+    Run ``rebuild`` when ``needed()``, in one thread at a time.
+
+    The first thread takes ``lock``, checks ``needed()`` again and rebuilds. Threads
+    arriving meanwhile return at once and keep using the current data, unless there is
+    none yet (``ready`` is False); then they wait for the rebuild to finish.
+
+    Args:
+        lock (threading.Lock): Lock held while rebuilding.
+        needed (callable): Returns True if the data must be rebuilt.
+        rebuild (callable): Rebuilds the data.
+        ready (bool): Whether data is available to serve during a rebuild.
+    """
+    if not lock.acquire(blocking=not ready):
+        return
+    try:
+        if needed():
+            rebuild()
+    finally:
+        lock.release()
+
+
+class CoPurchaseIndex:
+    """
+    Item-to-item co-purchase counts kept in memory as a CSR sparse matrix.
+
+    Entry (i, j) is the number of customers who bought both goods i and goods j. The
+    matrix is built from the purchases table, kept current between rebuilds by counting
+    new co-purchases as they happen, and rebuilt once it is older than ``max_age``
+    seconds or has accumulated ``max_pending`` incremental updates.
+
+    Recommending for a customer then only sums the matrix rows of the goods they bought
+    and takes the top-k of the resulting score vector. When the matrix is due, the
+    first request rebuilds it while concurrent requests are served from the old one.
+    """
+
+    def __init__(self, max_age=300, max_pending=10000):
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.reset()
+
+    def init_app(self, app):
+        """
+        Configure the rebuild policy from the application settings.
+
+        Args:
+            app (Flask): Application providing RECOMMENDATION_INDEX_MAX_AGE and
+                RECOMMENDATION_INDEX_MAX_PENDING.
+        """
+        self.max_age = app.config.get('RECOMMENDATION_INDEX_MAX_AGE', self.max_age)
+        self.max_pending = app.config.get('RECOMMENDATION_INDEX_MAX_PENDING', self.max_pending)
+
+    def reset(self):
+        """Forget the matrix so the next lookup rebuilds it from the database."""
+        with self._lock:
+            # The arrays are created by the first build, which also imports numpy
+            self._built_at = None
+            self._goods_ids = self._indptr = self._indices = self._data = None
+            self._positions = {}
+            self._customer_items = {}
+            self._pending = defaultdict(Counter)
+            self._pending_count = 0
+
+    def build(self):
+        """
+        Rebuild the matrix from the distinct (customer, goods) pairs in the purchases table.
+        """
+        import numpy as np
+
+        pairs = db.session.query(Purchase.customer_id, Purchase.goods_id).distinct().all()
+        customer_items = defaultdict(set)
+        for customer_id, goods_id in pairs:
+            customer_items[customer_id].add(goods_id)
+
+        goods_ids = np.array(sorted({goods_id for _, goods_id in pairs}), dtype=np.int64)
+        positions = {int(goods_id): position for position, goods_id in enumerate(goods_ids)}
+        n = len(goods_ids)
+
+        # Every ordered pair of distinct goods in a customer's basket adds one to its cell
+        rows, cols = [], []
+        for items in customer_items.values():
+            if len(items) < 2:
+                continue
+            basket = np.fromiter((positions[g] for g in items), dtype=np.int64, count=len(items))
+            row, col = np.meshgrid(basket, basket, indexing='ij')
+            off_diagonal = row != col
+            rows.append(row[off_diagonal])
+            cols.append(col[off_diagonal])
+
+        if rows:
+            keys, counts = np.unique(np.concatenate(rows) * n + np.concatenate(cols), return_counts=True)
+            matrix_rows = keys // n
+            indices = keys % n
+            data = counts.astype(np.float64)
+            indptr = np.concatenate(([0], np.cumsum(np.bincount(matrix_rows, minlength=n))))
+        else:
+            indices = np.empty(0, dtype=np.int64)
+            data = np.empty(0, dtype=np.float64)
+            indptr = np.zeros(n + 1, dtype=np.int64)
+
+        with self._lock:
+            self._goods_ids = goods_ids
+            self._positions = positions
+            self._indptr = indptr
+            self._indices = indices
+            self._data = data
+            self._customer_items = dict(customer_items)
+            self._pending = defaultdict(Counter)
+            self._pending_count = 0
+            self._built_at = time.monotonic()
+
+    def _needs_build(self):
+        return (self._built_at is None
+                or time.monotonic() - self._built_at > self.max_age
+                or self._pending_count > self.max_pending)
+
+    def record_purchase(self, customer_id, goods_id):
+        """
+        Count the co-purchases created by a new purchase without rebuilding the matrix.
+
+        Args:
+            customer_id (int): ID of the buying customer.
+            goods_id (int): ID of the goods bought.
+        """
+        with self._lock:
+            if self._built_at is None:
+                return
+            items = self._customer_items.setdefault(customer_id, set())
+            if goods_id in items:
+                return
+            for other_id in items:
+                self._pending[goods_id][other_id] += 1
+                self._pending[other_id][goods_id] += 1
+            self._pending_count += 2 * len(items)
+            items.add(goods_id)
+
+    def recommend(self, customer_id, limit=5):
+        """
+        Rank the goods most often co-purchased with what a customer already bought.
+
+        Args:
+            customer_id (int): ID of the customer to recommend for.
+            limit (int): Maximum number of goods IDs to return.
+
+        Returns:
+            list: Goods IDs, best first. Empty if the customer has no co-purchase signal.
+        """
+        if self._needs_build():
+            _refresh(self._build_lock, self._needs_build, self.build, ready=self._built_at is not None)
+        import numpy as np
+
+        with self._lock:
+            purchased = set(self._customer_items.get(customer_id, ()))
+            if not purchased:
+                return []
+            goods_ids, positions = self._goods_ids, self._positions
+            indptr, indices, data = self._indptr, self._indices, self._data
+            extra = Counter()
+            for goods_id in purchased:
+                extra.update(self._pending.get(goods_id, {}))
+
+        rows = [positions[g] for g in purchased if g in positions]
+        if rows:
+            slices = [slice(indptr[row], indptr[row + 1]) for row in rows]
+            scores = np.bincount(
+                np.concatenate([indices[s] for s in slices]),
+                weights=np.concatenate([data[s] for s in slices]),
+                minlength=len(goods_ids)
+            )
+        else:
+            scores = np.zeros(len(goods_ids))
+
+        # Fold in co-purchases recorded since the last build
+        new_goods = {}
+        for goods_id, count in extra.items():
+            if goods_id in positions:
+                scores[positions[goods_id]] += count
+            else:
+                new_goods[goods_id] = count
+
+        for goods_id in purchased:
+            if goods_id in positions:
+                scores[positions[goods_id]] = 0
+            new_goods.pop(goods_id, None)
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ranked = [(float(scores[c]), int(goods_ids[c])) for c in candidates]
+        ranked.extend((float(count), goods_id) for goods_id, count in new_goods.items() if count > 0)
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [goods_id for _, goods_id in ranked[:limit]]
+
+
+co_purchase_index = CoPurchaseIndex()
+
+
+def _utc_today():
+    return datetime.now(timezone.utc).date()
+
+
+class TopSellers:
+    """
+    Purchase counts per goods item with a maintained top-k list.
+
+    Counts are loaded from the purchases table once (and again every ``max_age``
+    seconds, to pick up sales made by other processes) and incremented on every sale
+    in between. With ``window_days`` set, counts are kept in one bucket per day and
+    buckets older than the window are dropped as days pass, so the ranking covers only
+    recent sales. Reading the top sellers is a slice of the maintained list; a due
+    reload is done by one request while the others read the current list.
+    """
+
+    def __init__(self, window_days=None, size=50, max_age=300, clock=_utc_today):
+        self.window_days = window_days
+        self.size = size
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.reset()
+
+    def init_app(self, app):
+        """
+        Configure the ranking from the application settings.
+
+        Args:
+            app (Flask): Application providing TOP_SELLERS_WINDOW_DAYS and TOP_SELLERS_MAX_AGE.
+        """
+        self.window_days = app.config.get('TOP_SELLERS_WINDOW_DAYS', self.window_days)
+        self.max_age = app.config.get('TOP_SELLERS_MAX_AGE', self.max_age)
+
+    def reset(self):
+        """Forget all counts so the next lookup reloads them from the database."""
+        with self._lock:
+            self._loaded_at = None
+            self._day = None
+            self._buckets = {}
+            self._totals = Counter()
+            self._top = []
+
+    def load(self):
+        """
+        Reload the counts from the purchases table with a single grouped query.
+        """
+        today = self.clock()
+        buckets = defaultdict(Counter)
+        if self.window_days:
+            first_day = today - timedelta(days=self.window_days - 1)
+            rows = (db.session.query(Purchase.goods_id, func.date(Purchase.purchase_date), func.count(Purchase.id))
+                    .filter(Purchase.purchase_date >= datetime.combine(first_day, datetime.min.time()))
+                    .group_by(Purchase.goods_id, func.date(Purchase.purchase_date))
+                    .all())
+            for goods_id, day, count in rows:
+                buckets[date.fromisoformat(str(day)[:10]).toordinal()][goods_id] += count
+        else:
+            rows = (db.session.query(Purchase.goods_id, func.count(Purchase.id))
+                    .group_by(Purchase.goods_id)
+                    .all())
+            for goods_id, count in rows:
+                buckets[None][goods_id] += count
+
+        totals = Counter()
+        for bucket in buckets.values():
+            totals.update(bucket)
+
+        with self._lock:
+            self._buckets = dict(buckets)
+            self._totals = totals
+            self._day = today
+            self._rank()
+            self._loaded_at = time.monotonic()
+
+    def _needs_load(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def _rank(self):
+        self._top = heapq.nsmallest(self.size, ((-count, goods_id) for goods_id, count in self._totals.items()))
+
+    def _expire_buckets(self, today):
+        # Called with the lock held: drop days that slid out of the window and re-rank
+        first_day = (today - timedelta(days=self.window_days - 1)).toordinal()
+        for day in [day for day in self._buckets if day < first_day]:
+            self._totals.subtract(self._buckets.pop(day))
+        self._totals = +self._totals
+        self._day = today
+        self._rank()
+
+    def record(self, goods_id):
+        """
+        Count one sale of a goods item.
+
+        Args:
+            goods_id (int): ID of the goods sold.
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            today = self.clock()
+            if self.window_days and today != self._day:
+                self._expire_buckets(today)
+            day = today.toordinal() if self.window_days else None
+            self._buckets.setdefault(day, Counter())[goods_id] += 1
+            self._totals[goods_id] += 1
+
+            entry = (-self._totals[goods_id], goods_id)
+            for i, (_, top_id) in enumerate(self._top):
+                if top_id == goods_id:
+                    self._top[i] = entry
+                    break
+            else:
+                if len(self._top) < self.size:
+                    self._top.append(entry)
+                elif entry < self._top[-1]:
+                    self._top[-1] = entry
+                else:
+                    return
+            self._top.sort()
+
+    def top(self, limit=5):
+        """
+        Return the best-selling goods.
+
+        Args:
+            limit (int): Maximum number of goods IDs to return (at most ``size``).
+
+        Returns:
+            list: Goods IDs, best seller first.
+        """
+        if self._needs_load():
+            _refresh(self._load_lock, self._needs_load, self.load, ready=self._loaded_at is not None)
+        with self._lock:
+            today = self.clock()
+            if self.window_days and today != self._day:
+                self._expire_buckets(today)
+            return [goods_id for _, goods_id in self._top[:limit]]
+
+
+top_sellers = TopSellers()
+
+
+def record_sale(customer_id, goods_id):
+    """
+    Update the in-memory recommendation indexes after a committed purchase.
+
+    Args:
+        customer_id (int): ID of the buying customer.
+        goods_id (int): ID of the goods bought.
+    """
+    co_purchase_index.record_purchase(customer_id, goods_id)
+    top_sellers.record(goods_id)
+
+
 def get_top_selling_goods(limit=5):
     """
     Fallback method: recommends top-selling items based on the number of purchases.
     """
-    top_selling = (db.session.query(Goods)
-                   .join(Purchase)
-                   .group_by(Goods.id)
-                   .order_by(func.count(Purchase.id).desc())
-                   .limit(limit)
-                   .all())
-    return top_selling
+    top_ids = top_sellers.top(limit)
+    goods_by_id = {goods.id: goods for goods in Goods.query.filter(Goods.id.in_(top_ids)).all()}
+    return [goods_by_id[goods_id] for goods_id in top_ids if goods_id in goods_by_id]
 
 def get_recommendations_for_customer(customer_id, limit=5):
     """
     Generate product recommendations for a given customer based on similar customer purchases.
     Steps:
-    1. Get all goods the customer has purchased.
-    2. Find other customers who have purchased these goods.
-    3. Recommend goods those similar customers bought that the original customer hasn't yet purchased.
-    4. If no similar customers or items are found, fallback to top selling goods.
+    1. Look up the goods most often bought together with the customer's purchases in the
+       co-purchase index.
+    2. Load those goods, keeping the index's ranking.
+    3. If the customer has no purchases or no co-purchases, fallback to top selling goods.
     """
+    recommended_ids = co_purchase_index.recommend(customer_id, limit=limit)
 
-    # Goods that the target customer has already purchased
-    purchased_goods_ids = db.session.query(Purchase.goods_id).filter(Purchase.customer_id == customer_id).all()
-    purchased_goods_ids = [g_id for (g_id,) in purchased_goods_ids]
-
-    # If the customer hasn't purchased anything, we have no basis for similarity, so fallback
-    if not purchased_goods_ids:
-        return get_top_selling_goods(limit=limit)
-
-    # Find customers who purchased any of these goods
-    similar_customers = (db.session.query(Purchase.customer_id)
-                         .filter(Purchase.goods_id.in_(purchased_goods_ids), Purchase.customer_id != customer_id)
-                         .group_by(Purchase.customer_id)
-                         .all())
-    similar_customers_ids = [c_id for (c_id,) in similar_customers]
-
-    # If there are no similar customers, fallback
-    if not similar_customers_ids:
+    # If no recommendations found, fallback to top sellers
+    if not recommended_ids:
         return get_top_selling_goods(limit=limit)
 
-    # From these similar customers, find goods they purchased that our original customer hasn't
-    recommended_goods = (db.session.query(Goods)
-                         .join(Purchase)
-                         .filter(Purchase.customer_id.in_(similar_customers_ids))
-                         .filter(Goods.id.notin_(purchased_goods_ids))
-                         .group_by(Goods.id)
-                         .order_by(func.count(Purchase.id).desc())  # rank by popularity among similar customers
-                         .limit(limit)
-                         .all())
-
-    # If no recommendations found, fallback to top sellers
+    goods_by_id = {goods.id: goods for goods in Goods.query.filter(Goods.id.in_(recommended_ids)).all()}
+    recommended_goods = [goods_by_id[goods_id] for goods_id in recommended_ids if goods_id in goods_by_id]
     if not recommended_goods:
         return get_top_selling_goods(limit=limit)
 
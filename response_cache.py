@@ -0,0 +1,213 @@
+# response_cache.py
+
+import functools
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import urlencode
+
+from flask import current_app, g, make_response, request
+
+from signals import goods_changed, reviews_changed
+from streaming import wants_stream
+from versions import versions
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'mimetype', 'etag', 'tags', 'expires_at'])
+
+
+class ResponseCache:
+    """
+    LRU cache of encoded response bodies with a time-to-live and a memory cap.
+
+    Entries are tagged with the version keys they depend on (``'catalog'``,
+    ``('goods', id)``, ``('reviews', id)``) and dropped as soon as a committed write
+    sends the matching change signal, so the TTL only bounds how long unused entries
+    linger. Each entry also records the versions it was built from and is only served
+    while they are current, whatever order signal receivers run in.
+
+    Attributes:
+        max_bytes (int): Maximum total size of the cached bodies and keys.
+        ttl (float): Seconds an entry stays valid. 0 disables the cache.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to run the view.
+        evictions (int): Entries dropped to respect ``max_bytes`` or because they expired.
+        invalidations (int): Entries dropped by a change signal.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=60):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def init_app(self, app):
+        """
+        Configure the cache from the application settings.
+
+        Args:
+            app (Flask): Application providing RESPONSE_CACHE_MAX_BYTES and
+                RESPONSE_CACHE_TTL.
+        """
+        self.max_bytes = app.config.get('RESPONSE_CACHE_MAX_BYTES', self.max_bytes)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', self.ttl)
+
+    def get(self, key, etag):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Cache key of the request.
+            etag (str): Current versions of the data the response depends on.
+
+        Returns:
+            CachedResponse or None: The entry, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.etag != etag or entry.expires_at < time.monotonic()):
+                self._remove(key)
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, body, mimetype, etag, tags, ttl=None):
+        """
+        Store a response.
+
+        Args:
+            key (str): Cache key of the request.
+            body (bytes): Encoded response body.
+            mimetype (str): Mimetype of the response.
+            etag (str): Versions of the data the response was built from.
+            tags (list): Version keys the response depends on.
+            ttl (float): Seconds the entry stays valid, at most ``self.ttl``.
+        """
+        size = len(body) + len(key)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedResponse(body, mimetype, etag, tuple(tags), time.monotonic() + ttl)
+            self._size += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body) + len(key)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, *tags):
+        """
+        Drop every entry tagged with one of ``tags``.
+
+        Args:
+            *tags: Version keys whose data changed.
+        """
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def stats(self):
+        """
+        Report the cache's counters and size.
+
+        Returns:
+            dict: ``entries``, ``bytes``, ``max_bytes``, ``hits``, ``misses``,
+            ``evictions`` and ``invalidations``.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+
+response_cache = ResponseCache()
+
+
+@goods_changed.connect
+def _invalidate_goods(goods_id, **kwargs):
+    response_cache.invalidate(('goods', goods_id), 'catalog')
+
+
+@reviews_changed.connect
+def _invalidate_reviews(goods_id, **kwargs):
+    response_cache.invalidate(('reviews', goods_id))
+
+
+def _cache_key():
+    return f'{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+
+
+def cached(version_keys):
+    """
+    Serve a GET route's successful responses from the response cache.
+
+    A response is only stored if none of its version keys changed while the view
+    ran, so a write committing mid-request can never leave stale data behind. Cache
+    misses of read-only routes still read from a replica; as a replica may lag behind
+    the versions, a response built from one is kept for at most
+    ``REPLICA_STICKY_SECONDS``, the replication lag the routing already allows for.
+    Streamed responses are never cached.
+
+    Args:
+        version_keys (callable): Called with the view's keyword arguments; returns
+            the version keys the response depends on, used as its cache tags.
+
+    Returns:
+        callable: Decorator for the view function.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if response_cache.ttl <= 0 or wants_stream():
+                return view(*args, **kwargs)
+
+            key = _cache_key()
+            tags = version_keys(**kwargs)
+            etag = versions.request_etag(*tags)
+            entry = response_cache.get(key, etag)
+            if entry is not None:
+                return current_app.response_class(entry.body, mimetype=entry.mimetype)
+
+            response = make_response(view(*args, **kwargs))
+            if (response.status_code == 200 and not response.is_streamed
+                    and versions.etag(*tags) == etag):
+                ttl = current_app.config.get('REPLICA_STICKY_SECONDS', 5) if g.get('replica_read') else None
+                response_cache.set(key, response.get_data(), response.mimetype, etag, tags, ttl)
+            return response
+        return wrapper
+    return decorator
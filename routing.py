@@ -0,0 +1,136 @@
+# routing.py
+
+import functools
+import random
+import time
+
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_sqlalchemy.session import Session
+from jwt.exceptions import PyJWTError
+from sqlalchemy import event
+
+from shared_cache import shared_cache
+
+
+class ReplicaRouter:
+    """
+    Decides when a query may be served by a read replica.
+
+    Queries are sent to a replica only inside routes marked with :func:`read_only`,
+    and never for a user who wrote to the primary within the last
+    ``REPLICA_STICKY_SECONDS``, so customers always read their own writes despite
+    replication lag. The time of each user's last write is kept in the shared cache's
+    backend, so with a shared ``SHARED_CACHE_URL`` the next request sees it whichever
+    worker serves it.
+
+    Attributes:
+        cache (SharedCache): Cache whose backend holds the last-write times.
+    """
+
+    KEY_PREFIX = 'replica:last_write:'
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def choose(self, engines):
+        """
+        Pick a replica engine for the current request.
+
+        Args:
+            engines (Mapping): The application's engines by bind key.
+
+        Returns:
+            Engine or None: A random replica engine, or None to use the primary.
+        """
+        if not has_request_context() or not g.get('read_only'):
+            return None
+        replicas = current_app.config.get('DATABASE_REPLICAS')
+        if not replicas:
+            return None
+        writer = g.get('writer')
+        if writer is not None and self._wrote_recently(writer):
+            return None
+        # Lets the response cache know the data may lag behind the primary
+        g.replica_read = True
+        return engines[random.choice(replicas)]
+
+    def _wrote_recently(self, writer):
+        sticky = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+        last_write = self.cache.backend.get(self.KEY_PREFIX + writer)
+        return last_write is not None and time.time() - float(last_write) < sticky
+
+    def record_write(self):
+        """Remember that the user of the current request wrote to the primary."""
+        if not has_request_context() or g.get('write_recorded'):
+            return
+        try:
+            writer = get_jwt_identity()
+        except RuntimeError:
+            # No token was verified for this request
+            return
+        if writer is None:
+            return
+        sticky = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+        if sticky > 0:
+            self.cache.backend.set(self.KEY_PREFIX + writer, repr(time.time()).encode(), sticky)
+        # Flushes and bulk statements of one request are recorded once
+        g.write_recorded = True
+
+
+replica_router = ReplicaRouter(shared_cache)
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica in read-only routes and writes to the primary.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary, as do models
+    with their own ``bind_key``.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not getattr(clause, 'is_dml', False):
+            replica = replica_router.choose(self._db.engines)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_flush(session, flush_context):
+    replica_router.record_write()
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _record_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        replica_router.record_write()
+
+
+def read_only(view):
+    """
+    Mark a route as read-only so its queries may be served by a replica.
+
+    The request's JWT, if any, is verified up front so users who just wrote keep
+    reading from the primary. An invalid token only means the request is treated as
+    anonymous; it is still rejected by ``jwt_required`` where the route demands one.
+
+    Args:
+        view (callable): The view function.
+
+    Returns:
+        callable: The wrapped view.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        if current_app.config.get('DATABASE_REPLICAS'):
+            try:
+                verify_jwt_in_request(optional=True)
+                g.writer = get_jwt_identity()
+            except (JWTExtendedException, PyJWTError):
+                g.writer = None
+        return view(*args, **kwargs)
+    return wrapper
@@ -82,6 +82,30 @@ class PurchaseSchema(Schema):
     goods = fields.Nested(GoodsSchema, only=['id', 'name', 'price_per_item'])
 
 
+class CartItemSchema(Schema):
+    """
+    Schema for validating a single line of a cart checkout.
+
+    Attributes:
+        goods_id (int): ID of the goods to buy.
+        quantity (int): Number of items to buy (defaults to 1).
+    """
+
+    goods_id = fields.Int(required=True)
+    quantity = fields.Int(load_default=1, validate=validate.Range(min=1))
+
+
+class CartSchema(Schema):
+    """
+    Schema for validating a cart checkout request.
+
+    Attributes:
+        items (list): Lines of the cart, each validated by CartItemSchema.
+    """
+
+    items = fields.List(fields.Nested(CartItemSchema), required=True, validate=validate.Length(min=1))
+
+
 class ReviewSchema(Schema):
     """
     Schema for serializing and deserializing Review instances.
@@ -110,6 +134,24 @@ class ReviewSchema(Schema):
     goods = fields.Nested(GoodsSchema, only=['id', 'name'], dump_only=True)
 
 
+class WalletTransactionSchema(Schema):
+    """
+    Schema for serializing wallet ledger entries.
+
+    Attributes:
+        id (int): Transaction ID; later transactions have larger IDs.
+        amount (float): Amount added (positive) or taken out (negative).
+        balance_after (float): Wallet balance right after the transaction.
+        kind (str): "charge", "deduct", "purchase" or "opening".
+        created_at (datetime): Date and time of the transaction.
+    """
+
+    id = fields.Int(dump_only=True)
+    amount = fields.Float(dump_only=True)
+    balance_after = fields.Float(dump_only=True)
+    kind = fields.Str(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+
 
 class WishlistSchema(Schema):
     """
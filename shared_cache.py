@@ -0,0 +1,325 @@
+# shared_cache.py
+
+import json
+import math
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - only needed for redis:// URLs
+    redis = None
+
+
+class LocalBackend:
+    """
+    Key-value store private to the process; the default when no shared store is set.
+
+    Values are bytes (counters are integers) and expire after their TTL.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key, time.time())
+            return None if item is None else item[0]
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            return [None if item is None else item[0] for item in (self._live(key, now) for key in keys)]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+
+    def add(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._data[key] = (value, now + ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_if(self, key, value):
+        with self._lock:
+            item = self._live(key, time.time())
+            if item is None or item[0] != value:
+                return False
+            del self._data[key]
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._data.get(key, (0, None))[0]) + 1
+            self._data[key] = (value, None)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SqliteBackend:
+    """
+    Key-value store in a SQLite file shared by every worker on the host.
+
+    The file runs in WAL mode, so workers read concurrently and writes are short
+    single-statement transactions.
+
+    Attributes:
+        path (str): Path of the SQLite file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cache '
+                         '(key TEXT PRIMARY KEY, value BLOB, expires_at REAL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        rows = dict(self._connect().execute(
+            f'SELECT key, value FROM cache WHERE key IN ({",".join("?" * len(keys))}) '
+            'AND (expires_at IS NULL OR expires_at > ?)',
+            [*keys, time.time()]
+        ))
+        return [rows.get(key) for key in keys]
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        conn.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)', (key, value, time.time() + ttl))
+        if random.random() < 0.01:
+            conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+
+    def add(self, key, value, ttl):
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM cache WHERE key = ? AND expires_at <= ?', (key, now))
+            added = conn.execute('INSERT OR IGNORE INTO cache VALUES (?, ?, ?)', (key, value, now + ttl)).rowcount
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return added == 1
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def delete_if(self, key, value):
+        return self._connect().execute(
+            'DELETE FROM cache WHERE key = ? AND value = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, value, time.time())
+        ).rowcount == 1
+
+    def incr(self, key):
+        return self._connect().execute(
+            'INSERT INTO cache VALUES (?, 1, NULL) '
+            'ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 RETURNING value',
+            (key,)
+        ).fetchone()[0]
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+
+class RedisBackend:
+    """
+    Key-value store on a Redis (or Redis-compatible) server shared by all hosts.
+
+    Attributes:
+        prefix (str): Prefix of every key, so the database can be shared.
+    """
+
+    # Compare-and-delete in one round trip, so no other client can take the key in between
+    DELETE_IF_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, url, prefix='ecommerce:'):
+        if redis is None:
+            raise RuntimeError('The redis package is required for a redis:// SHARED_CACHE_URL.')
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._delete_if = self._client.register_script(self.DELETE_IF_SCRIPT)
+
+    def get(self, key):
+        return self._client.get(self.prefix + key)
+
+    def get_many(self, keys):
+        return self._client.mget([self.prefix + key for key in keys])
+
+    def set(self, key, value, ttl):
+        self._client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    def add(self, key, value, ttl):
+        return bool(self._client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1), nx=True))
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def delete_if(self, key, value):
+        return bool(self._delete_if(keys=[self.prefix + key], args=[value]))
+
+    def incr(self, key):
+        return self._client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + '*'):
+            self._client.delete(key)
+
+
+def create_backend(url):
+    """
+    Create the cache backend for a SHARED_CACHE_URL.
+
+    Args:
+        url (str): ``local://``, ``sqlite:///path/to/cache.db`` or ``redis://host:port/db``.
+
+    Returns:
+        The backend instance.
+    """
+    if url.startswith('sqlite:///'):
+        return SqliteBackend(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+    if url.startswith('local://'):
+        return LocalBackend()
+    raise ValueError(f'Unsupported SHARED_CACHE_URL: {url}')
+
+
+class SharedCache:
+    """
+    Cache of computed results in a backend shared by all workers.
+
+    :meth:`fetch` protects expensive results from thundering herds twice over:
+
+    - Single flight: when a value is missing or due, only the worker that wins a
+      short lock recomputes it. The others keep serving the previous value, or wait
+      for the winner when there is none.
+    - Probabilistic early refresh ("XFetch"): a value is refreshed before it expires
+      with a probability that grows as expiry nears and with how long the value took
+      to compute, so popular keys are renewed by one request ahead of time instead
+      of by every worker at the moment they expire.
+
+    Values must be JSON-serializable.
+
+    Attributes:
+        backend: Store holding the values (see :func:`create_backend`).
+        beta (float): Eagerness of early refresh; 0 disables it.
+        lock_timeout (float): Seconds a recomputation may hold the lock, which is
+            also how long a value outlives its TTL to be served while refreshing.
+    """
+
+    def __init__(self, backend=None, beta=1.0, lock_timeout=5.0):
+        self.backend = backend or LocalBackend()
+        self.beta = beta
+        self.lock_timeout = lock_timeout
+
+    def init_app(self, app):
+        """
+        Configure the cache from the application settings.
+
+        Args:
+            app (Flask): Application providing SHARED_CACHE_URL, SHARED_CACHE_BETA
+                and SHARED_CACHE_LOCK_TIMEOUT.
+        """
+        self.backend = create_backend(app.config.get('SHARED_CACHE_URL', 'local://'))
+        self.beta = app.config.get('SHARED_CACHE_BETA', self.beta)
+        self.lock_timeout = app.config.get('SHARED_CACHE_LOCK_TIMEOUT', self.lock_timeout)
+
+    def fetch(self, key, compute, ttl):
+        """
+        Return the cached value of ``key``, computing and storing it when needed.
+
+        Args:
+            key (str): Cache key; include a version to invalidate on change.
+            compute (callable): Produces the value when it must be (re)computed.
+            ttl (float): Seconds the value is considered fresh.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+        entry = self._load(key)
+        now = time.time()
+        if entry is not None and not self._due(entry, now):
+            return entry['value']
+
+        lock_key = f'lock:{key}'
+        token = uuid.uuid4().hex.encode()
+        if self.backend.add(lock_key, token, self.lock_timeout):
+            try:
+                return self._compute(key, compute, ttl)
+            finally:
+                # A computation outliving lock_timeout has lost the lock to another
+                # worker, whose lock must stay in place
+                self.backend.delete_if(lock_key, token)
+
+        if entry is not None:
+            # Another worker is refreshing; the previous value is still good enough
+            return entry['value']
+        deadline = now + self.lock_timeout
+        while time.time() < deadline:
+            time.sleep(0.01)
+            entry = self._load(key)
+            if entry is not None:
+                return entry['value']
+        return self._compute(key, compute, ttl)
+
+    def _due(self, entry, now):
+        # XFetch: -log(U) is exponentially distributed, so the refresh point moves
+        # earlier by about beta * delta on average
+        early = -entry['delta'] * self.beta * math.log(1.0 - random.random())
+        return now + early >= entry['expires_at']
+
+    def _load(self, key):
+        payload = self.backend.get(key)
+        return None if payload is None else json.loads(payload)
+
+    def _compute(self, key, compute, ttl):
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        payload = json.dumps({'value': value, 'expires_at': finished + ttl, 'delta': finished - started})
+        self.backend.set(key, payload.encode(), ttl + self.lock_timeout)
+        return value
+
+    def clear(self):
+        self.backend.clear()
+
+
+shared_cache = SharedCache()
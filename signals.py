@@ -0,0 +1,63 @@
+# signals.py
+
+from blinker import Namespace
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from models import db, Goods, Review
+
+_signals = Namespace()
+
+# Sent with the goods id after a goods row was added, changed or deleted
+goods_changed = _signals.signal('goods-changed')
+
+# Sent with the goods id after a review of that goods was added, changed or deleted
+reviews_changed = _signals.signal('reviews-changed')
+
+_PENDING_KEY = 'pending_signals'
+
+
+def _defer(target, signal, goods_id):
+    # Held until commit: subscribers must never see a change readers cannot see yet
+    session = object_session(target)
+    if session is not None and goods_id is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add((signal, goods_id))
+
+
+def defer_goods_changed(session, goods_ids):
+    """
+    Send ``goods_changed`` for goods written with bulk statements once ``session`` commits.
+
+    Bulk INSERT and UPDATE statements bypass the mapper events that queue the signal
+    for ORM writes, so code issuing them reports the goods it touched here.
+
+    Args:
+        session (Session): Session whose transaction wrote the goods.
+        goods_ids (iterable): IDs of the goods written.
+    """
+    session.info.setdefault(_PENDING_KEY, set()).update((goods_changed, goods_id) for goods_id in goods_ids)
+
+
+@event.listens_for(Goods, 'after_insert')
+@event.listens_for(Goods, 'after_update')
+@event.listens_for(Goods, 'after_delete')
+def _goods_written(mapper, connection, target):
+    _defer(target, goods_changed, target.id)
+
+
+@event.listens_for(Review, 'after_insert')
+@event.listens_for(Review, 'after_update')
+@event.listens_for(Review, 'after_delete')
+def _review_written(mapper, connection, target):
+    _defer(target, reviews_changed, target.goods_id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _send_pending(session):
+    for signal, goods_id in session.info.pop(_PENDING_KEY, ()):
+        signal.send(goods_id)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _drop_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
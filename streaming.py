@@ -0,0 +1,52 @@
+# streaming.py
+
+from flask import Response, current_app, request, stream_with_context
+
+from catalog import TRUE_VALUES
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_stream():
+    """
+    Check whether the client asked for a streamed NDJSON listing.
+
+    Returns:
+        bool: True for ``?stream=1`` or when ``application/x-ndjson`` is preferred
+        over ``application/json`` in the Accept header.
+    """
+    if request.args.get('stream', '').lower() in TRUE_VALUES:
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def ndjson_response(query, serialize, batch_size=None):
+    """
+    Stream the rows of a query as newline-delimited JSON.
+
+    Rows are fetched ``batch_size`` at a time with ``yield_per`` and each batch is sent
+    as one chunk, so neither the ORM objects nor the encoded body of the whole listing
+    are held in memory at once.
+
+    Args:
+        query (Query): Query selecting the rows to stream, in the order they are sent.
+        serialize (callable): Turns one row into a JSON-serializable dict.
+        batch_size (int): Rows per fetch and per chunk. Defaults to STREAM_BATCH_SIZE.
+
+    Returns:
+        Response: A chunked ``application/x-ndjson`` response.
+    """
+    batch_size = batch_size or current_app.config['STREAM_BATCH_SIZE']
+    dumps = current_app.json.dumps
+
+    def generate():
+        lines = []
+        for row in query.yield_per(batch_size):
+            lines.append(dumps(serialize(row)))
+            if len(lines) == batch_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,110 @@
+# tests/test_asgi.py
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+
+from asgi import AsyncApp
+from shared_cache import shared_cache
+from versions import versions
+
+
+def call(app, requests):
+    """Send GET requests to a fresh AsyncApp on one event loop; return (status, headers, body) each."""
+    async def run():
+        application = AsyncApp(app)
+        responses = []
+        try:
+            for path, headers in requests:
+                path, _, query = path.partition('?')
+                scope = {
+                    'type': 'http', 'method': 'GET', 'path': path, 'raw_path': path.encode(),
+                    'query_string': query.encode(), 'root_path': '', 'scheme': 'http',
+                    'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+                    'http_version': '1.1', 'asgi': {'version': '3.0'},
+                    'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+                }
+                messages = []
+
+                async def receive():
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+                async def send(message):
+                    messages.append(message)
+
+                await application(scope, receive, send)
+                start = messages[0]
+                body = b''.join(m.get('body', b'') for m in messages[1:])
+                responses.append((start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body))
+        finally:
+            await application.dispose()
+        return responses
+    return asyncio.run(run())
+
+
+def test_async_goods_match_flask(app, client, add_goods):
+    """Test that the async goods routes answer like the Flask routes."""
+    goods_id = add_goods('Lamp', 'electronics', description='Lamp description.', count_in_stock=5)
+    add_goods('Charger', 'electronics', description='Charger description.', count_in_stock=5)
+
+    paths = ['/goods', f'/goods/{goods_id}', '/goods?category=electronics&in_stock=true', '/goods?limit=1', f'/goods/{goods_id}/reviews']
+    responses = call(app, [(path, {}) for path in paths] + [('/goods/999', {}), ('/goods?limit=0', {})])
+    for path, (status, headers, body) in zip(paths, responses):
+        expected = client.get(path)
+        assert status == 200
+        assert json.loads(body) == expected.get_json()
+        assert headers['etag'] == expected.headers['ETag']
+
+    assert responses[-2][0] == 404
+    assert json.loads(responses[-2][2]) == {'error': 'Goods not found.'}
+    assert responses[-1][0] == 400
+
+
+def test_async_goods_not_modified(app, client, add_goods):
+    """Test that the async routes answer a matching If-None-Match with 304."""
+    goods_id = add_goods('Desk', 'electronics', description='Desk description.', count_in_stock=5)
+    etag = client.get(f'/goods/{goods_id}').headers['ETag']
+
+    (status, headers, body), = call(app, [(f'/goods/{goods_id}', {'If-None-Match': etag})])
+    assert status == 304
+    assert body == b''
+    assert headers['etag'] == etag
+
+
+def test_async_recommendations_and_fallback_to_flask(app, client, admin_token, add_goods):
+    """Test the async recommendations route, and that other requests reach Flask."""
+    add_goods('Mug', 'electronics', description='Mug description.', count_in_stock=5)
+
+    responses = call(app, [
+        ('/customers/admin/recommendations', {'Authorization': f'Bearer {admin_token}'}),
+        ('/customers/someone/recommendations', {'Authorization': f'Bearer {admin_token}'}),
+        ('/customers/admin/recommendations', {}),
+        ('/customers/admin', {'Authorization': f'Bearer {admin_token}'}),
+    ])
+    expected = client.get('/customers/admin/recommendations', headers={'Authorization': f'Bearer {admin_token}'})
+    assert responses[0][0] == 200
+    assert json.loads(responses[0][2]) == expected.get_json()
+    assert responses[1][0] == 403
+    assert responses[2][0] == 401
+    assert responses[3][0] == 200
+    assert json.loads(responses[3][2])['username'] == 'admin'
+
+
+def test_async_recommendations_share_the_flask_cache_entry(app, client, admin_token, add_goods):
+    """Test that the async recommendations route serves the entry cached by the Flask route."""
+    add_goods('Mug', 'electronics', description='Mug description.', count_in_stock=5)
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    assert client.get('/customers/admin/recommendations', headers=headers).status_code == 200
+    with app.app_context():
+        key = f'recommendations:1:{versions.etag("catalog")}'
+    # A planted entry proves the async route reads the same key instead of recomputing
+    assert shared_cache.backend.get(key) is not None
+    shared_cache.backend.set(key, json.dumps({'value': ['planted'], 'expires_at': time.time() + 60, 'delta': 0.0}).encode(), 60)
+
+    (status, _, body), = call(app, [('/customers/admin/recommendations', headers)])
+    assert status == 200
+    assert json.loads(body) == ['planted']
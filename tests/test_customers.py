@@ -61,3 +61,41 @@ def test_login_failure(client):
     assert response.status_code == 401
     data = response.get_json()
     assert data['error'] == 'Invalid username or password.'
+
+def test_concurrent_wallet_changes_are_not_lost(app, client, admin_token, regular_user_token):
+    """Test that concurrent charges and deductions all land and never overdraw the wallet."""
+    from concurrent.futures import ThreadPoolExecutor
+    from models import Customer
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    client.post('/customers/testuser/wallet/charge', json={'amount': 100.0}, headers=headers)
+
+    def change_wallet(index):
+        thread_client = app.test_client()
+        action = 'charge' if index % 2 else 'deduct'
+        return thread_client.post(f'/customers/testuser/wallet/{action}', json={
+            'amount': 10.0
+        }, headers=headers).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(change_wallet, range(40)))
+
+    assert statuses.count(200) == 40
+    with app.app_context():
+        assert Customer.query.filter_by(username='testuser').first().wallet_balance == 100.0
+
+    response = client.post('/customers/testuser/wallet/deduct', json={'amount': 500.0}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Insufficient wallet balance.'
+    response = client.post('/customers/nobody/wallet/charge', json={'amount': 5.0}, headers=headers)
+    assert response.status_code == 404
+
+def test_get_all_customers_streamed(client, admin_token, regular_user_token):
+    """Test streaming the customer list as NDJSON."""
+    import json
+    headers = {'Authorization': f'Bearer {admin_token}', 'Accept': 'application/x-ndjson'}
+    response = client.get('/customers', headers=headers)
+    assert response.mimetype == 'application/x-ndjson'
+    streamed = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [customer['username'] for customer in streamed] == ['admin', 'testuser']
+    assert all('password' not in customer for customer in streamed)
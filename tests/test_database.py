@@ -0,0 +1,28 @@
+# tests/test_database.py
+
+from sqlalchemy import create_engine, text
+
+from config import DATABASE_PROFILES
+from database import set_sqlite_pragmas
+
+
+def test_production_profile_pragmas(tmp_path):
+    """Test the production profile switches new SQLite connections to WAL."""
+    profile = DATABASE_PROFILES['production']
+    engine = create_engine(f'sqlite:///{tmp_path / "profile.db"}', **profile['engine_options'])
+    set_sqlite_pragmas(engine, profile['sqlite_pragmas'])
+    with engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+    assert engine.pool.size() == profile['engine_options']['pool_size']
+    engine.dispose()
+
+
+def test_default_profile_leaves_sqlite_untouched(tmp_path):
+    """Test the default profile keeps SQLite's rollback journal."""
+    engine = create_engine(f'sqlite:///{tmp_path / "default.db"}')
+    set_sqlite_pragmas(engine, DATABASE_PROFILES['default']['sqlite_pragmas'])
+    with engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'delete'
+    engine.dispose()
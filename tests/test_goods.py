@@ -92,3 +92,92 @@ def test_delete_goods(client, admin_token):
     assert get_response.status_code == 404
     data = get_response.get_json()
     assert data['error'] == 'Goods not found.'
+
+def _add_catalog(add_goods):
+    items = [
+        ('Apple', 'food', 1.5, 100),
+        ('Shirt', 'clothes', 25.0, 0),
+        ('Phone', 'electronics', 700.0, 3),
+        ('Bread', 'food', 3.0, 0),
+        ('Cheese', 'food', 12.0, 8),
+    ]
+    return [add_goods(name, category, price, stock) for name, category, price, stock in items]
+
+def test_get_goods_cursor_pagination(client, add_goods):
+    """Test walking the catalog page by page with after_id/limit."""
+    ids = _add_catalog(add_goods)
+
+    first = client.get('/goods?limit=2').get_json()
+    assert [item['id'] for item in first['items']] == ids[:2]
+    assert first['next_after_id'] == ids[1]
+
+    second = client.get(f'/goods?limit=2&after_id={first["next_after_id"]}').get_json()
+    assert [item['id'] for item in second['items']] == ids[2:4]
+
+    last = client.get(f'/goods?limit=2&after_id={second["next_after_id"]}').get_json()
+    assert [item['id'] for item in last['items']] == ids[4:]
+    assert last['next_after_id'] is None
+
+def test_get_goods_filters(client, add_goods):
+    """Test category, price-range and in-stock filters."""
+    _add_catalog(add_goods)
+
+    response = client.get('/goods?category=food&min_price=2&in_stock=true')
+    assert response.status_code == 200
+    assert [item['name'] for item in response.get_json()] == ['Cheese']
+
+    page = client.get('/goods?category=food&max_price=5&limit=10').get_json()
+    assert [item['name'] for item in page['items']] == ['Apple', 'Bread']
+    assert page['next_after_id'] is None
+
+def test_get_goods_invalid_pagination(client):
+    """Test that malformed pagination parameters are rejected."""
+    response = client.get('/goods?limit=abc')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid value for limit.'
+
+def test_get_goods_streamed_as_ndjson(app, client, monkeypatch, add_goods):
+    """Test streaming the catalog as NDJSON in small batches, with filters applied."""
+    import json
+    _add_catalog(add_goods)
+    monkeypatch.setitem(app.config, 'STREAM_BATCH_SIZE', 2)
+
+    response = client.get('/goods?category=food', headers={'Accept': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    streamed = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert streamed == client.get('/goods?category=food').get_json()
+
+    response = client.get('/goods?stream=1')
+    assert len(response.get_data(as_text=True).splitlines()) == 5
+
+def test_goods_etag_revalidation(client, admin_token, regular_user_token, query_counter, add_goods):
+    """Test unchanged goods answer If-None-Match with 304 and writes change the ETag."""
+    ids = _add_catalog(add_goods)
+    goods_url = f'/goods/{ids[0]}'
+
+    first = client.get(goods_url)
+    etag = first.headers['ETag']
+    catalog_etag = client.get('/goods').headers['ETag']
+
+    query_counter.count = 0
+    response = client.get(goods_url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert query_counter.count == 0
+    assert client.get('/goods', headers={'If-None-Match': catalog_etag}).status_code == 304
+
+    client.put(goods_url, json={'price_per_item': 2.0}, headers={'Authorization': f'Bearer {admin_token}'})
+    response = client.get(goods_url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['price_per_item'] == 2.0
+    assert client.get('/goods', headers={'If-None-Match': catalog_etag}).status_code == 200
+
+    etag = response.headers['ETag']
+    client.post('/customers/testuser/wallet/charge', json={'amount': 100.0},
+                headers={'Authorization': f'Bearer {admin_token}'})
+    client.post('/sales', json={'goods_id': ids[0], 'quantity': 1},
+                headers={'Authorization': f'Bearer {regular_user_token}'})
+    response = client.get(goods_url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['count_in_stock'] == 99
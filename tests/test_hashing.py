@@ -0,0 +1,105 @@
+# tests/test_hashing.py
+import threading
+import time
+
+import pytest
+
+from hashing import HashingBusyError, PasswordHasher, normalize_method, password_hasher
+from models import db, Customer
+
+
+def test_normalize_method_fills_in_defaults():
+    """Test that hash methods are spelled out the way werkzeug records them."""
+    assert normalize_method('scrypt') == 'scrypt:32768:8:1'
+    assert normalize_method('pbkdf2:sha512:1000') == 'pbkdf2:sha512:1000'
+    assert normalize_method('pbkdf2').startswith('pbkdf2:sha256:')
+    with pytest.raises(ValueError):
+        normalize_method('md5')
+
+
+def test_process_pool_hashes_and_verifies():
+    """Test hashing in worker processes, and that rehashing is needed after a method change."""
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1)
+    try:
+        pwhash = hasher.hash('Secret123!')
+        assert pwhash.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(pwhash, 'Secret123!')
+        assert not hasher.verify(pwhash, 'wrong')
+        assert not hasher.needs_rehash(pwhash)
+
+        hasher.method = normalize_method('pbkdf2:sha256:2000')
+        assert hasher.needs_rehash(pwhash)
+    finally:
+        hasher.shutdown()
+
+
+def test_full_queue_fails_fast():
+    """Test that hashing is refused once max_pending hashes are in flight."""
+    hasher = PasswordHasher('pbkdf2:sha256:1000', max_pending=1)
+    hasher._slots.acquire()
+    with pytest.raises(HashingBusyError):
+        hasher.hash('Secret123!')
+    hasher._slots.release()
+    assert hasher.hash('Secret123!')
+
+
+def test_login_rehashes_outdated_password(client, app, monkeypatch):
+    """Test that a login with a hash made with old parameters stores a new hash."""
+    monkeypatch.setattr(password_hasher, 'method', normalize_method('pbkdf2:sha256:1000'))
+
+    response = client.post('/customers/login', json={'username': 'admin', 'password': 'AdminPass123!'})
+    assert response.status_code == 200
+    with app.app_context():
+        pwhash = db.session.query(Customer.password).filter_by(username='admin').scalar()
+    assert pwhash.startswith('pbkdf2:sha256:1000$')
+
+    response = client.post('/customers/login', json={'username': 'admin', 'password': 'AdminPass123!'})
+    assert response.status_code == 200
+
+
+def test_login_returns_503_when_hashing_is_saturated(client, monkeypatch):
+    """Test that logins are rejected with 503 while the hashing queue is full."""
+    monkeypatch.setattr(password_hasher, '_slots', threading.BoundedSemaphore(1))
+    password_hasher._slots.acquire()
+
+    response = client.post('/customers/login', json={'username': 'admin', 'password': 'AdminPass123!'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()['error'] == 'Too many password hashes in progress.'
+
+
+def test_login_skips_rehash_when_hashing_is_saturated(client, app, monkeypatch):
+    """Test that a busy hashing pool only postpones the rehash of a correct password."""
+    monkeypatch.setattr(password_hasher, 'method', normalize_method('pbkdf2:sha256:1000'))
+
+    def busy_hash(password):
+        raise HashingBusyError('Too many password hashes in progress.')
+
+    monkeypatch.setattr(password_hasher, 'hash', busy_hash)
+    with app.app_context():
+        old_hash = db.session.query(Customer.password).filter_by(username='admin').scalar()
+
+    response = client.post('/customers/login', json={'username': 'admin', 'password': 'AdminPass123!'})
+    assert response.status_code == 200
+    assert 'access_token' in response.get_json()
+    with app.app_context():
+        assert db.session.query(Customer.password).filter_by(username='admin').scalar() == old_hash
+
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes():
+    """Test that a hash still running after a timeout counts against max_pending."""
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1, max_pending=1, timeout=60)
+    try:
+        # Start the worker process first, so the sleep below is running when it times out
+        hasher.hash('warm-up')
+        hasher.timeout = 0.1
+        with pytest.raises(HashingBusyError, match='timed out'):
+            hasher._run(time.sleep, 1)
+        with pytest.raises(HashingBusyError, match='Too many'):
+            hasher.hash('Secret123!')
+
+        time.sleep(1.5)
+        hasher.timeout = 60
+        assert hasher.hash('Secret123!')
+    finally:
+        hasher.shutdown()
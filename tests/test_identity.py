@@ -0,0 +1,94 @@
+# tests/test_identity.py
+
+import threading
+import time
+
+from flask_jwt_extended import decode_token
+from identity import _MISSING, Identity, IdentityCache
+from models import db, Customer
+from shared_cache import LocalBackend, SharedCache
+
+def test_login_embeds_identity_claims(app, client, admin_token):
+    """Test that the access token carries the customer id and admin flag."""
+    with app.app_context():
+        claims = decode_token(admin_token)
+        admin = Customer.query.filter_by(username='admin').first()
+        assert claims['customer_id'] == admin.id
+        assert claims['is_admin'] is True
+
+def test_admin_route_skips_customer_lookup(client, admin_token, query_counter):
+    """Test that an admin-only route authorizes from the token alone."""
+    query_counter.statements.clear()
+    response = client.post('/goods', json={
+        'name': 'Monitor',
+        'category': 'electronics',
+        'price_per_item': 149.99,
+        'count_in_stock': 5
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 201
+    assert not any('FROM customers' in statement for statement in query_counter.statements)
+
+def test_revoked_admin_token_rejected(app, client, admin_token):
+    """Test that removing admin rights invalidates claims in existing tokens."""
+    with app.app_context():
+        admin = Customer.query.filter_by(username='admin').first()
+        admin.is_admin = False
+        db.session.commit()
+
+    response = client.post('/goods', json={
+        'name': 'Keyboard',
+        'category': 'electronics',
+        'price_per_item': 49.99,
+        'count_in_stock': 5
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 403
+
+def test_login_before_demotion_commits_is_not_trusted(app, client, monkeypatch):
+    """Test that a token issued between a demotion and its commit loses its admin claim."""
+    with app.app_context():
+        admin = Customer.query.filter_by(username='admin').first()
+        # Invalidating when the attribute is set, rather than at commit, would record
+        # a time before the login below and leave its token trusted
+        with monkeypatch.context() as m:
+            m.setattr(time, 'time', lambda: 0.0)
+            admin.is_admin = False
+        # Logging in from another thread gives the request its own session, which
+        # still reads the committed row
+        responses = []
+        login = threading.Thread(target=lambda: responses.append(client.post('/customers/login', json={
+            'username': 'admin',
+            'password': 'AdminPass123!'
+        })))
+        login.start()
+        login.join()
+        assert responses[0].status_code == 200
+        assert decode_token(responses[0].get_json()['access_token'])['is_admin'] is True
+        token = responses[0].get_json()['access_token']
+        db.session.commit()
+
+    response = client.post('/goods', json={
+        'name': 'Keyboard',
+        'category': 'electronics',
+        'price_per_item': 49.99,
+        'count_in_stock': 5
+    }, headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 403
+
+def test_deleted_customer_token_rejected(client, regular_user_token):
+    """Test that a deleted customer's token no longer resolves to an identity."""
+    headers = {'Authorization': f'Bearer {regular_user_token}'}
+    assert client.delete('/customers/testuser', headers=headers).status_code == 200
+
+    response = client.get('/customers/testuser/wishlist', headers=headers)
+    assert response.status_code == 404
+    assert response.get_json()['error'] == 'Customer not found.'
+
+def test_invalidation_is_shared_between_processes():
+    """Test that an invalidation recorded by one worker's cache is seen by another's."""
+    cache = SharedCache(LocalBackend())
+    worker_a, worker_b = IdentityCache(cache), IdentityCache(cache)
+    worker_b.set('admin', Identity(1, 'admin', True), loaded_at=time.time() - 1)
+
+    worker_a.invalidate('admin')
+    assert worker_b.is_stale('admin', int(time.time()) - 1)
+    assert worker_b.get('admin', worker_b.invalidated_at('admin')) is _MISSING
@@ -0,0 +1,69 @@
+# tests/test_importer.py
+from models import Goods
+
+CSV = (
+    'name,category,price_per_item,description,count_in_stock\n'
+    'Lamp,electronics,20.5,Desk lamp,4\n'
+    'Mouse,toys,10,,3\n'
+    'Cable,accessories,2,,100\n'
+)
+
+
+def test_csv_import_reports_invalid_rows(app, client, admin_token, monkeypatch):
+    """Test importing goods from CSV in several batches, skipping invalid rows."""
+    monkeypatch.setitem(app.config, 'GOODS_IMPORT_BATCH_SIZE', 1)
+    response = client.post('/goods/import', data=CSV, content_type='text/csv',
+                           headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data['imported'], data['failed']) == (2, 1)
+    assert data['errors'][0]['line'] == 3
+    assert 'category' in data['errors'][0]['errors']
+
+    with app.app_context():
+        goods = {g.name: g for g in Goods.query.all()}
+        assert set(goods) == {'Lamp', 'Cable'}
+        assert goods['Lamp'].price_per_item == 20.5
+        assert goods['Cable'].description == ''
+
+
+def test_ndjson_import_upserts_by_id(app, client, admin_token):
+    """Test that NDJSON rows with an id update existing goods and create missing ones."""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    goods_id = client.post('/goods', json={
+        'name': 'Chair',
+        'category': 'electronics',
+        'price_per_item': 50,
+        'count_in_stock': 1
+    }, headers=headers).get_json()['goods_id']
+    etag = client.get(f'/goods/{goods_id}').headers['ETag']
+
+    body = (
+        f'{{"id": {goods_id}, "name": "Chair", "category": "electronics", "price_per_item": 45, "count_in_stock": 9}}\n'
+        '{"id": 500, "name": "Desk", "category": "electronics", "price_per_item": 120, "count_in_stock": 2}\n'
+        'not json\n'
+        '{"id": "x", "name": "Bad", "category": "electronics", "price_per_item": 1, "count_in_stock": 1}\n'
+    )
+    response = client.post('/goods/import?format=ndjson', data=body, headers=headers)
+    data = response.get_json()
+    assert (data['imported'], data['failed']) == (2, 2)
+    assert [error['line'] for error in data['errors']] == [3, 4]
+
+    response = client.get(f'/goods/{goods_id}')
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['count_in_stock'] == 9
+    assert client.get('/goods/500').get_json()['name'] == 'Desk'
+
+    with app.app_context():
+        assert Goods.query.count() == 2
+
+
+def test_import_requires_admin_and_known_format(client, admin_token, regular_user_token):
+    """Test that imports are admin-only and need a CSV or NDJSON body."""
+    response = client.post('/goods/import', data=CSV, content_type='text/csv',
+                           headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 403
+
+    response = client.post('/goods/import', data=CSV, content_type='text/plain',
+                           headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 400
@@ -0,0 +1,110 @@
+# tests/test_profiler.py
+
+import threading
+import time
+from profiler import SamplingProfiler
+
+def test_sample_aggregates_collapsed_stacks():
+    """Test that samples of a profiled thread are aggregated per endpoint."""
+    profiler = SamplingProfiler()
+    profiler.start(threading.get_ident(), 'busy_endpoint')
+    profiler.sample()
+    profiler.sample()
+    profiler.stop(threading.get_ident())
+    profiler.sample()
+
+    lines = profiler.collapsed().splitlines()
+    assert len(lines) == 1
+    stack, count = lines[0].rsplit(' ', 1)
+    assert stack.startswith('busy_endpoint;')
+    assert 'test_profiler.py:test_sample_aggregates_collapsed_stacks' in stack
+    assert count == '2'
+
+def test_profile_header_samples_request(client, admin_token):
+    """Test that a request carrying the profiling header shows up in the admin export."""
+    client.post('/customers/register', json={
+        'full_name': 'Profiled User',
+        'username': 'profiled',
+        'password': 'Password123!',
+        'age': 40,
+        'address': 'Somewhere'
+    }, headers={'X-Profile': '1', 'Authorization': f'Bearer {admin_token}'})
+
+    response = client.get('/admin/profiler?endpoint=api.register_customer',
+                          headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert all(line.startswith('api.register_customer;') for line in response.get_data(as_text=True).splitlines())
+    assert 'app.py:register_customer' in response.get_data(as_text=True)
+
+def test_profile_header_requires_admin_or_secret(app, admin_token, regular_user_token):
+    """Test that the profiling header is only honoured for admins or with the secret."""
+    profiler = SamplingProfiler(secret='s3cret')
+
+    def profiled(path, headers):
+        with app.test_request_context(path, headers=headers):
+            profiler._before_request()
+            endpoint = profiler._active.get(threading.get_ident())
+            profiler._teardown_request(None)
+        return endpoint
+
+    assert profiled('/goods', {'X-Profile': '1'}) is None
+    assert profiled('/goods', {'X-Profile': '1', 'Authorization': f'Bearer {regular_user_token}'}) is None
+    assert profiled('/goods', {'X-Profile': '1', 'Authorization': 'Bearer not-a-token'}) is None
+    assert profiled('/goods', {'X-Profile': '1', 'Authorization': f'Bearer {admin_token}'}) == 'api.get_all_goods'
+    assert profiled('/goods', {'X-Profile': 's3cret'}) == 'api.get_all_goods'
+    assert profiled('/no/such/path', {'X-Profile': 's3cret'}) == '[unmatched]'
+
+def test_profiler_export_requires_admin(client, regular_user_token):
+    """Test that only admins can read profiler samples."""
+    response = client.get('/admin/profiler', headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 403
+
+def test_buffered_storage_writes_batches(tmp_path):
+    """Test that queued measurements are written to the profiler database."""
+    from profiler_storage import BufferedSqliteStorage
+
+    storage = BufferedSqliteStorage({'FILE': str(tmp_path / 'profiler.sql'), 'AUTOSTART': False})
+    for i in range(5):
+        storage.insert({'startedAt': 1000.0 + i, 'endedAt': 1000.5 + i, 'elapsed': 0.5,
+                        'method': 'GET', 'name': '/goods'})
+    assert storage.stats() == {'queued': 5, 'written': 0, 'dropped': 0}
+
+    storage.flush()
+    assert storage.stats() == {'queued': 0, 'written': 5, 'dropped': 0}
+    assert len(storage.filter({'startedAt': 0, 'endedAt': 2000})) == 5
+
+def test_buffered_storage_drops_when_full(tmp_path):
+    """Test that a full queue drops measurements instead of blocking the request."""
+    from profiler_storage import BufferedSqliteStorage
+
+    storage = BufferedSqliteStorage({'FILE': str(tmp_path / 'profiler.sql'), 'AUTOSTART': False, 'QUEUE_SIZE': 2})
+    for i in range(4):
+        storage.insert({'startedAt': 1000.0, 'endedAt': 1000.5, 'elapsed': 0.5, 'method': 'GET', 'name': '/'})
+    assert storage.stats() == {'queued': 2, 'written': 0, 'dropped': 2}
+
+def test_buffered_storage_survives_write_errors(tmp_path):
+    """Test that a failed batch is counted as dropped and later batches are still written."""
+    import sqlite3
+    from profiler_storage import BufferedSqliteStorage
+
+    storage = BufferedSqliteStorage({'FILE': str(tmp_path / 'profiler.sql'), 'FLUSH_INTERVAL': 0.01})
+    cursor = storage.cursor
+
+    class LockedCursor:
+        def executemany(self, *args):
+            raise sqlite3.OperationalError('database is locked')
+
+    storage.cursor = LockedCursor()
+    measurement = {'startedAt': 1000.0, 'endedAt': 1000.5, 'elapsed': 0.5, 'method': 'GET', 'name': '/'}
+    storage.insert(measurement)
+    deadline = time.monotonic() + 5
+    while storage.stats()['dropped'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert storage.stats()['dropped'] == 1
+
+    storage.cursor = cursor
+    storage.insert(measurement)
+    while storage.stats()['written'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert storage.stats() == {'queued': 0, 'written': 1, 'dropped': 1}
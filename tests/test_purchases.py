@@ -75,3 +75,124 @@ def test_make_purchase_insufficient_stock(client, admin_token, regular_user_toke
     assert purchase_response.status_code == 400
     data = purchase_response.get_json()
     assert data['error'] == 'Not enough items in stock.'
+
+def test_purchase_history_constant_queries(client, admin_token, regular_user_token, query_counter):
+    """Test that purchase history runs the same number of queries regardless of its length."""
+    goods_ids = []
+    for name in ('Pen', 'Notebook', 'Stapler', 'Ruler'):
+        response = client.post('/goods', json={
+            'name': name,
+            'category': 'accessories',
+            'price_per_item': 2.0,
+            'count_in_stock': 10
+        }, headers={'Authorization': f'Bearer {admin_token}'})
+        goods_ids.append(response.get_json()['goods_id'])
+    client.post('/customers/testuser/wallet/charge', json={
+        'amount': 100.0
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+    headers = {'Authorization': f'Bearer {regular_user_token}'}
+
+    client.post('/sales', json={'goods_id': goods_ids[0], 'quantity': 1}, headers=headers)
+    query_counter.count = 0
+    response = client.get('/customers/testuser/purchases', headers=headers)
+    assert len(response.get_json()) == 1
+    single_purchase_queries = query_counter.count
+
+    for goods_id in goods_ids[1:]:
+        client.post('/sales', json={'goods_id': goods_id, 'quantity': 1}, headers=headers)
+    query_counter.count = 0
+    response = client.get('/customers/testuser/purchases', headers=headers)
+    data = response.get_json()
+    assert len(data) == 4
+    assert {purchase['goods']['name'] for purchase in data} == {'Pen', 'Notebook', 'Stapler', 'Ruler'}
+    assert query_counter.count == single_purchase_queries
+
+def test_concurrent_purchases_do_not_oversell(app, client, admin_token, regular_user_token):
+    """Test that many threads buying the same item never oversell it or lose wallet updates."""
+    from concurrent.futures import ThreadPoolExecutor
+    from models import Customer, Goods, Purchase
+
+    add_response = client.post('/goods', json={
+        'name': 'Concert Ticket',
+        'category': 'accessories',
+        'price_per_item': 10.0,
+        'count_in_stock': 20
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+    goods_id = add_response.get_json()['goods_id']
+    client.post('/customers/testuser/wallet/charge', json={
+        'amount': 1000.0
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+    headers = {'Authorization': f'Bearer {regular_user_token}'}
+
+    def buy_repeatedly(_):
+        thread_client = app.test_client()
+        return [
+            thread_client.post('/sales', json={'goods_id': goods_id, 'quantity': 1}, headers=headers).status_code
+            for _ in range(6)
+        ]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = [status for result in pool.map(buy_repeatedly, range(8)) for status in result]
+
+    assert statuses.count(201) == 20
+    assert statuses.count(400) == len(statuses) - 20
+    with app.app_context():
+        assert Goods.query.get(goods_id).count_in_stock == 0
+        assert Purchase.query.filter_by(goods_id=goods_id).count() == 20
+        assert Customer.query.filter_by(username='testuser').first().wallet_balance == 800.0
+
+def test_cart_checkout_success(app, client, admin_token, regular_user_token, add_goods):
+    """Test buying several goods in one cart checkout."""
+    from models import Goods, Purchase
+
+    coffee_id = add_goods('Coffee', price_per_item=8.0, count_in_stock=10)
+    tea_id = add_goods('Tea', price_per_item=4.0, count_in_stock=10)
+    client.post('/customers/testuser/wallet/charge', json={
+        'amount': 50.0
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+
+    response = client.post('/sales/cart', json={'items': [
+        {'goods_id': coffee_id, 'quantity': 2},
+        {'goods_id': tea_id},
+        {'goods_id': coffee_id, 'quantity': 1}
+    ]}, headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['message'] == 'Checkout successful.'
+    assert len(data['purchase_ids']) == 2
+    assert data['total_price'] == 28.0
+    assert data['wallet_balance'] == 22.0
+
+    with app.app_context():
+        assert Goods.query.get(coffee_id).count_in_stock == 7
+        assert Goods.query.get(tea_id).count_in_stock == 9
+        quantities = {p.goods_id: p.quantity for p in Purchase.query.all()}
+        assert quantities == {coffee_id: 3, tea_id: 1}
+
+def test_cart_checkout_is_all_or_nothing(app, client, admin_token, regular_user_token, add_goods):
+    """Test that a cart with one unavailable line changes nothing."""
+    from models import Goods, Purchase
+
+    coffee_id = add_goods('Coffee', price_per_item=8.0, count_in_stock=10)
+    rare_id = add_goods('Saffron', price_per_item=5.0, count_in_stock=1)
+    client.post('/customers/testuser/wallet/charge', json={
+        'amount': 100.0
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+
+    response = client.post('/sales/cart', json={'items': [
+        {'goods_id': coffee_id, 'quantity': 2},
+        {'goods_id': rare_id, 'quantity': 2}
+    ]}, headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Not enough items in stock.', 'goods_id': rare_id}
+
+    with app.app_context():
+        assert Goods.query.get(coffee_id).count_in_stock == 10
+        assert Purchase.query.count() == 0
+
+def test_cart_checkout_requires_items(client, regular_user_token):
+    """Test that an empty cart is rejected."""
+    response = client.post('/sales/cart', json={'items': []},
+                           headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 400
+    assert 'items' in response.get_json()
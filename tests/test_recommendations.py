@@ -0,0 +1,138 @@
+# tests/test_recommendations.py
+
+import threading
+import time
+
+from models import db, Customer, Goods, Purchase
+from recommendations import co_purchase_index, get_recommendations_for_customer, top_sellers
+from wallet import credit
+
+def _seed(baskets):
+    """Create goods A-D and one customer per basket with the given purchases."""
+    goods = {}
+    for name in 'ABCD':
+        goods[name] = Goods(name=name, category='food', price_per_item=1.0, count_in_stock=100)
+        db.session.add(goods[name])
+    customers = []
+    for i, basket in enumerate(baskets):
+        customer = Customer(full_name=f'Customer {i}', username=f'customer{i}', password='x',
+                            age=30, address='Somewhere')
+        db.session.add(customer)
+        db.session.flush()
+        for name in basket:
+            db.session.add(Purchase(customer_id=customer.id, goods_id=goods[name].id,
+                                    quantity=1, total_price=1.0))
+        customers.append(customer)
+    db.session.commit()
+    return goods, customers
+
+def test_recommend_ranks_by_co_purchases(app):
+    """Test that goods bought together most often with the customer's goods rank first."""
+    with app.app_context():
+        goods, customers = _seed([['A'], ['A', 'B'], ['A', 'B'], ['A', 'C'], ['D']])
+        recommended = get_recommendations_for_customer(customers[0].id, limit=5)
+        assert [g.name for g in recommended] == ['B', 'C']
+
+def test_recommend_falls_back_to_top_sellers(app):
+    """Test that a customer without purchases gets the top-selling goods."""
+    with app.app_context():
+        goods, customers = _seed([[], ['A', 'B'], ['B']])
+        recommended = get_recommendations_for_customer(customers[0].id, limit=2)
+        assert [g.name for g in recommended] == ['B', 'A']
+
+def test_recommend_includes_purchases_since_build(app, client, regular_user_token):
+    """Test that a sale updates the index without waiting for a rebuild."""
+    with app.app_context():
+        goods, customers = _seed([['A', 'C']])
+        user = Customer.query.filter_by(username='testuser').first()
+        credit(user.id, 1000)
+        db.session.commit()
+        co_purchase_index.build()
+        user_id, a_id, c_id = user.id, goods['A'].id, goods['C'].id
+
+    headers = {'Authorization': f'Bearer {regular_user_token}'}
+    assert client.post('/sales', json={'goods_id': a_id}, headers=headers).status_code == 201
+    assert co_purchase_index.recommend(user_id) == [c_id]
+
+    response = client.get('/customers/testuser/recommendations', headers=headers)
+    assert [g['id'] for g in response.get_json()] == [c_id]
+
+def test_top_sellers_updated_on_sale(app, client, admin_token, regular_user_token):
+    """Test that sales move goods up the top-seller ranking without reloading it."""
+    from recommendations import top_sellers
+
+    with app.app_context():
+        goods, customers = _seed([['A'], ['A'], ['B']])
+        assert top_sellers.top(2) == [goods['A'].id, goods['B'].id]
+        b_id = goods['B'].id
+
+    client.post('/customers/testuser/wallet/charge', json={'amount': 10.0},
+                headers={'Authorization': f'Bearer {admin_token}'})
+    headers = {'Authorization': f'Bearer {regular_user_token}'}
+    client.post('/sales/cart', json={'items': [{'goods_id': b_id}]}, headers=headers)
+    client.post('/sales', json={'goods_id': b_id}, headers=headers)
+    assert top_sellers.top(1) == [b_id]
+
+def test_top_sellers_window_drops_old_days(app):
+    """Test that sales older than the window stop counting as days pass."""
+    from datetime import date, timedelta
+    from recommendations import TopSellers
+
+    today = [date(2024, 12, 1)]
+    ranking = TopSellers(window_days=2, clock=lambda: today[0])
+    with app.app_context():
+        ranking.load()
+    for _ in range(3):
+        ranking.record(1)
+    today[0] += timedelta(days=1)
+    ranking.record(2)
+    assert ranking.top(2) == [1, 2]
+
+    today[0] += timedelta(days=1)
+    assert ranking.top(2) == [2]
+
+def test_stale_index_is_rebuilt_once(app, monkeypatch):
+    """Test that concurrent lookups of a due index trigger a single rebuild."""
+    with app.app_context():
+        goods, customers = _seed([['A', 'B'], ['A', 'C']])
+        co_purchase_index.build()
+        customer_id, expected = customers[0].id, [goods['C'].id]
+    builds = []
+
+    def slow_build():
+        builds.append(1)
+        time.sleep(0.2)
+        co_purchase_index._built_at = time.monotonic()
+
+    monkeypatch.setattr(co_purchase_index, 'build', slow_build)
+    co_purchase_index._built_at -= co_purchase_index.max_age + 1
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(co_purchase_index.recommend(customer_id)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert len(results) == 8
+    assert all(result == expected for result in results)
+
+def test_stale_top_sellers_are_reloaded_once(app, monkeypatch):
+    """Test that concurrent reads of due top sellers trigger a single reload."""
+    with app.app_context():
+        top_sellers.load()
+    loads = []
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.2)
+        top_sellers._loaded_at = time.monotonic()
+
+    monkeypatch.setattr(top_sellers, 'load', slow_load)
+    top_sellers._loaded_at -= top_sellers.max_age + 1
+    threads = [threading.Thread(target=top_sellers.top) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
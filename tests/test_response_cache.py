@@ -0,0 +1,87 @@
+# tests/test_response_cache.py
+
+import time
+
+from flask import g
+
+from response_cache import ResponseCache, response_cache
+from routing import replica_router
+from shared_cache import shared_cache
+
+
+def test_cached_goods_skip_database(client, admin_token, query_counter, add_goods):
+    """Test repeated reads are served from the cache and writes invalidate them."""
+    goods_id = add_goods('Honey')
+    first = client.get(f'/goods/{goods_id}')
+    assert first.status_code == 200
+
+    query_counter.count = 0
+    second = client.get(f'/goods/{goods_id}')
+    assert second.get_json() == first.get_json()
+    assert query_counter.count == 0
+    assert response_cache.stats()['hits'] == 1
+
+    client.put(f'/goods/{goods_id}', json={'name': 'Raw Honey'}, headers={'Authorization': f'Bearer {admin_token}'})
+    assert response_cache.stats()['invalidations'] >= 1
+    assert client.get(f'/goods/{goods_id}').get_json()['name'] == 'Raw Honey'
+
+
+def test_catalog_cache_keyed_on_query_args(client, add_goods):
+    """Test listings with different filters are cached separately and a new goods clears them."""
+    add_goods('Rice')
+    assert len(client.get('/goods?category=food').get_json()) == 1
+    assert client.get('/goods?category=clothes').get_json() == []
+    assert response_cache.stats()['entries'] == 2
+
+    add_goods('Beans')
+    assert response_cache.stats()['entries'] == 0
+    assert len(client.get('/goods?category=food').get_json()) == 2
+
+
+def test_cache_misses_keep_replica_routing(app, client, monkeypatch, add_goods):
+    """Test a cache miss still reads from a replica and caches the result only briefly."""
+    goods_id = add_goods('Oats')
+    read_only = []
+
+    def choose(engines):
+        # Stand in for a replica while reading from the test database
+        read_only.append(g.get('read_only'))
+        g.replica_read = True
+        return None
+
+    monkeypatch.setattr(replica_router, 'choose', choose)
+    monkeypatch.setitem(app.config, 'REPLICA_STICKY_SECONDS', 2)
+    assert client.get(f'/goods/{goods_id}').status_code == 200
+    assert read_only and all(read_only)
+    entry = response_cache._entries[f'/goods/{goods_id}?']
+    assert entry.expires_at - time.monotonic() <= 2
+
+
+def test_goods_versions_read_once_per_lookup(client, monkeypatch, add_goods):
+    """Test a goods read looks its versions up once, plus one recheck when it is computed."""
+    goods_id = add_goods('Tea')
+    reads = []
+    get_many = shared_cache.backend.get_many
+    monkeypatch.setattr(shared_cache.backend, 'get_many', lambda keys: reads.append(keys) or get_many(keys))
+
+    assert client.get(f'/goods/{goods_id}').status_code == 200
+    assert len(reads) == 2
+    reads.clear()
+    assert client.get(f'/goods/{goods_id}').status_code == 200
+    assert len(reads) == 1
+
+
+def test_cache_memory_cap_evicts_least_recent():
+    """Test entries beyond the byte cap evict the least recently used ones."""
+    cache = ResponseCache(max_bytes=100, ttl=60)
+    cache.set('a', b'x' * 40, 'application/json', 'v1', ['catalog'])
+    cache.set('b', b'x' * 40, 'application/json', 'v1', ['catalog'])
+    assert cache.get('a', 'v1') is not None
+    cache.set('c', b'x' * 40, 'application/json', 'v1', [('goods', 1)])
+
+    assert cache.get('b', 'v1') is None
+    assert cache.get('a', 'v1') is not None
+    assert cache.get('a', 'v2') is None
+    stats = cache.stats()
+    assert stats['evictions'] == 2
+    assert stats['bytes'] <= 100
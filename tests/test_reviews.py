@@ -1,5 +1,10 @@
 # tests/test_reviews.py
 
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Customer, Review
+
 def test_submit_review_success(client, admin_token, regular_user_token):
     """Test submitting a review successfully."""
     # Add goods first
@@ -179,3 +184,87 @@ def test_moderate_review_flag(client, admin_token, regular_user_token):
     assert moderate_response.status_code == 200
     data = moderate_response.get_json()
     assert data['message'] == 'Review has been flagged.'
+
+def test_product_reviews_constant_queries(client, admin_token, query_counter):
+    """Test that listing a product's reviews does not issue a query per review."""
+    add_response = client.post('/goods', json={
+        'name': 'Desk Lamp',
+        'category': 'electronics',
+        'price_per_item': 24.99,
+        'count_in_stock': 10
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+    goods_id = add_response.get_json()['goods_id']
+
+    def review_as(username, rating):
+        client.post('/customers/register', json={
+            'full_name': username.title(),
+            'username': username,
+            'password': 'Password123!',
+            'age': 30,
+            'address': 'Somewhere'
+        })
+        token = client.post('/customers/login', json={
+            'username': username,
+            'password': 'Password123!'
+        }).get_json()['access_token']
+        client.post('/reviews', json={
+            'goods_id': goods_id,
+            'rating': rating
+        }, headers={'Authorization': f'Bearer {token}'})
+
+    review_as('reviewer1', 4)
+    query_counter.count = 0
+    assert len(client.get(f'/goods/{goods_id}/reviews').get_json()) == 1
+    single_review_queries = query_counter.count
+
+    review_as('reviewer2', 5)
+    review_as('reviewer3', 3)
+    query_counter.count = 0
+    data = client.get(f'/goods/{goods_id}/reviews').get_json()
+    assert {review['customer']['username'] for review in data} == {'reviewer1', 'reviewer2', 'reviewer3'}
+    assert query_counter.count == single_review_queries
+
+def test_duplicate_review_rejected_by_unique_index(app, client, admin_token, regular_user_token):
+    """Test the database refuses a second review even when the route check is bypassed."""
+    add_response = client.post('/goods', json={
+        'name': 'Desk Lamp',
+        'category': 'electronics',
+        'price_per_item': 24.99,
+        'description': 'LED desk lamp.',
+        'count_in_stock': 10
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+    goods_id = add_response.get_json()['goods_id']
+    response = client.post('/reviews', json={
+        'goods_id': goods_id,
+        'rating': 4
+    }, headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 201
+
+    with app.app_context():
+        customer = Customer.query.filter_by(username='testuser').first()
+        db.session.add(Review(customer_id=customer.id, goods_id=goods_id, rating=1))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+def test_product_reviews_etag_changes_on_review(client, admin_token, regular_user_token):
+    """Test a new review invalidates the ETag of the product's review listing."""
+    add_response = client.post('/goods', json={
+        'name': 'Notebook',
+        'category': 'accessories',
+        'price_per_item': 4.5,
+        'count_in_stock': 50
+    }, headers={'Authorization': f'Bearer {admin_token}'})
+    goods_id = add_response.get_json()['goods_id']
+    url = f'/goods/{goods_id}/reviews'
+
+    etag = client.get(url).headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/reviews', json={
+        'goods_id': goods_id,
+        'rating': 3
+    }, headers={'Authorization': f'Bearer {regular_user_token}'})
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 1
@@ -0,0 +1,100 @@
+# tests/test_routing.py
+
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select
+
+import routing
+from routing import ReplicaRouter, RoutingSession, read_only
+from shared_cache import shared_cache
+
+routed_db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+class Note(routed_db.Model):
+    id = routed_db.Column(routed_db.Integer, primary_key=True)
+    text = routed_db.Column(routed_db.String(50), nullable=False)
+
+
+@pytest.fixture
+def routed_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}',
+        'SQLALCHEMY_BINDS': {'replica0': f'sqlite:///{tmp_path / "replica.db"}'},
+        'DATABASE_REPLICAS': ['replica0'],
+        'REPLICA_STICKY_SECONDS': 60,
+        'JWT_SECRET_KEY': 'routing-test-secret'
+    })
+    routed_db.init_app(app)
+    JWTManager(app)
+
+    @app.route('/notes', methods=['GET'])
+    @read_only
+    def list_notes():
+        return jsonify(sorted(note.text for note in Note.query.all()))
+
+    @app.route('/notes', methods=['POST'])
+    @jwt_required()
+    def add_note():
+        routed_db.session.add(Note(text='written'))
+        routed_db.session.commit()
+        return jsonify({}), 201
+
+    with app.app_context():
+        routed_db.create_all()
+        routed_db.metadata.create_all(routed_db.engines['replica0'])
+        with routed_db.engines[None].begin() as conn:
+            conn.execute(Note.__table__.insert(), {'text': 'primary'})
+        with routed_db.engines['replica0'].begin() as conn:
+            conn.execute(Note.__table__.insert(), {'text': 'replica'})
+    shared_cache.clear()
+    yield app
+    shared_cache.clear()
+    with app.app_context():
+        for engine in routed_db.engines.values():
+            engine.dispose()
+
+
+def _auth(app, username):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=username)}'}
+
+
+def test_read_only_routes_use_replica(routed_app):
+    """Test read-only routes read from the replica and writes go to the primary."""
+    client = routed_app.test_client()
+    assert client.get('/notes').get_json() == ['replica']
+
+    assert client.post('/notes', headers=_auth(routed_app, 'alice')).status_code == 201
+    with routed_app.app_context():
+        with routed_db.engines[None].connect() as conn:
+            assert sorted(conn.execute(select(Note.text)).scalars()) == ['primary', 'written']
+    assert client.get('/notes').get_json() == ['replica']
+
+
+def test_writer_reads_own_writes(routed_app):
+    """Test a user who just wrote reads from the primary until the sticky window passes."""
+    client = routed_app.test_client()
+    alice = _auth(routed_app, 'alice')
+    client.post('/notes', headers=alice)
+
+    assert client.get('/notes', headers=alice).get_json() == ['primary', 'written']
+    assert client.get('/notes', headers=_auth(routed_app, 'bob')).get_json() == ['replica']
+
+    routed_app.config['REPLICA_STICKY_SECONDS'] = 0
+    assert client.get('/notes', headers=alice).get_json() == ['replica']
+
+
+def test_writer_stickiness_is_shared_between_workers(routed_app, monkeypatch):
+    """Test a write recorded by one worker keeps the writer on the primary in another."""
+    client = routed_app.test_client()
+    alice = _auth(routed_app, 'alice')
+    client.post('/notes', headers=alice)
+
+    # A router without any process state of its own, as in a freshly forked worker
+    monkeypatch.setattr(routing, 'replica_router', ReplicaRouter(shared_cache))
+    assert client.get('/notes', headers=alice).get_json() == ['primary', 'written']
@@ -0,0 +1,43 @@
+# tests/test_serializers.py
+
+import json
+from datetime import datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+from models import db, Customer, Goods, Purchase, Review
+from schemas import CustomerSchema, GoodsSchema, PurchaseSchema, ReviewSchema
+from serializers import OrjsonProvider, compile_serializer
+
+
+def test_compiled_serializers_match_marshmallow(app):
+    """Test compiled serializers produce exactly what the schemas' dump() produces."""
+    with app.app_context():
+        customer = Customer.query.filter_by(username='admin').first()
+        goods = Goods(name='Kettle', category='electronics', price_per_item=35, count_in_stock=4)
+        db.session.add(goods)
+        db.session.flush()
+        purchase = Purchase(customer_id=customer.id, goods_id=goods.id, quantity=2,
+                            total_price=70, purchase_date=datetime(2024, 5, 1, 12, 30))
+        review = Review(customer_id=customer.id, goods_id=goods.id, rating=4,
+                        created_at=datetime(2024, 5, 2, 8, 0), is_moderated=False)
+        db.session.add_all([purchase, review])
+        db.session.commit()
+
+        for schema, obj in [
+            (CustomerSchema(many=True), [customer]),
+            (GoodsSchema(), goods),
+            (GoodsSchema(many=True), [goods, goods]),
+            (PurchaseSchema(many=True), [purchase]),
+            (ReviewSchema(), review),
+        ]:
+            assert compile_serializer(schema)(obj) == schema.dump(obj)
+
+
+def test_orjson_provider_matches_default(app):
+    """Test the orjson provider encodes the same JSON as Flask's default provider."""
+    data = {'b': [1, 2.5, None, True], 'a': {'nested': 'välue'}, 'when': datetime(2024, 1, 2, 3, 4, 5)}
+    fast = OrjsonProvider(app).dumps(data)
+    default = DefaultJSONProvider(app).dumps(data)
+    assert json.loads(fast) == json.loads(default)
+    assert list(json.loads(fast)) == ['a', 'b', 'when']
@@ -0,0 +1,102 @@
+# tests/test_shared_cache.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shared_cache import LocalBackend, SharedCache, SqliteBackend
+
+
+def test_single_flight_computes_once():
+    """Test concurrent misses on one key run the computation only once."""
+    cache = SharedCache(LocalBackend(), beta=0)
+    calls = []
+    start = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'answer': 42}
+
+    def fetch(_):
+        start.wait()
+        return cache.fetch('popular', compute, ttl=60)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(fetch, range(8)))
+
+    assert len(calls) == 1
+    assert results == [{'answer': 42}] * 8
+
+
+def test_stale_value_served_while_refreshing():
+    """Test an expired value is served to other workers while one recomputes it."""
+    cache = SharedCache(LocalBackend(), beta=0, lock_timeout=5)
+    cache.fetch('goods:1', lambda: 'old', ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.backend.add('lock:goods:1', b'other-worker', 5)
+    assert cache.fetch('goods:1', lambda: 'new', ttl=60) == 'old'
+
+    cache.backend.delete('lock:goods:1')
+    assert cache.fetch('goods:1', lambda: 'new', ttl=60) == 'new'
+
+
+def test_early_refresh_probability():
+    """Test XFetch refreshes ahead of expiry only when beta allows it."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    eager = SharedCache(LocalBackend(), beta=1e9)
+    eager.fetch('key', compute, ttl=60)
+    assert eager.fetch('key', compute, ttl=60) == 2
+
+    calls.clear()
+    lazy = SharedCache(LocalBackend(), beta=0)
+    lazy.fetch('key', compute, ttl=60)
+    assert lazy.fetch('key', compute, ttl=60) == 1
+
+
+def test_sqlite_backend_shared_between_caches(tmp_path):
+    """Test two caches on one SQLite file (as two workers would) share values and counters."""
+    path = str(tmp_path / 'cache.db')
+    worker_a = SharedCache(SqliteBackend(path), beta=0)
+    worker_b = SharedCache(SqliteBackend(path), beta=0)
+
+    assert worker_a.fetch('recommendations:1', lambda: [1, 2, 3], ttl=60) == [1, 2, 3]
+    assert worker_b.fetch('recommendations:1', lambda: [9], ttl=60) == [1, 2, 3]
+
+    assert worker_a.backend.incr('version:catalog') == 1
+    assert worker_b.backend.incr('version:catalog') == 2
+    assert worker_a.backend.get_many(['version:catalog', 'missing']) == [2, None]
+
+    assert worker_a.backend.add('lock:x', b'a', 5)
+    assert not worker_b.backend.add('lock:x', b'b', 5)
+
+
+def test_expired_lock_taken_over_is_not_released():
+    """Test a computation that outlives its lock leaves the next worker's lock in place."""
+    cache = SharedCache(LocalBackend(), beta=0, lock_timeout=0.05)
+
+    def slow_compute():
+        time.sleep(0.1)
+        # The lock has expired, so another worker starts its own refresh
+        assert cache.backend.add('lock:goods:1', b'other-worker', 5)
+        return 'value'
+
+    assert cache.fetch('goods:1', slow_compute, ttl=60) == 'value'
+    assert cache.backend.get('lock:goods:1') == b'other-worker'
+
+
+def test_sqlite_backend_deletes_only_matching_values(tmp_path):
+    """Test the SQLite backend's compare-and-delete leaves other values alone."""
+    backend = SqliteBackend(str(tmp_path / 'cache.db'))
+    backend.set('lock:x', b'mine', 5)
+
+    assert not backend.delete_if('lock:x', b'theirs')
+    assert backend.get('lock:x') == b'mine'
+    assert backend.delete_if('lock:x', b'mine')
+    assert backend.get('lock:x') is None
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds allowed for ``import app`` plus one more ``create_app()``, interpreter start
+# excluded. About 0.7 s on a developer laptop; the margin absorbs slow CI machines,
+# while pulling numpy, flask_profiler or an ML stack back into startup exceeds it.
+STARTUP_BUDGET_SECONDS = 2.5
+
+
+def test_import_app_skips_heavy_dependencies():
+    """Test that importing the application does not load numpy or flask_profiler when disabled."""
+    code = ('import sys, app; '
+            'print(",".join(m for m in ("numpy", "flask_profiler", "tensorflow") if m in sys.modules))')
+    env = dict(os.environ, FLASK_PROFILER_ENABLED='0')
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+
+
+def test_startup_stays_within_budget():
+    """Test that importing the application and creating another one stay within the time budget."""
+    code = ('import time; started = time.perf_counter(); import app; app.create_app(); '
+            'print(time.perf_counter() - started)')
+    env = {key: value for key, value in os.environ.items() if key != 'FLASK_PROFILER_ENABLED'}
+    timings = []
+    for _ in range(3):
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    # The best of three runs filters out noise from other processes
+    assert min(timings) < STARTUP_BUDGET_SECONDS, timings
+
+
+def test_flask_profiler_is_off_by_default():
+    """Test that flask_profiler is neither enabled nor imported without the environment variable."""
+    code = 'import sys, app; print(app.app.config["FLASK_PROFILER_ENABLED"], "flask_profiler" in sys.modules)'
+    env = {key: value for key, value in os.environ.items() if key != 'FLASK_PROFILER_ENABLED'}
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['False', 'False']
+
+
+def test_create_app_registers_routes(app):
+    """Test that the application factory registers the API blueprint."""
+    assert 'api' in app.blueprints
+    assert any(rule.rule == '/goods' for rule in app.url_map.iter_rules())
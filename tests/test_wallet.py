@@ -0,0 +1,148 @@
+# tests/test_wallet.py
+import pytest
+
+from models import db, Customer, WalletSnapshot, WalletTransaction
+from wallet import ledger_balance, take_snapshots, to_cents
+
+
+def test_to_cents_rounds_half_up():
+    """Test converting currency amounts to integer cents."""
+    assert to_cents(19.99) == 1999
+    assert to_cents(0.1 + 0.2) == 30
+    assert to_cents(0.125) == 13
+    assert to_cents(5) == 500
+
+
+def test_wallet_changes_are_recorded_in_the_ledger(app, client, admin_token, regular_user_token):
+    """Test that charges, deductions and purchases each append a ledger entry."""
+    admin_headers = {'Authorization': f'Bearer {admin_token}'}
+    client.post('/customers/testuser/wallet/charge', json={'amount': 100.10}, headers=admin_headers)
+    client.post('/customers/testuser/wallet/deduct', json={'amount': 0.2}, headers=admin_headers)
+    goods_id = client.post('/goods', json={
+        'name': 'Pen',
+        'category': 'accessories',
+        'price_per_item': 1.3,
+        'count_in_stock': 10
+    }, headers=admin_headers).get_json()['goods_id']
+    response = client.post('/sales', json={'goods_id': goods_id, 'quantity': 3},
+                           headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.get_json()['wallet_balance'] == 96.0
+
+    with app.app_context():
+        customer = Customer.query.filter_by(username='testuser').first()
+        entries = (WalletTransaction.query.filter_by(customer_id=customer.id)
+                   .order_by(WalletTransaction.id).all())
+        assert [(e.kind, e.amount_cents, e.balance_after_cents) for e in entries] == [
+            ('charge', 10010, 10010),
+            ('deduct', -20, 9990),
+            ('purchase', -390, 9600),
+        ]
+        assert customer.wallet_balance_cents == 9600
+        assert customer.wallet_balance == 96.0
+        assert ledger_balance(customer.id) == 9600
+
+
+def test_snapshots_only_cover_changed_wallets(app, client, admin_token, regular_user_token):
+    """Test that snapshots are taken for changed wallets and agree with the ledger."""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    client.post('/customers/testuser/wallet/charge', json={'amount': 30}, headers=headers)
+
+    with app.app_context():
+        assert take_snapshots() == 1
+        assert take_snapshots() == 0
+        customer_id = db.session.query(Customer.id).filter_by(username='testuser').scalar()
+        snapshot = WalletSnapshot.query.filter_by(customer_id=customer_id).one()
+        assert snapshot.balance_cents == 3000
+
+    client.post('/customers/testuser/wallet/deduct', json={'amount': 12.5}, headers=headers)
+    with app.app_context():
+        assert ledger_balance(customer_id) == 1750
+        assert take_snapshots() == 1
+        assert ledger_balance(customer_id) == 1750
+
+
+def test_wallet_history_is_paginated(client, admin_token, regular_user_token):
+    """Test reading the wallet history page by page, by its owner or an admin."""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    for amount in (1, 2, 3):
+        client.post('/customers/testuser/wallet/charge', json={'amount': amount}, headers=headers)
+
+    response = client.get('/customers/testuser/wallet/transactions?limit=2',
+                          headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 200
+    page = response.get_json()
+    assert [item['amount'] for item in page['items']] == [1.0, 2.0]
+    assert page['items'][1]['balance_after'] == 3.0
+
+    response = client.get(f'/customers/testuser/wallet/transactions?after_id={page["next_after_id"]}',
+                          headers=headers)
+    page = response.get_json()
+    assert [item['kind'] for item in page['items']] == ['charge']
+    assert page['next_after_id'] is None
+
+    response = client.get('/customers/admin/wallet/transactions',
+                          headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 403
+
+
+def test_bulk_charge_reports_per_row_results(app, client, admin_token, regular_user_token, monkeypatch):
+    """Test charging many wallets at once, with invalid rows reported individually."""
+    monkeypatch.setitem(app.config, 'BULK_CHARGE_CHUNK_SIZE', 1)
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    client.post('/customers/testuser/wallet/charge', json={'amount': 10}, headers=headers)
+
+    response = client.post('/customers/wallet/bulk-charge', json={'charges': [
+        {'username': 'testuser', 'amount': 5.25},
+        {'username': 'admin', 'amount': 1},
+        {'username': 'nobody', 'amount': 3},
+        {'username': 'testuser', 'amount': 2},
+        {'username': 'admin', 'amount': -1},
+        {'amount': 1},
+        {'username': 'admin', 'amount': 1e20},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data['charged'], data['failed']) == (2, 5)
+    assert [result.get('wallet_balance', result.get('error')) for result in data['results']] == [
+        15.25, 1.0, 'Customer not found.', 'Duplicate username.', 'Invalid amount.', 'Invalid username.',
+        'Amount must not exceed 1000000.'
+    ]
+
+    with app.app_context():
+        customer = Customer.query.filter_by(username='testuser').first()
+        assert customer.wallet_balance_cents == 1525
+        assert ledger_balance(customer.id) == 1525
+
+
+def test_bulk_charge_requires_admin_and_valid_body(client, admin_token, regular_user_token):
+    """Test that bulk charges are admin-only and reject empty or malformed bodies."""
+    response = client.post('/customers/wallet/bulk-charge', json={'charges': [{'username': 'testuser', 'amount': 1}]},
+                           headers={'Authorization': f'Bearer {regular_user_token}'})
+    assert response.status_code == 403
+
+    response = client.post('/customers/wallet/bulk-charge', json={'charges': []},
+                           headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 400
+
+
+def test_oversized_or_malformed_amounts_are_rejected(client, admin_token, regular_user_token):
+    """Test that amounts beyond the configured maximum or not finite numbers get a 400."""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    for path in ('/customers/testuser/wallet/charge', '/customers/testuser/wallet/deduct'):
+        for amount in (1e20, 1000000.01, '5', True, 0.001):
+            response = client.post(path, json={'amount': amount}, headers=headers)
+            assert response.status_code == 400, (path, amount)
+        for body in ('{"amount": 1000000000000000000000000000000}', '{"amount": NaN}'):
+            response = client.post(path, data=body, content_type='application/json', headers=headers)
+            assert response.status_code == 400, (path, body)
+
+    response = client.post('/customers/testuser/wallet/charge', json={'amount': 1000000}, headers=headers)
+    assert response.get_json()['wallet_balance'] == 1000000.0
+
+
+def test_wallet_balance_cannot_be_assigned(app):
+    """Test that the balance can only change through the ledger-writing wallet functions."""
+    with app.app_context():
+        admin = Customer.query.filter_by(username='admin').first()
+        with pytest.raises(AttributeError):
+            admin.wallet_balance = 50.0
@@ -0,0 +1,134 @@
+# versions.py
+
+import functools
+import uuid
+
+from flask import make_response, request
+
+from shared_cache import shared_cache
+from signals import goods_changed, reviews_changed
+
+
+class VersionRegistry:
+    """
+    Version counters for the catalog and for each goods and its reviews.
+
+    Counters are bumped by the change signals once a write has committed and turned
+    into weak ETags, so a client polling unchanged data gets a 304 without the
+    database or the serializers being touched. They live in the shared cache's
+    backend, so with a shared ``SHARED_CACHE_URL`` every worker sees every write;
+    with the default local backend they are private to the process, which is only
+    correct for a single worker (gunicorn.conf.py refuses more). The ETag embeds
+    a random epoch stored next to the counters, so tags issued before the store was
+    reset never match and simply yield a full response.
+
+    Attributes:
+        cache (SharedCache): Cache whose backend holds the counters.
+    """
+
+    EPOCH_KEY = 'version:epoch'
+    EPOCH_TTL = 10 * 365 * 24 * 3600
+    ENVIRON_KEY = 'ecommerce.version_etags'
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    @staticmethod
+    def _name(key):
+        parts = key if isinstance(key, tuple) else (key,)
+        return 'version:' + ':'.join(str(part) for part in parts)
+
+    def version(self, key):
+        value = self.cache.backend.get(self._name(key))
+        return int(value or 0)
+
+    def bump(self, key):
+        self.cache.backend.incr(self._name(key))
+
+    def etag(self, *keys):
+        """
+        Build the ETag value for a response depending on the given keys.
+
+        Args:
+            *keys: Version keys, e.g. ``'catalog'`` or ``('goods', 3)``.
+
+        Returns:
+            str: The (unquoted) ETag value.
+        """
+        backend = self.cache.backend
+        epoch, *counters = backend.get_many([self.EPOCH_KEY] + [self._name(key) for key in keys])
+        if epoch is None:
+            backend.add(self.EPOCH_KEY, uuid.uuid4().hex[:12].encode(), self.EPOCH_TTL)
+            epoch = backend.get(self.EPOCH_KEY)
+        if isinstance(epoch, bytes):
+            epoch = epoch.decode()
+        return f'{epoch}-' + '.'.join(str(int(counter or 0)) for counter in counters)
+
+    def request_etag(self, *keys):
+        """
+        Build the ETag value for ``keys`` once per request.
+
+        The conditional check, the response cache and a view's own cache keys all
+        depend on the same versions; they share one backend round trip this way.
+        The values are kept in the WSGI environ, which, unlike ``g``, never outlives
+        the request. Checks for writes committed while the view ran must call
+        :meth:`etag`.
+
+        Args:
+            *keys: Version keys, e.g. ``'catalog'`` or ``('goods', 3)``.
+
+        Returns:
+            str: The (unquoted) ETag value, as of its first use in the request.
+        """
+        etags = request.environ.setdefault(self.ENVIRON_KEY, {})
+        if keys not in etags:
+            etags[keys] = self.etag(*keys)
+        return etags[keys]
+
+    def reset(self):
+        """Start a new epoch, so every previously issued ETag stops matching."""
+        self.cache.backend.delete(self.EPOCH_KEY)
+
+
+versions = VersionRegistry(shared_cache)
+
+
+@goods_changed.connect
+def _bump_goods(goods_id, **kwargs):
+    versions.bump(('goods', goods_id))
+    versions.bump('catalog')
+
+
+@reviews_changed.connect
+def _bump_reviews(goods_id, **kwargs):
+    versions.bump(('reviews', goods_id))
+
+
+def conditional(version_keys):
+    """
+    Answer ``If-None-Match`` for a GET route from the version registry.
+
+    The ETag is computed before the view runs, so a write committing while the view
+    reads can only make the tag older than the data, never newer.
+
+    Args:
+        version_keys (callable): Called with the view's keyword arguments; returns
+            the list of version keys the response depends on.
+
+    Returns:
+        callable: Decorator for the view function.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = versions.request_etag(*version_keys(**kwargs))
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,221 @@
+# wallet.py
+
+import math
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, insert, literal, select, update
+
+from models import db, Customer, WalletSnapshot, WalletTransaction
+
+# Largest amount a BIGINT cents column can hold
+MAX_CENTS = 2 ** 63 - 1
+
+
+def to_cents(amount):
+    """
+    Convert an amount in currency units to whole cents, rounding half up.
+
+    Args:
+        amount (float or int or str): The amount, e.g. ``19.99``.
+
+    Returns:
+        int: The amount in cents, e.g. ``1999``.
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def parse_amount(amount, max_amount):
+    """
+    Validate an amount sent by a client and convert it to cents.
+
+    Args:
+        amount: The amount as decoded from the request JSON.
+        max_amount (float): Largest amount accepted, in currency units.
+
+    Returns:
+        int: The amount in cents, at least 1.
+
+    Raises:
+        ValueError: If the amount is not a positive finite number, rounds to zero
+            cents, or exceeds ``max_amount``.
+    """
+    if (not isinstance(amount, (int, float)) or isinstance(amount, bool)
+            or (isinstance(amount, float) and not math.isfinite(amount)) or amount <= 0):
+        raise ValueError('Invalid amount.')
+    if amount > max_amount:
+        raise ValueError(f'Amount must not exceed {max_amount}.')
+    amount_cents = to_cents(amount)
+    if not 0 < amount_cents <= MAX_CENTS:
+        raise ValueError('Invalid amount.')
+    return amount_cents
+
+
+def apply(condition, amount_cents, kind):
+    """
+    Change one customer's balance and append the change to the wallet ledger.
+
+    The balance is moved with a single ``UPDATE ... SET wallet_balance_cents =
+    wallet_balance_cents + :amount`` that also checks, for debits, that the balance
+    covers the amount; the new balance comes back from the same statement and is
+    recorded on the ledger row. Nothing is committed, so the change is part of the
+    caller's transaction.
+
+    Args:
+        condition: SQL expression selecting the customer, e.g. ``Customer.id == 3``.
+        amount_cents (int): Cents to add (positive) or take out (negative).
+        kind (str): Ledger entry kind, e.g. ``'charge'``.
+
+    Returns:
+        int or None: The new balance in cents, or None if no customer matched or the
+        balance was insufficient.
+    """
+    conditions = [condition]
+    if amount_cents < 0:
+        conditions.append(Customer.wallet_balance_cents >= -amount_cents)
+
+    row = db.session.execute(
+        update(Customer)
+        .where(*conditions)
+        .values(wallet_balance_cents=Customer.wallet_balance_cents + amount_cents)
+        .returning(Customer.id, Customer.wallet_balance_cents)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+
+    db.session.execute(insert(WalletTransaction).values(
+        customer_id=row.id,
+        amount_cents=amount_cents,
+        balance_after_cents=row.wallet_balance_cents,
+        kind=kind,
+        created_at=datetime.now(timezone.utc)
+    ))
+    return row.wallet_balance_cents
+
+
+def credit(customer_id, amount_cents, kind='charge'):
+    """
+    Add money to a wallet. See :func:`apply`.
+
+    Returns:
+        int or None: The new balance in cents, or None if the customer does not exist.
+    """
+    return apply(Customer.id == customer_id, amount_cents, kind)
+
+
+def debit(customer_id, amount_cents, kind='deduct'):
+    """
+    Take money out of a wallet if the balance covers it. See :func:`apply`.
+
+    Returns:
+        int or None: The new balance in cents, or None if the customer does not exist
+        or the balance is insufficient.
+    """
+    return apply(Customer.id == customer_id, -amount_cents, kind)
+
+
+def credit_many(amounts, kind='charge', chunk_size=500):
+    """
+    Add money to many wallets with one set-based ``UPDATE`` per chunk of customers.
+
+    Each chunk runs ``UPDATE customers SET wallet_balance_cents = wallet_balance_cents
+    + CASE username WHEN ... END WHERE username IN (...) RETURNING ...`` followed by a
+    single multi-row insert of the ledger entries, so the cost is a few statements per
+    ``chunk_size`` customers instead of several per customer. CASE is used rather than
+    ``UPDATE ... FROM (VALUES ...)`` because SQLite cannot name the columns of a
+    VALUES list. Nothing is committed, so all chunks are part of the caller's
+    transaction.
+
+    Args:
+        amounts (dict): Cents to add (positive) by username.
+        kind (str): Ledger entry kind.
+        chunk_size (int): Customers updated per statement.
+
+    Returns:
+        dict: New balance in cents by username, for the usernames that exist.
+    """
+    balances = {}
+    usernames = list(amounts)
+    created_at = datetime.now(timezone.utc)
+    for start in range(0, len(usernames), chunk_size):
+        chunk = usernames[start:start + chunk_size]
+        rows = db.session.execute(
+            update(Customer)
+            .where(Customer.username.in_(chunk))
+            .values(wallet_balance_cents=Customer.wallet_balance_cents
+                    + case({username: amounts[username] for username in chunk}, value=Customer.username))
+            .returning(Customer.id, Customer.username, Customer.wallet_balance_cents)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not rows:
+            continue
+        db.session.execute(insert(WalletTransaction), [
+            {
+                'customer_id': row.id,
+                'amount_cents': amounts[row.username],
+                'balance_after_cents': row.wallet_balance_cents,
+                'kind': kind,
+                'created_at': created_at,
+            }
+            for row in rows
+        ])
+        balances.update((row.username, row.wallet_balance_cents) for row in rows)
+    return balances
+
+
+def take_snapshots():
+    """
+    Record the current balance of every wallet that changed since its last snapshot.
+
+    Each snapshot copies the balance stored on the customer's newest ledger row, in one
+    ``INSERT ... SELECT``, so transactions committed meanwhile are simply left for the
+    next run. Commits the new snapshots.
+
+    Returns:
+        int: Number of snapshots taken.
+    """
+    latest = select(func.max(WalletTransaction.id)).group_by(WalletTransaction.customer_id)
+    snapshotted = (select(func.coalesce(func.max(WalletSnapshot.last_transaction_id), 0))
+                   .where(WalletSnapshot.customer_id == WalletTransaction.customer_id)
+                   .scalar_subquery())
+    rows = (select(WalletTransaction.customer_id, WalletTransaction.balance_after_cents,
+                   WalletTransaction.id, literal(datetime.now(timezone.utc)))
+            .where(WalletTransaction.id.in_(latest), WalletTransaction.id > snapshotted))
+    result = db.session.execute(
+        insert(WalletSnapshot).from_select(
+            ['customer_id', 'balance_cents', 'last_transaction_id', 'created_at'], rows
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def ledger_balance(customer_id):
+    """
+    Compute a customer's balance from the ledger: latest snapshot plus later changes.
+
+    Args:
+        customer_id (int): ID of the customer.
+
+    Returns:
+        int: The balance in cents according to the ledger.
+    """
+    snapshot = (db.session.query(WalletSnapshot.balance_cents, WalletSnapshot.last_transaction_id)
+                .filter_by(customer_id=customer_id)
+                .order_by(WalletSnapshot.last_transaction_id.desc())
+                .first())
+    balance, after_id = snapshot if snapshot else (0, 0)
+    changes = (db.session.query(func.coalesce(func.sum(WalletTransaction.amount_cents), 0))
+               .filter(WalletTransaction.customer_id == customer_id, WalletTransaction.id > after_id)
+               .scalar())
+    return balance + changes
+
+
+@click.command('wallet-snapshot')
+@with_appcontext
+def snapshot_command():
+    """Snapshot the balance of every wallet changed since its last snapshot."""
+    click.echo(f'{take_snapshots()} wallet snapshots taken.')
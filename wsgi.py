@@ -0,0 +1,75 @@
+# wsgi.py
+
+"""
+Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+With ``preload_app`` gunicorn imports this module once in the master, so imports,
+schema and serializer compilation and :func:`warm_up` happen before the workers are
+forked and are shared copy-on-write; :func:`after_fork` then gives each worker its
+own database connections and background threads.
+"""
+
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import app
+from hashing import password_hasher
+from models import db
+from recommendations import co_purchase_index, top_sellers
+from shared_cache import shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(app):
+    """
+    Build in-memory indexes and exercise a read endpoint before serving traffic.
+
+    Failures are logged rather than raised, so a worker still starts against an empty
+    or not yet migrated database.
+
+    Args:
+        app (Flask): The application to warm up.
+    """
+    with app.app_context():
+        try:
+            co_purchase_index.build()
+            top_sellers.load()
+        except SQLAlchemyError:
+            logger.warning('Skipped building recommendation indexes during warm-up', exc_info=True)
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+    response = app.test_client().get('/goods?limit=1')
+    if response.status_code != 200:
+        logger.warning('Warm-up request returned %s', response.status_code)
+
+
+def after_fork(app):
+    """
+    Release resources inherited from the gunicorn master in a new worker.
+
+    Pooled database connections, sqlite handles and the password hashing pool must
+    not be shared between processes, and threads do not survive a fork.
+
+    Args:
+        app (Flask): The application served by the worker.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False leaves the parent's connections alone and only forgets them
+            engine.dispose(close=False)
+    shared_cache.init_app(app)
+    password_hasher.after_fork()
+
+    if not app.config.get('FLASK_PROFILER_ENABLED'):
+        return
+    import flask_profiler
+    collection = getattr(flask_profiler.flask_profiler, 'collection', None)
+    if hasattr(collection, 'after_fork'):
+        collection.after_fork()
+
+
+warm_up(app)